@@ -0,0 +1,114 @@
+"""
+Benchmark admission control at saturation: p50/p99 latency of served requests, with and without
+an AdmissionController in front of a BatchingEngine.
+
+Requests arrive open loop (Poisson) at --overload times the engine's measured capacity, each
+with a client timeout. Without admission every request joins the engine's queue and latency
+grows with the backlog; with it, excess requests are refused at once or dropped at their
+deadline and the ones served keep a bounded latency.
+
+    python benchmarks/bench_admission.py --overload 2 --seconds 5
+"""
+
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from sarinfer.api.admission import AdmissionController, PriorityClass
+from sarinfer.core.cpu_manager import DenseModel
+from sarinfer.core.inference import BatchingEngine
+from sarinfer.utils.exceptions import DeadlineExceededException, QueueFullException, RateLimitedException
+
+
+def make_model(layers: int, hidden: int):
+    rng = np.random.default_rng(0)
+    weights = {}
+    for i in range(layers):
+        weights[f"layers.{i}.weight"] = (rng.standard_normal((hidden, hidden)) / np.sqrt(hidden)).astype(np.float32)
+    return DenseModel(weights)
+
+
+def capacity(engine, x, seconds: float = 1.0):
+    """Requests per second the engine completes with a saturated queue."""
+    start = time.perf_counter()
+    done = 0
+    while time.perf_counter() - start < seconds:
+        futures = [engine.submit(x) for _ in range(256)]
+        for future in futures:
+            future.result()
+        done += len(futures)
+    return done / (time.perf_counter() - start)
+
+
+async def one_request(engine, admission, x, timeout: float, latencies: list, outcomes: dict):
+    start = time.perf_counter()
+    ticket = None
+    try:
+        if admission is not None:
+            ticket = await admission.admit("client", admission.deadline_for(timeout))
+        future = engine.submit(x)
+        if ticket is not None:
+            future.add_done_callback(ticket.release)
+        await asyncio.wrap_future(future)
+    except (RateLimitedException, QueueFullException):
+        outcomes["refused"] += 1
+        return
+    except DeadlineExceededException:
+        outcomes["expired"] += 1
+        return
+    latency = time.perf_counter() - start
+    if latency > timeout:
+        outcomes["late"] += 1
+    latencies.append(latency)
+
+
+async def run(engine, x, rate: float, seconds: float, timeout: float, admission=None):
+    latencies = []
+    outcomes = {"refused": 0, "expired": 0, "late": 0}
+    rng = np.random.default_rng(0)
+    tasks = []
+    stop_at = time.perf_counter() + seconds
+    next_at = time.perf_counter()
+    while next_at < stop_at:
+        await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+        tasks.append(asyncio.create_task(one_request(engine, admission, x, timeout, latencies, outcomes)))
+        next_at += rng.exponential(1 / rate)
+    await asyncio.gather(*tasks)
+
+    served = np.array(latencies) * 1000
+    label = "admission" if admission is not None else "no admission"
+    print(f"{label:<13} sent {len(tasks):>6}  served {len(served):>6}  refused {outcomes['refused']:>6}  "
+          f"expired {outcomes['expired']:>6}  past timeout {outcomes['late']:>6}  "
+          f"p50 {np.percentile(served, 50):>8.1f} ms  p99 {np.percentile(served, 99):>8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--layers", type=int, default=4)
+    parser.add_argument("--hidden", type=int, default=2048)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--overload", type=float, default=2.0, help="Arrival rate as a multiple of capacity")
+    parser.add_argument("--timeout", type=float, default=1.0, help="Client timeout in seconds")
+    parser.add_argument("--seconds", type=float, default=3)
+    args = parser.parse_args()
+
+    model = make_model(args.layers, args.hidden)
+    x = np.random.default_rng(1).standard_normal(model.input_size, dtype=np.float32)
+    engine = BatchingEngine(model.forward, args.max_batch_size, max_wait_ms=2).start()
+    try:
+        rate = capacity(engine, x) * args.overload
+        print(f"arrival rate {rate:.0f} req/s ({args.overload}x capacity), client timeout {args.timeout}s")
+        asyncio.run(run(engine, x, rate, args.seconds, args.timeout))
+        # Enough in flight to keep every batch full, and at most about a timeout's worth waiting
+        queue_size = max(1, int(rate / args.overload * args.timeout / 2))
+        classes = {"normal": PriorityClass("normal", 0, rate=rate * 2, burst=int(rate), queue_size=queue_size)}
+        admission = AdmissionController(2 * args.max_batch_size, classes, default_priority="normal")
+        asyncio.run(run(engine, x, rate, args.seconds, args.timeout, admission))
+    finally:
+        engine.stop()
+
+
+if __name__ == "__main__":
+    main()
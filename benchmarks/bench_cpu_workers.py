@@ -0,0 +1,87 @@
+"""
+Benchmark the multi-process worker pool: throughput and memory as workers are added.
+
+Client threads send requests back to back to a WorkerPool serving a random DenseModel whose
+weights sit once in shared memory. For each worker count, prints requests per second and the
+memory of each worker: private (USS) memory should stay flat while the weights are shared.
+Memory figures come from /proc and are Linux only.
+
+    python benchmarks/bench_cpu_workers.py --workers 1 2 4 8 --hidden 2048
+"""
+
+import argparse
+import threading
+import time
+
+import numpy as np
+
+from sarinfer.core.cpu_manager import WorkerPool
+
+
+def make_weights(layers: int, hidden: int):
+    rng = np.random.default_rng(0)
+    weights = {}
+    for i in range(layers):
+        weights[f"layers.{i}.weight"] = (rng.standard_normal((hidden, hidden)) / np.sqrt(hidden)).astype(np.float32)
+        weights[f"layers.{i}.bias"] = np.zeros(hidden, dtype=np.float32)
+    return weights
+
+
+def memory_mb(pid: int):
+    """Returns (rss, pss, uss) of a process in MB, from /proc/<pid>/smaps_rollup."""
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as file:
+            for line in file:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    except OSError:
+        return None
+    return fields["Rss"], fields["Pss"], fields["Private_Clean"] + fields["Private_Dirty"]
+
+
+def run(weights, workers: int, clients: int, seconds: float, max_batch_size: int):
+    pool = WorkerPool(weights, num_workers=workers, max_batch_size=max_batch_size, max_wait_ms=1).start()
+    x = np.random.default_rng(1).standard_normal(weights["layers.0.weight"].shape[1], dtype=np.float32)
+    counts = [0] * clients
+    stop_at = time.monotonic() + seconds
+
+    def client(index):
+        while time.monotonic() < stop_at:
+            pool.infer(x)
+            counts[index] += 1
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    memory = [memory_mb(pid) for pid in pool.pids]
+    pool.stop()
+
+    line = f"workers={workers:<3} {sum(counts) / seconds:>9.0f} req/s"
+    if all(memory):
+        rss, pss, uss = (np.mean(column) for column in zip(*memory))
+        line += f"  per worker: rss {rss:>7.1f} MB  pss {pss:>7.1f} MB  uss {uss:>7.1f} MB"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--layers", type=int, default=4)
+    parser.add_argument("--hidden", type=int, default=1024)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=3)
+    args = parser.parse_args()
+
+    weights = make_weights(args.layers, args.hidden)
+    print(f"weights: {sum(array.nbytes for array in weights.values()) / 1024 ** 2:.1f} MB")
+    for workers in args.workers:
+        run(weights, workers, args.clients, args.seconds, args.max_batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark dynamic batching: throughput against p50/p99 latency for several batch settings.
+
+A fixed number of client threads send requests back to back to a BatchingEngine serving a
+random DenseModel. max_batch_size=1 is the unbatched baseline.
+
+    python benchmarks/bench_inference_batching.py --clients 64 --hidden 2048 --seconds 5
+"""
+
+import argparse
+import threading
+import time
+
+import numpy as np
+
+from sarinfer.core.cpu_manager import DenseModel
+from sarinfer.core.inference import BatchingEngine
+
+SETTINGS = [(1, 0), (8, 1), (16, 2), (32, 5), (64, 10)]
+
+
+def make_model(layers: int, hidden: int):
+    rng = np.random.default_rng(0)
+    weights = {}
+    for i in range(layers):
+        weights[f"layers.{i}.weight"] = (rng.standard_normal((hidden, hidden)) / np.sqrt(hidden)).astype(np.float32)
+        weights[f"layers.{i}.bias"] = np.zeros(hidden, dtype=np.float32)
+    return DenseModel(weights)
+
+
+def run(model, max_batch_size: int, max_wait_ms: float, clients: int, seconds: float):
+    engine = BatchingEngine(model.forward, max_batch_size, max_wait_ms).start()
+    latencies = [[] for _ in range(clients)]
+    stop_at = time.monotonic() + seconds
+
+    def client(out):
+        x = np.random.default_rng().standard_normal(model.input_size, dtype=np.float32)
+        while time.monotonic() < stop_at:
+            start = time.perf_counter()
+            engine.infer(x)
+            out.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client, args=(out,)) for out in latencies]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = engine.stats()
+    engine.stop()
+
+    all_latencies = np.array([latency for out in latencies for latency in out]) * 1000
+    print(f"batch<={max_batch_size:<3} wait={max_wait_ms:<4}ms  {len(all_latencies) / seconds:>9.0f} req/s  "
+          f"p50 {np.percentile(all_latencies, 50):>7.2f} ms  p99 {np.percentile(all_latencies, 99):>7.2f} ms  "
+          f"mean batch {stats['mean_batch_size']:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--layers", type=int, default=4)
+    parser.add_argument("--hidden", type=int, default=1024)
+    parser.add_argument("--seconds", type=float, default=3)
+    args = parser.parse_args()
+
+    model = make_model(args.layers, args.hidden)
+    for max_batch_size, max_wait_ms in SETTINGS:
+        run(model, max_batch_size, max_wait_ms, args.clients, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark the bulk metadata APIs against one-document-per-call loops.
+
+Counts collection calls (one round trip each) and wall time for registering, updating and
+fetching a catalog of models. Uses the MongoDB configured through MONGO_* by default, or an
+in-memory mongomock collection with --mongomock.
+
+    python benchmarks/bench_metadata_bulk.py --models 1000 --mongomock
+"""
+
+import argparse
+import time
+
+from sarinfer.metadata.metadata_manager import ModelMetadataManager
+from sarinfer.metadata.model_metadata import ModelMetadata
+
+SERVER_METHODS = ("insert_one", "insert_many", "update_one", "update_many", "bulk_write", "find", "find_one")
+
+
+class CountingCollection:
+    """Forwards to a collection and counts the calls that go to the server."""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.calls = 0
+
+    def __getattr__(self, name):
+        attr = getattr(self.collection, name)
+        if name not in SERVER_METHODS:
+            return attr
+
+        def counted(*args, **kwargs):
+            self.calls += 1
+            return attr(*args, **kwargs)
+        return counted
+
+
+def make_collection(use_mongomock: bool):
+    if use_mongomock:
+        import mongomock
+        return mongomock.MongoClient().bench.model_metadata
+    from sarinfer.config.mongo_config import MongoDBConfig
+    return MongoDBConfig().get_collection("model_metadata_bench")
+
+
+def run(name, collection, fn):
+    collection.calls = 0
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{name + ':':<28} {collection.calls:>6} round trips  {elapsed * 1000:>9.1f} ms")
+    return collection.calls, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", type=int, default=1000)
+    parser.add_argument("--mongomock", action="store_true")
+    args = parser.parse_args()
+
+    results = {}
+    for mode in ("single", "bulk"):
+        raw = make_collection(args.mongomock)
+        raw.delete_many({})
+        collection = CountingCollection(raw)
+        # Caching disabled so every lookup is measured
+        manager = ModelMetadataManager(cache_ttl=0, collection=collection)
+        catalog = [ModelMetadata(model_name=f"model-{i}", size=1024, location=f"/models/{i}",
+                                 model_id=f"{mode}-{i}", version="v1") for i in range(args.models)]
+        model_ids = [metadata.model_id for metadata in catalog]
+
+        if mode == "single":
+            results["add single"] = run("add_model x N", collection,
+                                        lambda: [manager.add_model(m) for m in catalog])
+            results["update single"] = run("update_model_metadata x N", collection,
+                                           lambda: [manager.update_model_metadata(i, {"load_status": "loaded"})
+                                                    for i in model_ids])
+            results["get single"] = run("get_model_metadata x N", collection,
+                                        lambda: [manager.get_model_metadata(i) for i in model_ids])
+        else:
+            results["add bulk"] = run("add_models", collection, lambda: manager.add_models(catalog))
+            results["update bulk"] = run("update_many", collection,
+                                         lambda: manager.update_many({i: {"load_status": "loaded"}
+                                                                      for i in model_ids}))
+            results["get bulk"] = run("get_many", collection, lambda: manager.get_many(model_ids))
+        raw.delete_many({})
+
+    for op in ("add", "update", "get"):
+        (single_calls, single_time), (bulk_calls, bulk_time) = results[f"{op} single"], results[f"{op} bulk"]
+        print(f"{op}: {single_calls / bulk_calls:.0f}x fewer round trips, {single_time / bulk_time:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Microbenchmark ModelMetadata construction, hydration and serialization.
+
+Reports the per-object cost and retained memory of hydrating N stored documents, the
+path every registry read takes, next to creating new objects and serializing them.
+
+    python benchmarks/bench_model_metadata.py --records 100000
+"""
+
+import argparse
+import time
+import tracemalloc
+from datetime import datetime
+
+from sarinfer.metadata.model_metadata import ModelMetadata
+
+
+def make_documents(count: int):
+    now = datetime.utcnow()
+    return [{"_id": i, "model_id": f"model-{i:08d}", "model_name": f"model-{i % 100}", "version": f"v{i % 7}",
+             "size": 1024 * i + 1, "location": f"/models/{i}", "storage_layout": None, "load_status": "unloaded",
+             "last_loaded": None, "created_at": now, "updated_at": now} for i in range(count)]
+
+
+def measure(name: str, fn, count: int):
+    """Runs fn twice: timed, then under tracemalloc for the memory its result retains."""
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    result = fn()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name + ':':<14} {elapsed / count * 1e6:>7.2f} us/object  {retained / count:>7.0f} B/object")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=100_000)
+    args = parser.parse_args()
+
+    documents = make_documents(args.records)
+    objects = measure("from_dict", lambda: [ModelMetadata.from_dict(d) for d in documents], args.records)
+    measure("to_dict", lambda: [m.to_dict() for m in objects], args.records)
+    measure("new", lambda: [ModelMetadata(model_name=d["model_name"], size=d["size"], location=d["location"],
+                                          model_id=d["model_id"], version=d["version"]) for d in documents],
+            args.records)
+
+
+if __name__ == "__main__":
+    main()
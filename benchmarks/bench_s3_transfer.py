@@ -0,0 +1,75 @@
+"""
+Benchmark the concurrent S3 upload and restore engines against the serial path.
+
+Runs against the endpoint configured in sarinfer.core.s3_manager (a local MinIO
+on 127.0.0.1:9000 by default; MOTO_S3_CUSTOM_ENDPOINTS lets a moto server stand in).
+
+    python benchmarks/bench_s3_transfer.py --files 64 --size-mb 16
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+
+from sarinfer.core.s3_manager import restore_model_folder_from_s3, s3_client, upload_model_folder_to_s3
+
+
+def make_folder(num_files: int, size_mb: int):
+    """Creates a temporary folder of random shards."""
+    folder = tempfile.mkdtemp()
+    for i in range(num_files):
+        with open(os.path.join(folder, f"shard-{i:05d}.bin"), "wb") as f:
+            f.write(os.urandom(size_mb * 1024 * 1024))
+    return folder
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bucket", default="sarinfer-bench")
+    parser.add_argument("--files", type=int, default=32)
+    parser.add_argument("--size-mb", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--chunk-mb", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    try:
+        s3_client.create_bucket(Bucket=args.bucket)
+    except s3_client.exceptions.BucketAlreadyOwnedByYou:
+        pass
+
+    chunksize = args.chunk_mb * 1024 * 1024
+    folder = make_folder(args.files, args.size_mb)
+    restore_folder = tempfile.mkdtemp()
+    try:
+        # Serial baseline: one file at a time, one part at a time
+        results = {
+            "upload serial": upload_model_folder_to_s3(folder, args.bucket, "bench/serial", max_workers=1,
+                                                       multipart_chunksize=chunksize, max_concurrency=1),
+            "upload concurrent": upload_model_folder_to_s3(folder, args.bucket, "bench/concurrent",
+                                                           max_workers=args.workers, multipart_chunksize=chunksize,
+                                                           max_concurrency=args.concurrency),
+            "restore serial": restore_model_folder_from_s3(args.bucket, "bench/serial",
+                                                           os.path.join(restore_folder, "serial"), max_workers=1,
+                                                           multipart_chunksize=chunksize, max_concurrency=1),
+            "restore concurrent": restore_model_folder_from_s3(args.bucket, "bench/concurrent",
+                                                               os.path.join(restore_folder, "concurrent"),
+                                                               max_workers=args.workers,
+                                                               multipart_chunksize=chunksize,
+                                                               max_concurrency=args.concurrency),
+        }
+    finally:
+        shutil.rmtree(folder)
+        shutil.rmtree(restore_folder)
+
+    for name, summary in results.items():
+        print(f"{name + ':':<20} {summary}")
+    for op in ("upload", "restore"):
+        serial, concurrent = results[f"{op} serial"], results[f"{op} concurrent"]
+        if serial.elapsed and concurrent.elapsed:
+            print(f"{op} speedup: {serial.elapsed / concurrent.elapsed:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+# src/sarinfer/api/admission.py
+#
+# Admission control in front of the inference engines.
+#
+# Every request passes three checks before it reaches an engine:
+#
+#   1. Rate: each API key has a token bucket sized by its priority class; a key over its rate is
+#      refused at once (429 with Retry-After).
+#   2. Capacity: at most max_concurrent requests are in the engines at a time. Requests beyond
+#      that wait in one bounded queue per priority class, and a request finding its class's
+#      queue full is refused at once (429) instead of joining an unbounded backlog.
+#   3. Deadline: a request may carry the time its client stops waiting (X-Request-Timeout).
+#      Requests whose deadline passes while queued are dropped (504) without costing compute.
+#
+# When a request leaves the engines the next one is admitted from the highest priority queue
+# that has one, oldest first. Queueing delay is therefore bounded by the queue sizes rather
+# than by the load, which keeps tail latency bounded at saturation.
+#
+# Classes are assigned per API key with API_KEY_PRIORITIES, e.g. "key1:high,key2:low"; keys
+# validated by sarinfer.api.auth that are not listed get ADMISSION_DEFAULT_PRIORITY.
+
+import asyncio
+import os
+import time
+from collections import deque
+from functools import lru_cache
+
+from sarinfer.logger import get_logger
+from sarinfer.utils.errors import DEADLINE_EXCEEDED_ERROR, QUEUE_FULL_ERROR, RATE_LIMITED_ERROR
+from sarinfer.utils.exceptions import DeadlineExceededException, QueueFullException, RateLimitedException
+
+# Requests in the engines at once
+ADMISSION_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", "64"))
+
+# Priority class of each API key ("key:class,..."), and the class of keys not listed
+API_KEY_PRIORITIES = os.getenv("API_KEY_PRIORITIES", "")
+ADMISSION_DEFAULT_PRIORITY = os.getenv("ADMISSION_DEFAULT_PRIORITY", "normal")
+
+# Client timeout applied when a request does not send one; 0 means none
+ADMISSION_DEFAULT_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_DEFAULT_TIMEOUT_SECONDS", "0"))
+
+logger = get_logger(__name__)
+
+
+class PriorityClass:
+    """Scheduling class of a group of API keys."""
+
+    def __init__(self, name: str, priority: int, rate: float, burst: int, queue_size: int):
+        """
+        :param name: Class name, as used in API_KEY_PRIORITIES.
+        :param priority: Lower is served first.
+        :param rate: Requests per second each key of the class may send on average.
+        :param burst: Requests a key may send at once after being idle.
+        :param queue_size: Requests of the class that may wait for capacity.
+        """
+        self.name = name
+        self.priority = priority
+        self.rate = rate
+        self.burst = burst
+        self.queue_size = queue_size
+
+
+def default_priority_classes():
+    """
+    The high, normal and low classes. Each one's rate, burst and queue size can be set with
+    ADMISSION_<CLASS>_RATE, ADMISSION_<CLASS>_BURST and ADMISSION_<CLASS>_QUEUE_SIZE.
+    """
+    defaults = {"high": (50.0, 100, 256), "normal": (20.0, 40, 128), "low": (5.0, 10, 32)}
+    classes = {}
+    for priority, (name, (rate, burst, queue_size)) in enumerate(defaults.items()):
+        prefix = f"ADMISSION_{name.upper()}_"
+        classes[name] = PriorityClass(name, priority, float(os.getenv(prefix + "RATE", str(rate))),
+                                      int(os.getenv(prefix + "BURST", str(burst))),
+                                      int(os.getenv(prefix + "QUEUE_SIZE", str(queue_size))))
+    return classes
+
+
+@lru_cache()
+def get_api_key_priorities():
+    """Parses API_KEY_PRIORITIES once into {api_key: class name}."""
+    priorities = {}
+    for entry in filter(None, (item.strip() for item in API_KEY_PRIORITIES.split(","))):
+        key, _, name = entry.rpartition(":")
+        priorities[key] = name
+    return priorities
+
+
+class TokenBucket:
+    """Allows rate events per second on average and up to burst at once."""
+
+    def __init__(self, rate: float, burst: int, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = float(burst)
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self):
+        """Takes one token if there is one. Returns whether it did."""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def wait_time(self):
+        """Seconds until a token is available."""
+        self._refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else float("inf")
+
+
+class Ticket:
+    """An admitted request's hold on engine capacity. Released once, from any thread."""
+
+    def __init__(self, controller, loop: asyncio.AbstractEventLoop):
+        self._controller = controller
+        self._loop = loop
+        self._released = False
+
+    def release(self, *_):
+        """Gives the capacity back; safe to call repeatedly and as a Future done callback."""
+        if self._released:
+            return
+        self._released = True
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._controller._release()
+        elif not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._controller._release)
+
+
+class AdmissionController:
+    """Rate limits, priority queues and deadlines in front of an engine. Used from one event loop."""
+
+    def __init__(self, max_concurrent: int = None, classes: dict = None, key_priorities: dict = None,
+                 default_priority: str = None, clock=time.monotonic):
+        """
+        :param max_concurrent: (Optional) Requests in the engines at once. Defaults to ADMISSION_MAX_CONCURRENT.
+        :param classes: (Optional) {name: PriorityClass}. Defaults to default_priority_classes().
+        :param key_priorities: (Optional) {api_key: class name}. Defaults to API_KEY_PRIORITIES.
+        :param default_priority: (Optional) Class of unlisted keys. Defaults to ADMISSION_DEFAULT_PRIORITY.
+        :param clock: Monotonic clock, in seconds, that deadlines are expressed in.
+        """
+        self.max_concurrent = max_concurrent or ADMISSION_MAX_CONCURRENT
+        self.classes = classes or default_priority_classes()
+        self.key_priorities = get_api_key_priorities() if key_priorities is None else key_priorities
+        self.default_priority = default_priority or ADMISSION_DEFAULT_PRIORITY
+        if self.default_priority not in self.classes:
+            raise ValueError(f"Unknown default priority class {self.default_priority}")
+        self.clock = clock
+        self.in_flight = 0
+        self._order = sorted(self.classes.values(), key=lambda cls: cls.priority)
+        self._queues = {name: deque() for name in self.classes}  # (deadline, Future), oldest first
+        self._buckets = {}
+        self.admitted = 0
+        self.rate_limited = 0
+        self.queue_full = 0
+        self.expired = 0
+
+    def priority_of(self, api_key: str):
+        """Returns the PriorityClass of an API key."""
+        name = self.key_priorities.get(api_key, self.default_priority)
+        return self.classes.get(name) or self.classes[self.default_priority]
+
+    def deadline_for(self, timeout: float = None):
+        """Turns a client timeout in seconds into a deadline on this controller's clock."""
+        timeout = timeout or ADMISSION_DEFAULT_TIMEOUT_SECONDS
+        return self.clock() + timeout if timeout > 0 else None
+
+    async def admit(self, api_key: str, deadline: float = None):
+        """
+        Waits until the request may enter the engine and returns its Ticket, which must be
+        released when the request leaves it.
+        :param api_key: The validated API key of the request.
+        :param deadline: (Optional) Time, on the controller's clock, after which the client no longer waits.
+        :raises RateLimitedException: The key is over its rate; args[1] is the seconds until it is not.
+        :raises QueueFullException: The key's class has no room to wait; args[1] suggests a retry delay.
+        :raises DeadlineExceededException: The deadline passed before the request could be admitted.
+        """
+        loop = asyncio.get_running_loop()
+        cls = self.priority_of(api_key)
+        bucket = self._buckets.get(api_key)
+        if bucket is None:
+            bucket = self._buckets[api_key] = TokenBucket(cls.rate, cls.burst, self.clock)
+        if not bucket.take():
+            self.rate_limited += 1
+            raise RateLimitedException(RATE_LIMITED_ERROR.format(rate=cls.rate), bucket.wait_time())
+        if deadline is not None and self.clock() >= deadline:
+            self.expired += 1
+            raise DeadlineExceededException(DEADLINE_EXCEEDED_ERROR)
+
+        # Free capacity goes to a newcomer only when nobody of its class or a higher one is waiting
+        waiting_ahead = any(self._queues[other.name] for other in self._order if other.priority <= cls.priority)
+        if self.in_flight < self.max_concurrent and not waiting_ahead:
+            return self._grant(loop)
+
+        queue = self._queues[cls.name]
+        if len(queue) >= cls.queue_size:
+            self.queue_full += 1
+            raise QueueFullException(QUEUE_FULL_ERROR.format(priority=cls.name), 1.0)
+        future = loop.create_future()
+        entry = (deadline, future)
+        queue.append(entry)
+        timeout = None if deadline is None else max(deadline - self.clock(), 0)
+        admitted = False
+        try:
+            ticket = await asyncio.wait_for(asyncio.shield(future), timeout)
+            admitted = True
+            return ticket
+        except asyncio.TimeoutError:
+            self.expired += 1
+            raise DeadlineExceededException(DEADLINE_EXCEEDED_ERROR)
+        finally:
+            # Gave up (deadline or client gone): leave the queue, or return capacity granted meanwhile
+            if not future.done():
+                future.cancel()
+                queue.remove(entry)
+            elif not admitted and not future.cancelled() and future.exception() is None:
+                future.result().release()
+
+    def _grant(self, loop):
+        self.in_flight += 1
+        self.admitted += 1
+        return Ticket(self, loop)
+
+    def _release(self):
+        self.in_flight -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        """Admits waiting requests, highest priority and oldest first, while there is capacity."""
+        for cls in self._order:
+            queue = self._queues[cls.name]
+            while queue and self.in_flight < self.max_concurrent:
+                deadline, future = queue.popleft()
+                if future.done():
+                    continue
+                if deadline is not None and self.clock() >= deadline:
+                    # Its client has given up; serving it would only delay the ones still waiting
+                    self.expired += 1
+                    future.set_exception(DeadlineExceededException(DEADLINE_EXCEEDED_ERROR))
+                    continue
+                future.set_result(self._grant(future.get_loop()))
+
+    def stats(self):
+        """Returns capacity in use, queue depths per class and admission counters."""
+        return {
+            "in_flight": self.in_flight,
+            "max_concurrent": self.max_concurrent,
+            "queued": {name: len(queue) for name, queue in self._queues.items()},
+            "admitted": self.admitted,
+            "rate_limited": self.rate_limited,
+            "queue_full": self.queue_full,
+            "expired": self.expired,
+        }
@@ -3,7 +3,9 @@
 import os
 from functools import lru_cache
 
-from sarinfer.utils.errors import ERROR_INVALID_API_KEY
+from fastapi import Header, HTTPException
+
+from sarinfer.utils.errors import ERROR_INVALID_API_KEY, ERROR_MISSING_API_KEY
 
 
 @lru_cache()
@@ -29,3 +31,16 @@ def check_auth(api_key: str):
     Wrapper function to validate the API key.
     """
     validate_api_key(api_key)
+
+
+def require_api_key(x_api_key: str = Header(None)):
+    """
+    FastAPI dependency: validates the X-API-Key header and returns the key, or answers 401.
+    """
+    if not x_api_key:
+        raise HTTPException(status_code=401, detail=ERROR_MISSING_API_KEY)
+    try:
+        check_auth(x_api_key)
+    except PermissionError as e:
+        raise HTTPException(status_code=401, detail=str(e))
+    return x_api_key
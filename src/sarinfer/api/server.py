@@ -0,0 +1,142 @@
+# src/sarinfer/api/server.py
+#
+# HTTP inference API.
+#
+#   POST /v1/generate  autoregressive generation on a ContinuousBatchingScheduler. With
+#                      "stream": true (the default) tokens are sent as server-sent events the
+#                      moment they are generated, so clients see the first token after one
+#                      prefill instead of after the whole generation.
+#   POST /v1/infer     one example through a BatchingEngine or WorkerPool.
+#   GET  /health, /stats  see sarinfer.api.status.
+#
+# Both inference endpoints go through an AdmissionController (see sarinfer.api.admission):
+# rate limits and full queues answer 429 with Retry-After, and requests whose X-Request-Timeout
+# (seconds) runs out before they are admitted answer 504. A request holds its admission until
+# the engine is done with it, which for a stream is the end of the generation.
+#
+#     app = create_app(scheduler=ContinuousBatchingScheduler(model).start())
+#     uvicorn.run(app)
+
+import asyncio
+import math
+from typing import List, Optional
+
+import numpy as np
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+
+from sarinfer.api import status
+from sarinfer.api.admission import AdmissionController
+from sarinfer.api.auth import require_api_key
+from sarinfer.api.streaming import TokenStream, generation_summary, sse_tokens
+from sarinfer.logger import get_logger
+from sarinfer.utils.errors import DEADLINE_EXCEEDED_ERROR
+from sarinfer.utils.exceptions import DeadlineExceededException, QueueFullException, RateLimitedException
+
+logger = get_logger(__name__)
+
+
+class GenerateBody(BaseModel):
+    prompt: List[int]
+    max_new_tokens: Optional[int] = None
+    stop_token_ids: Optional[List[int]] = None
+    stream: bool = True
+
+
+class InferBody(BaseModel):
+    inputs: list
+
+
+async def admit(admission: AdmissionController, api_key: str, http_request: Request):
+    """
+    Waits for admission of a request, turning refusals into 429 and 504 responses.
+    Returns the Ticket and the request's deadline (None without a timeout).
+    """
+    timeout = http_request.headers.get("X-Request-Timeout")
+    try:
+        timeout = float(timeout) if timeout else None
+    except ValueError:
+        timeout = math.nan
+    if timeout is not None and not (math.isfinite(timeout) and timeout > 0):
+        raise HTTPException(status_code=422, detail="X-Request-Timeout must be a positive number of seconds")
+    deadline = admission.deadline_for(timeout)
+    try:
+        return await admission.admit(api_key, deadline), deadline
+    except (RateLimitedException, QueueFullException) as e:
+        retry_after = e.args[1] if len(e.args) > 1 else 1
+        raise HTTPException(status_code=429, detail=e.args[0],
+                            headers={"Retry-After": str(max(1, math.ceil(min(retry_after, 3600))))})
+    except DeadlineExceededException as e:
+        raise HTTPException(status_code=504, detail=str(e))
+
+
+def create_app(scheduler=None, engine=None, admission: AdmissionController = None):
+    """
+    Builds the FastAPI app.
+    :param scheduler: (Optional) Running ContinuousBatchingScheduler serving /v1/generate.
+    :param engine: (Optional) Running BatchingEngine or WorkerPool serving /v1/infer.
+    :param admission: (Optional) AdmissionController in front of both. Defaults to one with the
+                      ADMISSION_* settings.
+    """
+    app = FastAPI(title="sarinfer")
+    app.state.scheduler = scheduler
+    app.state.engine = engine
+    app.state.admission = admission = admission or AdmissionController()
+    app.include_router(status.router)
+
+    @app.post("/v1/generate")
+    async def generate(body: GenerateBody, http_request: Request, api_key: str = Depends(require_api_key)):
+        if scheduler is None:
+            raise HTTPException(status_code=404, detail="No generative model is served")
+        if not body.prompt:
+            raise HTTPException(status_code=422, detail="prompt must contain at least one token")
+
+        ticket, deadline = await admit(admission, api_key, http_request)
+        stream = TokenStream() if body.stream else None
+        try:
+            # submit blocks while a bounded scheduler queue is full, so it must not run on the event loop
+            request = await run_in_threadpool(scheduler.submit, body.prompt, body.max_new_tokens,
+                                              body.stop_token_ids, stream.on_token if stream else None)
+        except BaseException:
+            ticket.release()
+            raise
+        request.future.add_done_callback(ticket.release)
+        if stream is not None:
+            stream.attach(request)
+            return StreamingResponse(sse_tokens(stream, http_request.is_disconnected), media_type="text/event-stream",
+                                     headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+        # Without a stream the client sees nothing before its timeout, so generation stops there
+        timeout = None if deadline is None else max(deadline - admission.clock(), 0)
+        try:
+            tokens = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(request.future)), timeout)
+        except asyncio.TimeoutError:
+            request.cancel()
+            raise HTTPException(status_code=504, detail=DEADLINE_EXCEEDED_ERROR)
+        except asyncio.CancelledError:
+            request.cancel()
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        return {"tokens": tokens, **generation_summary(request)}
+
+    @app.post("/v1/infer")
+    async def infer(body: InferBody, http_request: Request, api_key: str = Depends(require_api_key)):
+        if engine is None:
+            raise HTTPException(status_code=404, detail="No single-shot model is served")
+        ticket, _ = await admit(admission, api_key, http_request)
+        try:
+            future = await run_in_threadpool(engine.submit, np.asarray(body.inputs, dtype=np.float32))
+        except BaseException:
+            ticket.release()
+            raise
+        future.add_done_callback(ticket.release)
+        try:
+            outputs = await asyncio.wrap_future(future)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        return {"outputs": np.asarray(outputs).tolist()}
+
+    return app
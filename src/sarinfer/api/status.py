@@ -0,0 +1,36 @@
+# src/sarinfer/api/status.py
+
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+
+router = APIRouter()
+
+
+def _components(request: Request):
+    """The serving components the app was created with: {"scheduler": ..., "engine": ...}, unset ones left out."""
+    components = {"scheduler": request.app.state.scheduler, "engine": request.app.state.engine}
+    return {name: component for name, component in components.items() if component is not None}
+
+
+@router.get("/health")
+def health(request: Request):
+    """
+    Liveness and readiness: 200 while every serving component is running, 503 otherwise.
+    """
+    components = {name: component.running for name, component in _components(request).items()}
+    ready = bool(components) and all(components.values())
+    return JSONResponse({"status": "ok" if ready else "unavailable", "components": components},
+                        status_code=200 if ready else 503)
+
+
+@router.get("/stats")
+def stats(request: Request):
+    """
+    Queue depth, batch sizes, throughput and cache counters of every serving component, and
+    admission counters.
+    """
+    stats = {name: component.stats() for name, component in _components(request).items()}
+    admission = getattr(request.app.state, "admission", None)
+    if admission is not None:
+        stats["admission"] = admission.stats()
+    return stats
@@ -0,0 +1,142 @@
+# src/sarinfer/api/streaming.py
+#
+# Hands generated tokens from the scheduler thread to an HTTP response as they are produced.
+#
+# The scheduler calls on_token on its own thread; TokenStream moves every token onto the event
+# loop and buffers it until the response writes it out. Whatever has piled up is written in one
+# chunk, so a reader that keeps up sees every token the step it is produced, and one that falls
+# behind catches up in larger writes. A reader that stops reading for good (its buffer reaches
+# max_buffered tokens) has its sequence cancelled rather than buffered without bound, and so
+# does one that disconnects: either way its batch slot is freed at the scheduler's next step.
+
+import asyncio
+import json
+import os
+import time
+from collections import deque
+
+from sarinfer.logger import get_logger
+
+# Tokens a stream may hold for a reader that is not keeping up before its sequence is cancelled
+STREAM_MAX_BUFFERED_TOKENS = int(os.getenv("STREAM_MAX_BUFFERED_TOKENS", "1024"))
+
+# How often a stream with nothing to send checks whether its client is still connected
+STREAM_DISCONNECT_POLL_SECONDS = float(os.getenv("STREAM_DISCONNECT_POLL_SECONDS", "0.5"))
+
+logger = get_logger(__name__)
+
+
+class TokenStream:
+    """Tokens of one GenerationRequest, passed from the scheduler thread to an asyncio consumer."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop = None, max_buffered: int = None):
+        """
+        :param loop: (Optional) Event loop of the consumer. Defaults to the running loop.
+        :param max_buffered: (Optional) Unread tokens before the sequence is cancelled. Defaults to
+                             STREAM_MAX_BUFFERED_TOKENS.
+        """
+        self.loop = loop or asyncio.get_running_loop()
+        self.max_buffered = max_buffered or STREAM_MAX_BUFFERED_TOKENS
+        self.request = None
+        self.overflowed = False
+        self.done = False
+        self._buffer = deque()
+        self._ready = asyncio.Event()
+
+    def attach(self, request):
+        """Follows a submitted GenerationRequest; the stream ends when the request finishes."""
+        self.request = request
+        request.future.add_done_callback(lambda _: self.loop.call_soon_threadsafe(self._close))
+        return self
+
+    def on_token(self, token: int):
+        """Token callback for ContinuousBatchingScheduler.submit; runs on the scheduler thread."""
+        self.loop.call_soon_threadsafe(self._push, token)
+
+    def _push(self, token: int):
+        self._buffer.append(token)
+        if len(self._buffer) > self.max_buffered and not self.overflowed:
+            self.overflowed = True
+            logger.warning(f"Client fell {len(self._buffer)} tokens behind, cancelling its sequence")
+            self.cancel()
+        self._ready.set()
+
+    def _close(self):
+        self.done = True
+        self._ready.set()
+
+    def cancel(self):
+        if self.request is not None:
+            self.request.cancel()
+
+    async def wait(self, timeout: float = None):
+        """Waits until tokens are buffered or the request finished. Returns False on timeout."""
+        if self._buffer or self.done:
+            return True
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def drain(self):
+        """Returns and clears the buffered tokens."""
+        tokens = list(self._buffer)
+        self._buffer.clear()
+        self._ready.clear()
+        return tokens
+
+    @property
+    def finished(self):
+        return self.done and not self._buffer
+
+
+def sse_event(data: dict, event: str = None):
+    """Formats one server-sent event."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+async def sse_tokens(stream: TokenStream, is_disconnected=None):
+    """
+    Yields the tokens of a stream as server-sent events: one {"index", "token"} event per token,
+    then a "done" event with the finish reason and timings, or an "error" event. The sequence is
+    cancelled if the consumer stops early or is_disconnected (an async callable) reports the
+    client gone.
+    """
+    request = stream.request
+    index = 0
+    try:
+        while not stream.finished:
+            if not await stream.wait(STREAM_DISCONNECT_POLL_SECONDS):
+                if is_disconnected is not None and await is_disconnected():
+                    logger.info("Client disconnected, cancelling its sequence")
+                    stream.cancel()
+                    return
+                continue
+            tokens = stream.drain()
+            if tokens:
+                yield "".join(sse_event({"index": index + i, "token": token}) for i, token in enumerate(tokens))
+                index += len(tokens)
+
+        error = request.future.exception()
+        if error is not None:
+            yield sse_event({"error": str(error)}, "error")
+            return
+        yield sse_event(generation_summary(request, stream.overflowed), "done")
+    finally:
+        # Also reached when the response is torn down mid-stream, e.g. on a failed write
+        if not request.future.done():
+            stream.cancel()
+
+
+def generation_summary(request, overflowed: bool = False):
+    """Finish reason, token count and timings of a finished GenerationRequest."""
+    summary = {
+        "finish_reason": "overflow" if overflowed else request.finish_reason,
+        "generated_tokens": len(request.tokens),
+        "total_time_ms": (time.monotonic() - request.enqueued_at) * 1000,
+    }
+    if request.first_token_at is not None:
+        summary["time_to_first_token_ms"] = (request.first_token_at - request.enqueued_at) * 1000
+    return summary
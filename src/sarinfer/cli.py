@@ -2,65 +2,222 @@
 
 import typer
 
+from sarinfer.core.cas_manager import push_model_version, pull_model_version
 from sarinfer.core.inference import start_inference_system
-from sarinfer.core.s3_manager import upload_model_folder_to_s3, restore_model_folder_from_s3
-from sarinfer.metadata.metadata_manager import list_models, update_model_metadata_for_s3
+from sarinfer.core.s3_manager import S3_BUCKET_NAME, model_s3_prefix, upload_model_folder_to_s3, \
+    restore_model_folder_from_s3
+from sarinfer.metadata.metadata_manager import ModelMetadataManager
+from sarinfer.models.checkpoint_converter import convert_checkpoint
 from sarinfer.models.model_loader import load_model
 
 app = typer.Typer()
 
 
 @app.command()
-def start():
+def start(model_name: str = None, version: str = None, max_batch_size: int = None, max_wait_ms: float = None,
+          workers: int = 1, host: str = "0.0.0.0", port: int = 8000):
     """
     Start the Sarinfer application for inference tasks.
-    This will initialize the system, load models, and prepare the environment.
+    This loads a DenseModel into a batching engine (or --workers processes) and serves it on
+    /v1/infer until interrupted (see sarinfer.api.server).
     """
     typer.echo("Starting Sarinfer...")
-    start_inference_system()
-    typer.echo("Sarinfer is running.")
+    engine = start_inference_system(model_name, version, max_batch_size, max_wait_ms, workers)
+    if engine is None:
+        typer.echo("No model to serve, pass --model-name.", err=True)
+        raise typer.Exit(code=1)
+    # Imported here: the HTTP stack is only needed to serve
+    import uvicorn
+
+    from sarinfer.api.server import create_app
+
+    typer.echo(f"Sarinfer is running on {host}:{port}.")
+    try:
+        # Blocks until interrupted; the engine's threads or worker processes live as long as it does
+        uvicorn.run(create_app(engine=engine), host=host, port=port)
+    finally:
+        engine.stop()
+    typer.echo("Sarinfer stopped.")
+
+
+@app.command()
+def serve(model_name: str, version: str = None, n_heads: int = 8, host: str = "0.0.0.0", port: int = 8000,
+          eos_token_id: int = None, max_batch_size: int = None, kv_cache_bytes: int = None,
+          dequantize: bool = False):
+    """
+    Serve a TransformerLM over HTTP, streaming generated tokens (see sarinfer.api.server).
+    Sequences live in a paged KV cache of --kv-cache-bytes, with prompt prefixes reused.
+    TransformerLM computes in float32, so quantized checkpoints are refused unless --dequantize
+    accepts holding their weights in float32.
+    """
+    # Imported here: the HTTP stack is only needed by this command
+    import uvicorn
+
+    from sarinfer.api.server import create_app
+    from sarinfer.core.cpu_manager import TransformerLM
+    from sarinfer.core.inference import ContinuousBatchingScheduler
+    from sarinfer.core.kv_cache import PagedKVCache
+    from sarinfer.core.prefix_cache import PrefixCache
+    from sarinfer.core.quantization import QuantizedTensor
+
+    weights = load_model(model_name, version)
+    quantized = [tensor for tensor in weights.values() if isinstance(tensor, QuantizedTensor)]
+    if quantized:
+        float32_bytes = sum(4 * tensor.shape[0] * tensor.shape[1] for tensor in quantized)
+        message = f"{len(quantized)} quantized weights of {model_name} take {float32_bytes} bytes as float32"
+        if not dequantize:
+            typer.echo(f"{message}; pass --dequantize to serve them anyway.", err=True)
+            raise typer.Exit(code=1)
+        typer.echo(f"Warning: {message}.", err=True)
+    model = TransformerLM(weights, n_heads)
+    prefix_cache = PrefixCache(PagedKVCache.for_model(model, kv_cache_bytes))
+    scheduler = ContinuousBatchingScheduler(model, max_batch_size, eos_token_id, prefix_cache=prefix_cache).start()
+    typer.echo(f"Serving {model_name} {version or ''} on {host}:{port}")
+    try:
+        uvicorn.run(create_app(scheduler=scheduler), host=host, port=port)
+    finally:
+        scheduler.stop()
 
 
 @app.command()
-def load_model_cli(model_name: str):
+def load_model_cli(model_name: str, version: str = None, stream: bool = False):
     """
-    Load a specific model into Sarinfer.
+    Load a specific model into Sarinfer, from a local folder or by model ID and version.
+    With --stream, converted weights are read directly from S3 instead of being restored first.
     """
     typer.echo(f"Loading model: {model_name}...")
-    load_model(model_name)
-    typer.echo(f"Model {model_name} loaded successfully.")
+    model = load_model(model_name, version, stream=stream)
+    typer.echo(f"Model {model_name} loaded successfully: {len(model)} tensors, {model.nbytes} bytes.")
 
 
 @app.command()
-def list_models_cli():
+def convert_checkpoint_cli(src_folder: str, dst_folder: str, chunk_shape: str = None, codec: str = "blosc",
+                           level: int = None, model_id: str = None, quantize_bits: int = None,
+                           group_size: int = None):
     """
-    List all models in the registry.
+    Convert a checkpoint folder into chunked, compressed zarr arrays.
+    --chunk-shape takes comma-separated sizes, e.g. 256,1024. With --model-id, the chunk
+    layout is recorded in the model's metadata. --quantize-bits 8 or 4 stores 2-D weights
+    as int8 or grouped int4.
+    """
+    typer.echo(f"Converting {src_folder} to {dst_folder}...")
+    chunks = tuple(int(size) for size in chunk_shape.split(",")) if chunk_shape else None
+    layout = convert_checkpoint(src_folder, dst_folder, chunk_shape=chunks, codec=codec, level=level,
+                                quantize_bits=quantize_bits, group_size=group_size)
+    if model_id:
+        ModelMetadataManager().update_model_metadata(model_id, {"storage_layout": layout})
+    typer.echo(f"Converted {len(layout)} tensors to {dst_folder}.")
+
+
+@app.command()
+def list_models_cli(name: str = None, status: str = None, version: str = None, sort_by: str = "model_id",
+                    descending: bool = False, limit: int = None, batch_size: int = None):
+    """
+    List models in the registry, streamed from the database in batches.
     """
     typer.echo("Listing models....")
-    models = list_models()
+    models = ModelMetadataManager().iter_models(model_name=name, load_status=status, version=version,
+                                                fields=["model_name", "version", "load_status"], sort_by=sort_by,
+                                                descending=descending, limit=limit, batch_size=batch_size)
     for model in models:
-        typer.echo(f"Model: {model['name']}, Version: {model['version']}, Status: {model['status']}")
+        typer.echo(f"Model: {model.get('model_name')}, Version: {model.get('version')}, "
+                   f"Status: {model.get('load_status')}, ID: {model['model_id']}")
+
+
+def _check_transfer(summary, action: str):
+    """Reports a folder transfer and exits non-zero if any file failed."""
+    if summary.failed:
+        typer.echo(f"{action} failed for {len(summary.failed)} files: {', '.join(summary.failed[:10])}", err=True)
+        raise typer.Exit(code=1)
+    typer.echo(f"{action} done: {summary}")
+
+
+def _model_version(manager: ModelMetadataManager, model_id: str, version: str = None):
+    """Returns version, or the version recorded in the model's metadata."""
+    if version is not None:
+        return version
+    metadata = manager.get_model_metadata(model_id)
+    if metadata is None or metadata.version is None:
+        typer.echo(f"No version recorded for model {model_id}, pass --version.", err=True)
+        raise typer.Exit(code=1)
+    return metadata.version
+
+
+@app.command()
+def backup_model_to_s3(model_id: str, model_folder_path: str, bucket_name: str = S3_BUCKET_NAME,
+                       version: str = None):
+    """
+    Backup a model to S3, where load-model-cli finds it by ID. --version defaults to the one in
+    the model's metadata. The model is only marked as backed up if every file was uploaded.
+    """
+    manager = ModelMetadataManager()
+    version = _model_version(manager, model_id, version)
+    typer.echo(f"Backing up model {model_id} {version} to S3...")
+    summary = upload_model_folder_to_s3(model_folder_path, bucket_name, model_s3_prefix(model_id, version))
+    _check_transfer(summary, "Backup")
+    manager.update_model_metadata(model_id, {"s3_backup": True})
+    typer.echo(f"Model {model_id} {version} backed up to S3.")
+
+
+@app.command()
+def restore_model_from_s3_cli(model_id: str, restore_path: str, bucket_name: str = S3_BUCKET_NAME,
+                              version: str = None, s3_prefix: str = None):
+    """
+    Restore a model from S3 to the local disk. --s3-prefix defaults to where backup-model-to-s3
+    stores the model's --version, which defaults to the one in its metadata.
+    """
+    if s3_prefix is None:
+        if version is None:
+            version = _model_version(ModelMetadataManager(), model_id)
+        s3_prefix = model_s3_prefix(model_id, version)
+    typer.echo(f"Restoring model {model_id} from s3://{bucket_name}/{s3_prefix}...")
+    summary = restore_model_folder_from_s3(bucket_name, s3_prefix, restore_path)
+    _check_transfer(summary, "Restore")
+    typer.echo(f"Model {model_id} restored from S3.")
+
+
+@app.command()
+def sync_model_to_s3_cli(model_folder_path: str, s3_prefix: str, bucket_name: str = S3_BUCKET_NAME,
+                         delete: bool = False):
+    """
+    Upload only the files of a model folder that changed since the last backup.
+    """
+    typer.echo(f"Syncing {model_folder_path} to s3://{bucket_name}/{s3_prefix}...")
+    summary = upload_model_folder_to_s3(model_folder_path, bucket_name, s3_prefix, sync=True, delete=delete)
+    _check_transfer(summary, "Sync to S3")
+
+
+@app.command()
+def sync_model_from_s3_cli(s3_prefix: str, restore_path: str, bucket_name: str = S3_BUCKET_NAME,
+                           delete: bool = False):
+    """
+    Download only the files of a model that are missing or changed on the local disk.
+    """
+    typer.echo(f"Syncing s3://{bucket_name}/{s3_prefix} to {restore_path}...")
+    summary = restore_model_folder_from_s3(bucket_name, s3_prefix, restore_path, sync=True, delete=delete)
+    _check_transfer(summary, "Sync from S3")
 
 
 @app.command()
-def backup_model_to_s3(model_name: str, model_file_path: str):
+def push_model_version_cli(model_id: str, version: str, model_folder_path: str, bucket_name: str = S3_BUCKET_NAME):
     """
-    Backup a model to S3.
+    Backup a model version to the deduplicated S3 store, uploading only new shards.
     """
-    typer.echo(f"Backing up model {model_name} to S3...")
-    upload_model_folder_to_s3(model_name, model_file_path)
-    update_model_metadata_for_s3(model_name, backup_status=True)
-    typer.echo(f"Model {model_name} backed up to S3.")
+    typer.echo(f"Pushing model {model_id} {version} to S3...")
+    _, summary = push_model_version(model_folder_path, bucket_name, model_id, version)
+    _check_transfer(summary, "Push")
+    typer.echo(f"Model {model_id} {version} pushed to S3.")
 
 
 @app.command()
-def restore_model_from_s3_cli(model_name: str, restore_path: str):
+def pull_model_version_cli(model_id: str, version: str, restore_path: str, bucket_name: str = S3_BUCKET_NAME):
     """
-    Restore a model from S3 to the local disk.
+    Restore a model version from the deduplicated S3 store, downloading only missing shards.
     """
-    typer.echo(f"Restoring model {model_name} from S3...")
-    restore_model_folder_from_s3(model_name, restore_path)
-    typer.echo(f"Model {model_name} restored from S3.")
+    typer.echo(f"Pulling model {model_id} {version} from S3...")
+    _, summary = pull_model_version(bucket_name, model_id, version, restore_path)
+    _check_transfer(summary, "Pull")
+    typer.echo(f"Model {model_id} {version} pulled from S3.")
 
 
 if __name__ == "__main__":
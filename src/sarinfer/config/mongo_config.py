@@ -1,6 +1,68 @@
 import os
+import threading
+
 from pymongo import MongoClient
 
+# Connection pool and timeouts shared by every MongoDBConfig in the process
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "10000"))
+# 0 waits on a socket indefinitely (the driver default)
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "0"))
+# Comma-separated wire compressors in order of preference, e.g. "zstd,snappy,zlib".
+# zstd and snappy need the zstandard and python-snappy packages; unavailable ones are skipped by the driver.
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "")
+
+# One client per URI per process; MongoClient is thread-safe and pools its own connections
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def _client_options():
+    options = {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "socketTimeoutMS": MONGO_SOCKET_TIMEOUT_MS or None,
+    }
+    if MONGO_COMPRESSORS:
+        options["compressors"] = MONGO_COMPRESSORS
+    return options
+
+
+def get_client(mongo_uri: str):
+    """Returns the process-wide MongoClient for a URI, creating it on first use."""
+    client = _clients.get(mongo_uri)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(mongo_uri)
+            if client is None:
+                client = MongoClient(mongo_uri, **_client_options())
+                _clients[mongo_uri] = client
+    return client
+
+
+def close_clients():
+    """Closes every pooled client, e.g. at shutdown."""
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+
+def _reset_after_fork():
+    # Pooled sockets belong to the parent; the child must open its own connections.
+    # The parent's clients are dropped rather than closed so the parent's connections stay intact.
+    global _clients_lock
+    _clients.clear()
+    _clients_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
 
 class MongoDBConfig:
     """Handles MongoDB connection and settings with authentication support."""
@@ -8,7 +70,7 @@ class MongoDBConfig:
     def __init__(self):
         self.mongo_uri = self._build_mongo_uri()
         self.db_name = os.getenv("MONGO_DB_NAME", "sarinfer_db")
-        self.client = MongoClient(self.mongo_uri)
+        self.client = get_client(self.mongo_uri)
         self.db = self.client[self.db_name]
 
     def _build_mongo_uri(self):
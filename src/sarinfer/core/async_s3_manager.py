@@ -0,0 +1,181 @@
+# src/sarinfer/core/async_s3_manager.py
+#
+# asyncio front end for S3 folder transfers, for use from the API service.
+#
+# boto3 is blocking, so every S3 call runs on a dedicated thread pool sized to the client's
+# connection pool and the event loop only awaits it. A semaphore of the same size keeps
+# requests from queueing inside urllib3, and its counters are reported as pool utilization.
+#
+#     manager = AsyncS3Manager(pool_size=32)
+#     summary = await manager.restore_folder(bucket_name, "models/llama", "/data/llama")
+#     manager.pool_stats()
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from sarinfer.core import s3_manager
+from sarinfer.logger import get_logger
+
+# Connections (and threads) available to async transfers
+S3_ASYNC_POOL_SIZE = int(os.getenv("S3_ASYNC_POOL_SIZE", "32"))
+
+logger = get_logger(__name__)
+
+
+class S3ConnectionPool:
+    """Runs blocking S3 calls off the event loop, one connection per call, and tracks utilization."""
+
+    def __init__(self, size: int = None, client=None):
+        self.size = size or S3_ASYNC_POOL_SIZE
+        self.client = client or s3_manager.create_s3_client(max_pool_connections=self.size)
+        self.in_use = 0
+        self.peak = 0
+        self.waiting = 0
+        self.requests = 0
+        self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="s3-pool")
+        self._semaphore = None
+
+    async def run(self, fn, *args, **kwargs):
+        """Awaits fn(*args, **kwargs) on the pool's threads once a connection is free."""
+        if self._semaphore is None:
+            # Created on first use so it belongs to the running loop
+            self._semaphore = asyncio.Semaphore(self.size)
+        self.waiting += 1
+        async with self._semaphore:
+            self.waiting -= 1
+            self.in_use += 1
+            self.peak = max(self.peak, self.in_use)
+            self.requests += 1
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._executor, partial(fn, *args, **kwargs))
+            finally:
+                self.in_use -= 1
+
+    def stats(self):
+        """Returns the pool size, connections in use, peak use, waiters and total requests."""
+        return {
+            "size": self.size,
+            "in_use": self.in_use,
+            "peak": self.peak,
+            "waiting": self.waiting,
+            "requests": self.requests,
+            "utilization": self.in_use / self.size,
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+
+async def _run_bounded(coro_fn, items, max_in_flight: int):
+    """Async counterpart of s3_manager._run_bounded: at most max_in_flight tasks pending."""
+    pending = set()
+    async for item in items:
+        if len(pending) >= max_in_flight:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        pending.add(asyncio.ensure_future(coro_fn(*item)))
+    if pending:
+        await asyncio.wait(pending)
+
+
+class AsyncS3Manager:
+    """Non-blocking folder upload and restore backed by a sized S3 connection pool."""
+
+    def __init__(self, pool_size: int = None, client=None):
+        self.pool = S3ConnectionPool(pool_size, client)
+
+    @property
+    def client(self):
+        return self.pool.client
+
+    def pool_stats(self):
+        return self.pool.stats()
+
+    async def _iter_local_files(self, folder_path: str, s3_prefix: str):
+        # Walk off the loop, a large tree can take a while to list
+        files = await asyncio.get_running_loop().run_in_executor(
+            None, lambda: list(s3_manager._iter_local_files(folder_path, s3_prefix)))
+        for item in files:
+            yield item
+
+    async def _iter_s3_objects(self, bucket_name: str, s3_prefix: str):
+        # Each page is fetched on the pool while transfers from the previous page run
+        pages = iter(self.client.get_paginator("list_objects_v2").paginate(Bucket=bucket_name, Prefix=s3_prefix))
+        while True:
+            page = await self.pool.run(next, pages, None)
+            if page is None:
+                return
+            for obj in page.get("Contents", []):
+                if not obj['Key'].endswith("/"):
+                    yield (obj,)
+
+    async def upload_folder(self, folder_path: str, bucket_name: str, s3_prefix: str = '',
+                            multipart_chunksize: int = None):
+        """
+        Uploads all files in a folder without blocking the event loop.
+        Each file holds one pooled connection while its parts are sent.
+        :param folder_path: Path to the local folder to be uploaded.
+        :param bucket_name: Name of the target S3 bucket.
+        :param s3_prefix: (Optional) The S3 key prefix under which to store the folder content.
+        :param multipart_chunksize: (Optional) Multipart part size in bytes. Defaults to S3_MULTIPART_CHUNKSIZE.
+        :return: A TransferSummary for the run.
+        """
+        await self.pool.run(s3_manager._check_bucket, bucket_name, self.client)
+        summary = s3_manager.TransferSummary()
+        config = s3_manager._transfer_config(multipart_chunksize, use_threads=False)
+
+        async def upload(local_file_path, s3_key):
+            try:
+                logger.info(f"Uploading {local_file_path} to s3://{bucket_name}/{s3_key}")
+                await self.pool.run(self.client.upload_file, local_file_path, bucket_name, s3_key, Config=config)
+                summary.record(os.path.getsize(local_file_path))
+            except Exception as e:
+                logger.error(f"Failed to upload {local_file_path} to S3: {e}")
+                summary.record_failure(s3_key)
+
+        await _run_bounded(upload, self._iter_local_files(folder_path, s3_prefix), self.pool.size * 2)
+        logger.info(f"Async upload summary: {summary.finish()}, pool: {self.pool_stats()}")
+        return summary
+
+    async def restore_folder(self, bucket_name: str, s3_prefix: str, local_folder_path: str,
+                             multipart_chunksize: int = None):
+        """
+        Restores all files under a prefix without blocking the event loop. Listing pages are
+        streamed into downloads as they arrive.
+        :param bucket_name: Name of the S3 bucket.
+        :param s3_prefix: The S3 key prefix where the folder is stored.
+        :param local_folder_path: Path to the local folder where the content will be restored.
+        :param multipart_chunksize: (Optional) Ranged GET size in bytes. Defaults to S3_MULTIPART_CHUNKSIZE.
+        :return: A TransferSummary for the run.
+        """
+        summary = s3_manager.TransferSummary()
+        config = s3_manager._transfer_config(multipart_chunksize, use_threads=False)
+        list_prefix = s3_prefix.rstrip("/") + "/" if s3_prefix else ""
+
+        async def download(obj):
+            s3_key = obj['Key']
+            local_file_path = os.path.join(local_folder_path, os.path.relpath(s3_key, s3_prefix))
+            try:
+                os.makedirs(os.path.dirname(local_file_path), exist_ok=True)
+                logger.info(f"Downloading s3://{bucket_name}/{s3_key} to {local_file_path}")
+                await self.pool.run(self.client.download_file, bucket_name, s3_key, local_file_path, Config=config)
+                last_modified = obj['LastModified'].timestamp()
+                os.utime(local_file_path, (last_modified, last_modified))
+                summary.record(obj['Size'])
+            except Exception as e:
+                logger.error(f"Failed to download s3://{bucket_name}/{s3_key}: {e}")
+                summary.record_failure(s3_key)
+
+        os.makedirs(local_folder_path, exist_ok=True)
+        try:
+            await _run_bounded(download, self._iter_s3_objects(bucket_name, list_prefix), self.pool.size * 2)
+        except Exception as e:
+            logger.error(f"Failed to restore folder from S3: {e}")
+            summary.record_failure(s3_prefix)
+        logger.info(f"Async restore summary: {summary.finish()}, pool: {self.pool_stats()}")
+        return summary
+
+    def close(self):
+        self.pool.close()
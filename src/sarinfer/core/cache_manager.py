@@ -0,0 +1,215 @@
+# src/sarinfer/core/cache_manager.py
+#
+# Managed on-disk cache of model folders, keyed by model_id/version.
+#
+#   <cache_dir>/models/<model_id>/<version>/   published entries
+#   <cache_dir>/tmp/                           in-progress downloads (renamed into place when complete)
+#   <cache_dir>/locks/                         one lock file per entry, plus index.lock
+#   <cache_dir>/index.json                     size, last access and hit count of every entry
+#
+# Several worker processes can share one cache directory: an entry is fetched by one process
+# while the others wait on its lock, and entries in use hold a shared lock so they are never evicted.
+
+import fcntl
+import json
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
+from sarinfer.logger import get_logger
+
+# Cache location and byte budget
+MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR", os.path.expanduser("~/.cache/sarinfer"))
+MODEL_CACHE_MAX_BYTES = int(os.getenv("MODEL_CACHE_MAX_BYTES", str(100 * 1024 ** 3)))
+
+# Eviction policies: least recently used, or least frequently used (ties broken by recency)
+EVICTION_POLICIES = ("lru", "lfu")
+
+logger = get_logger(__name__)
+
+
+def _folder_size(path: str):
+    """Returns the total size in bytes of the files under path."""
+    total = 0
+    for root, dirs, files in os.walk(path):
+        for file in files:
+            total += os.path.getsize(os.path.join(root, file))
+    return total
+
+
+@contextmanager
+def _locked(lock_path: str, mode: int):
+    """Holds an flock on lock_path for the duration of the block."""
+    with open(lock_path, "a") as lock_file:
+        fcntl.flock(lock_file, mode)
+        try:
+            yield lock_file
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class ModelCache:
+    """Byte-budgeted, process-safe cache of model folders with LRU or LFU eviction."""
+
+    def __init__(self, cache_dir: str = None, max_bytes: int = None, policy: str = "lru"):
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(f"policy must be one of {EVICTION_POLICIES}")
+
+        self.cache_dir = cache_dir or MODEL_CACHE_DIR
+        self.max_bytes = max_bytes or MODEL_CACHE_MAX_BYTES
+        self.policy = policy
+        for sub in ("models", "tmp", "locks"):
+            os.makedirs(os.path.join(self.cache_dir, sub), exist_ok=True)
+        self._index_path = os.path.join(self.cache_dir, "index.json")
+        self._index_lock = os.path.join(self.cache_dir, "locks", "index.lock")
+
+    @staticmethod
+    def _key(model_id: str, version: str):
+        return f"{model_id}/{version}"
+
+    def entry_path(self, model_id: str, version: str):
+        """Returns where a model version lives once published."""
+        return os.path.join(self.cache_dir, "models", model_id, version)
+
+    def _entry_lock(self, key: str):
+        return os.path.join(self.cache_dir, "locks", key.replace("/", "@") + ".lock")
+
+    def _read_index(self):
+        if not os.path.exists(self._index_path):
+            return {}
+        with open(self._index_path) as f:
+            return json.load(f)
+
+    def _write_index(self, index: dict):
+        # Replace atomically so a crash never leaves a truncated index
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".json")
+        with os.fdopen(fd, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self._index_path)
+
+    def _touch(self, key: str):
+        """Records an access in the index."""
+        with _locked(self._index_lock, fcntl.LOCK_EX):
+            index = self._read_index()
+            entry = index.setdefault(key, {"size": _folder_size(os.path.join(self.cache_dir, "models", key)),
+                                           "hits": 0})
+            entry["hits"] += 1
+            entry["last_access"] = time.time()
+            self._write_index(index)
+
+    def total_bytes(self):
+        """Returns the bytes currently held by published entries."""
+        with _locked(self._index_lock, fcntl.LOCK_SH):
+            return sum(entry["size"] for entry in self._read_index().values())
+
+    def entries(self):
+        """Returns a copy of the index: {"model_id/version": {"size", "hits", "last_access"}}."""
+        with _locked(self._index_lock, fcntl.LOCK_SH):
+            return self._read_index()
+
+    def contains(self, model_id: str, version: str):
+        return os.path.isdir(self.entry_path(model_id, version))
+
+    def _reserve(self, key: str, size: int):
+        """
+        Evicts entries until size more bytes fit in the budget, then records key in the index
+        so concurrent fetches account for it. Entries in use are skipped.
+        """
+        with _locked(self._index_lock, fcntl.LOCK_EX):
+            index = self._read_index()
+            index.pop(key, None)
+            total = sum(entry["size"] for entry in index.values())
+            if self.policy == "lfu":
+                order = sorted(index, key=lambda k: (index[k]["hits"], index[k].get("last_access", 0)))
+            else:
+                order = sorted(index, key=lambda k: index[k].get("last_access", 0))
+
+            for candidate in order:
+                if total + size <= self.max_bytes:
+                    break
+                with open(self._entry_lock(candidate), "a") as lock_file:
+                    try:
+                        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        # Pinned by a reader or being fetched
+                        continue
+                    try:
+                        self._remove_entry(candidate)
+                    finally:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+                total -= index.pop(candidate)["size"]
+                logger.info(f"Evicted {candidate} from the model cache")
+
+            if total + size > self.max_bytes:
+                logger.warning(f"Model cache over budget: {total + size} of {self.max_bytes} bytes "
+                               f"(remaining entries are in use)")
+            index[key] = {"size": size, "hits": 0, "last_access": time.time()}
+            self._write_index(index)
+
+    def _forget(self, key: str):
+        with _locked(self._index_lock, fcntl.LOCK_EX):
+            index = self._read_index()
+            if index.pop(key, None) is not None:
+                self._write_index(index)
+
+    def _remove_entry(self, key: str):
+        path = os.path.join(self.cache_dir, "models", key)
+        if os.path.isdir(path):
+            # Move out of the way first so the entry disappears atomically
+            trash = tempfile.mkdtemp(dir=os.path.join(self.cache_dir, "tmp"))
+            os.rename(path, os.path.join(trash, "entry"))
+            shutil.rmtree(trash, ignore_errors=True)
+
+    def _publish(self, model_id: str, version: str, fetch):
+        """Fetches into a temporary folder and renames it into place. Caller holds the entry lock."""
+        key = self._key(model_id, version)
+        tmp_path = tempfile.mkdtemp(dir=os.path.join(self.cache_dir, "tmp"))
+        try:
+            logger.info(f"Model cache miss for {key}, fetching")
+            fetch(tmp_path)
+            self._reserve(key, _folder_size(tmp_path))
+        except Exception:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+
+        final_path = self.entry_path(model_id, version)
+        try:
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            os.rename(tmp_path, final_path)
+        except Exception:
+            self._forget(key)
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+        self._touch(key)
+        return final_path
+
+    @contextmanager
+    def acquire(self, model_id: str, version: str, fetch):
+        """
+        Yields the local path of a model version, fetching it on a miss.
+        The entry cannot be evicted while the block runs.
+        :param model_id: ID of the model.
+        :param version: Version of the model.
+        :param fetch: Callable that writes the model folder into the directory it is given.
+        """
+        key = self._key(model_id, version)
+        path = self.entry_path(model_id, version)
+        with _locked(self._entry_lock(key), fcntl.LOCK_SH) as lock_file:
+            if not os.path.isdir(path):
+                # Only one process fetches; the others wait here and then find the entry published
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                if not os.path.isdir(path):
+                    self._publish(model_id, version, fetch)
+                else:
+                    self._touch(key)
+                fcntl.flock(lock_file, fcntl.LOCK_SH)
+            else:
+                self._touch(key)
+            yield path
+
+    def get(self, model_id: str, version: str, fetch):
+        """Returns the local path of a model version, fetching it on a miss."""
+        with self.acquire(model_id, version, fetch) as path:
+            return path
@@ -0,0 +1,222 @@
+# src/sarinfer/core/cas_manager.py
+#
+# Content-addressed model store on top of S3.
+#
+# Every file is stored once under its SHA-256 digest and every model version is a small
+# JSON manifest mapping relative paths to digests:
+#
+#   <prefix>/blobs/sha256/ab/abcdef...
+#   <prefix>/manifests/<model_id>/<version>.json
+#
+# Versions that share shards (e.g. a fine-tune that only changed adapter weights) share blobs,
+# so a push only uploads new content and a pull only downloads content missing locally.
+
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from botocore.exceptions import ClientError
+
+from sarinfer.core import s3_manager
+from sarinfer.logger import get_logger
+from sarinfer.utils.errors import MANIFEST_NOT_FOUND_ERROR
+from sarinfer.utils.exceptions import ModelManifestNotFoundException
+
+# Key prefix under which blobs and manifests live in the bucket
+S3_CAS_PREFIX = os.getenv("S3_CAS_PREFIX", "cas")
+
+# Read size used while hashing
+HASH_BLOCK_SIZE = 8 * 1024 * 1024
+
+logger = get_logger(__name__)
+
+
+def hash_file(file_path: str):
+    """Returns the hex SHA-256 digest of a file, read in blocks."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def blob_key(digest: str, prefix: str = None):
+    """Returns the S3 key of the blob holding the given digest."""
+    return f"{prefix or S3_CAS_PREFIX}/blobs/sha256/{digest[:2]}/{digest}"
+
+
+def manifest_key(model_id: str, version: str, prefix: str = None):
+    """Returns the S3 key of the manifest for a model version."""
+    return f"{prefix or S3_CAS_PREFIX}/manifests/{model_id}/{version}.json"
+
+
+def _blob_exists(bucket_name: str, key: str):
+    try:
+        s3_manager.s3_client.head_object(Bucket=bucket_name, Key=key)
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] in ("404", "NoSuchKey", "NotFound"):
+            return False
+        raise
+
+
+def build_manifest(folder_path: str, model_id: str, version: str, max_workers: int = None):
+    """
+    Hashes every file in a folder and returns the manifest describing it.
+    :param folder_path: Path to the local model folder.
+    :param model_id: ID of the model the folder belongs to.
+    :param version: Version recorded in the manifest.
+    :param max_workers: (Optional) Number of files hashed at once. Defaults to S3_MAX_WORKERS.
+    """
+    paths = [os.path.relpath(local_file_path, folder_path).replace("\\", "/")
+             for local_file_path, _ in s3_manager._iter_local_files(folder_path, "")]
+
+    def describe(relative_path):
+        local_file_path = os.path.join(folder_path, relative_path)
+        return relative_path, {"digest": hash_file(local_file_path), "size": os.path.getsize(local_file_path)}
+
+    with ThreadPoolExecutor(max_workers=max_workers or s3_manager.S3_MAX_WORKERS) as executor:
+        files = dict(executor.map(describe, paths))
+
+    return {
+        "model_id": model_id,
+        "version": version,
+        "created_at": datetime.utcnow().isoformat(),
+        "files": files,
+    }
+
+
+def get_manifest(bucket_name: str, model_id: str, version: str, prefix: str = None):
+    """Fetches the manifest of a model version from S3."""
+    try:
+        response = s3_manager.s3_client.get_object(Bucket=bucket_name, Key=manifest_key(model_id, version, prefix))
+    except ClientError as e:
+        if e.response['Error']['Code'] in ("404", "NoSuchKey"):
+            raise ModelManifestNotFoundException(MANIFEST_NOT_FOUND_ERROR.format(model_id=model_id, version=version))
+        raise
+    return json.loads(response["Body"].read())
+
+
+def push_model_version(folder_path: str, bucket_name: str, model_id: str, version: str, prefix: str = None,
+                       max_workers: int = None, multipart_chunksize: int = None, max_concurrency: int = None):
+    """
+    Uploads a model folder as a content-addressed version.
+    Only blobs that are not already in the bucket are uploaded; the manifest is written last
+    so it never references a missing blob.
+    :param folder_path: Path to the local model folder.
+    :param bucket_name: Name of the target S3 bucket.
+    :param model_id: ID of the model.
+    :param version: Version to publish.
+    :param prefix: (Optional) Key prefix of the store. Defaults to S3_CAS_PREFIX.
+    :return: A (manifest, TransferSummary) tuple. Files whose blob already existed count as skipped.
+    """
+    s3_manager._check_bucket(bucket_name)
+
+    summary = s3_manager.TransferSummary()
+    config = s3_manager._transfer_config(multipart_chunksize, max_concurrency)
+    max_workers = max_workers or s3_manager.S3_MAX_WORKERS
+    manifest = build_manifest(folder_path, model_id, version, max_workers)
+
+    # One upload per distinct digest, whichever path holds it
+    blobs = {}
+    for relative_path, entry in manifest["files"].items():
+        blobs.setdefault(entry["digest"], (relative_path, entry["size"]))
+
+    def upload(digest, relative_path, size):
+        key = blob_key(digest, prefix)
+        try:
+            if _blob_exists(bucket_name, key):
+                summary.record_skip(size)
+                return
+            local_file_path = os.path.join(folder_path, relative_path)
+            logger.info(f"Uploading {local_file_path} to s3://{bucket_name}/{key}")
+            s3_manager.s3_client.upload_file(local_file_path, bucket_name, key, Config=config)
+            summary.record(size)
+        except Exception as e:
+            logger.error(f"Failed to upload blob {digest} to S3: {e}")
+            summary.record_failure(key)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        s3_manager._run_bounded(executor, upload, ((d, p, s) for d, (p, s) in blobs.items()), max_workers * 2)
+
+    if summary.failed:
+        logger.error(f"Not publishing {model_id} {version}: {len(summary.failed)} blobs failed to upload")
+    else:
+        s3_manager.s3_client.put_object(Bucket=bucket_name, Key=manifest_key(model_id, version, prefix),
+                                        Body=json.dumps(manifest, indent=2).encode(),
+                                        ContentType="application/json")
+        logger.info(f"Published {model_id} {version} to s3://{bucket_name}/{manifest_key(model_id, version, prefix)}")
+
+    logger.info(f"Push summary: {summary.finish()}")
+    return manifest, summary
+
+
+def pull_model_version(bucket_name: str, model_id: str, version: str, local_folder_path: str, prefix: str = None,
+                       max_workers: int = None, multipart_chunksize: int = None, max_concurrency: int = None):
+    """
+    Restores a content-addressed model version into a local folder.
+    Files already present with the right digest are kept, and each missing digest is
+    downloaded once even if several paths share it.
+    :param bucket_name: Name of the S3 bucket.
+    :param model_id: ID of the model.
+    :param version: Version to restore.
+    :param local_folder_path: Path to the local folder where the content will be restored.
+    :param prefix: (Optional) Key prefix of the store. Defaults to S3_CAS_PREFIX.
+    :return: A (manifest, TransferSummary) tuple.
+    """
+    manifest = get_manifest(bucket_name, model_id, version, prefix)
+    summary = s3_manager.TransferSummary()
+    config = s3_manager._transfer_config(multipart_chunksize, max_concurrency)
+    max_workers = max_workers or s3_manager.S3_MAX_WORKERS
+
+    # Group target paths by digest so shared content is fetched once
+    paths_by_digest = {}
+    for relative_path, entry in manifest["files"].items():
+        paths_by_digest.setdefault(entry["digest"], []).append(relative_path)
+
+    def is_current(local_file_path, entry):
+        return (os.path.exists(local_file_path) and os.path.getsize(local_file_path) == entry["size"]
+                and hash_file(local_file_path) == entry["digest"])
+
+    def restore(digest, relative_paths):
+        # Every path in the group shares the same digest and size
+        entry = manifest["files"][relative_paths[0]]
+        size = entry["size"]
+        local_paths = [os.path.join(local_folder_path, p) for p in relative_paths]
+        try:
+            present = [p for p in local_paths if is_current(p, entry)]
+            missing = [p for p in local_paths if p not in present]
+            for _ in present:
+                summary.record_skip(size)
+            if not missing:
+                return
+
+            if present:
+                source = present[0]
+            else:
+                key = blob_key(digest, prefix)
+                source = missing.pop(0)
+                os.makedirs(os.path.dirname(source), exist_ok=True)
+                logger.info(f"Downloading s3://{bucket_name}/{key} to {source}")
+                # Download next to the target and rename, so a partial file never looks complete
+                s3_manager.s3_client.download_file(bucket_name, key, source + ".part", Config=config)
+                os.replace(source + ".part", source)
+                summary.record(size)
+
+            for target in missing:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.copyfile(source, target)
+                summary.record_skip(size)
+        except Exception as e:
+            logger.error(f"Failed to restore blob {digest}: {e}")
+            summary.record_failure(digest)
+
+    os.makedirs(local_folder_path, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        s3_manager._run_bounded(executor, restore, paths_by_digest.items(), max_workers * 2)
+
+    logger.info(f"Pull summary: {summary.finish()}")
+    return manifest, summary
@@ -0,0 +1,583 @@
+# src/sarinfer/core/cpu_manager.py
+#
+# NumPy forward passes for CPU inference.
+#
+# Models take a whole batch at once so every layer is one matrix multiply over all requests,
+# which is what makes batching pay off: BLAS reads each weight matrix once per batch rather
+# than once per request.
+#
+# WorkerPool scales one model across processes. The weights are copied once into a shared
+# memory block (or memory-mapped from a safetensors file) and every worker maps the same
+# pages read-only, so adding a worker adds compute but not another copy of the model. Each
+# worker batches its own requests; the parent sends every request to the worker with the
+# fewest requests in flight.
+#
+#     pool = WorkerPool(weights, num_workers=4).start()
+#     logits = pool.infer(features)
+
+import itertools
+import multiprocessing
+import os
+import pickle
+import queue
+import re
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from sarinfer.core.quantization import QuantizedTensor, group_quantized, quantized_arrays
+from sarinfer.logger import get_logger
+from sarinfer.utils.errors import INFERENCE_WORKER_ERROR
+from sarinfer.utils.exceptions import InferenceWorkerException
+from sarinfer.utils.file_utils import memmap_safetensors
+
+# Weight names of a DenseModel layer: layers.<index>.weight (out, in) and layers.<index>.bias (out,)
+DENSE_LAYER_PATTERN = re.compile(r"^layers\.(\d+)\.weight$")
+
+ACTIVATIONS = {
+    "relu": lambda x: np.maximum(x, 0, out=x),
+    "gelu": lambda x: 0.5 * x * (1.0 + np.tanh(0.7978845608 * (x + 0.044715 * x ** 3))),
+    "identity": lambda x: x,
+}
+
+# Worker processes of a WorkerPool, BLAS threads per worker, and how workers are started
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", str(os.cpu_count() or 1)))
+CPU_WORKER_THREADS = int(os.getenv("CPU_WORKER_THREADS", "1"))
+CPU_WORKER_START_METHOD = os.getenv("CPU_WORKER_START_METHOD", "spawn")
+CPU_WORKER_START_TIMEOUT = float(os.getenv("CPU_WORKER_START_TIMEOUT", "60"))
+# Seconds between checks for workers that died, even while other workers keep replying
+CPU_WORKER_CHECK_INTERVAL = float(os.getenv("CPU_WORKER_CHECK_INTERVAL", "0.1"))
+
+# Thread pool sizes read by the BLAS libraries NumPy may be linked against
+BLAS_THREAD_VARIABLES = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+
+# Tensors in a shared memory block start at multiples of this many bytes
+SHARED_ALIGNMENT = 64
+
+logger = get_logger(__name__)
+
+
+class DenseModel:
+    """A stack of fully connected layers, applied to a (batch, features) array."""
+
+    def __init__(self, weights, activation: str = "relu", dtype=np.float32, quantized_matmul: str = None):
+        """
+        :param weights: Mapping of weight names to arrays (or LazyTensors), see DENSE_LAYER_PATTERN.
+                        QuantizedTensor weights stay quantized and are multiplied with their own kernels.
+        :param activation: Activation between layers, one of ACTIVATIONS. The last layer is linear.
+        :param dtype: Compute dtype.
+        :param quantized_matmul: (Optional) Kernel for quantized weights, see QuantizedTensor.linear.
+        """
+        if activation not in ACTIVATIONS:
+            raise ValueError(f"activation must be one of {tuple(ACTIVATIONS)}")
+        indices = sorted(int(match.group(1)) for match in map(DENSE_LAYER_PATTERN.match, weights) if match)
+        if not indices:
+            raise ValueError("No layers.<index>.weight tensors found")
+
+        self.activation = ACTIVATIONS[activation]
+        self.layers = []
+        for index in indices:
+            # Kept in the stored (out, in) layout: x @ w.T is a transposed BLAS call, not a copy,
+            # so weights mapped from shared memory or disk stay shared
+            weight = weights[f"layers.{index}.weight"]
+            if not isinstance(weight, QuantizedTensor):
+                weight = np.asarray(weight, dtype=dtype)
+            bias_name = f"layers.{index}.bias"
+            bias = np.asarray(weights[bias_name], dtype=dtype) if bias_name in weights else None
+            self.layers.append((weight, bias))
+        self.dtype = np.dtype(dtype)
+        self.quantized_matmul = quantized_matmul
+        logger.info(f"Dense model with {len(self.layers)} layers, "
+                    f"{self.input_size} -> {self.output_size} features")
+
+    @property
+    def input_size(self):
+        return self.layers[0][0].shape[1]
+
+    @property
+    def output_size(self):
+        return self.layers[-1][0].shape[0]
+
+    def forward(self, batch):
+        """Runs a (batch, input_size) array through every layer and returns (batch, output_size)."""
+        x = np.asarray(batch, dtype=self.dtype)
+        last = len(self.layers) - 1
+        for i, (weight, bias) in enumerate(self.layers):
+            if isinstance(weight, QuantizedTensor):
+                x = weight.linear(x, self.quantized_matmul).astype(self.dtype, copy=False)
+            else:
+                x = x @ weight.T
+            if bias is not None:
+                x += bias
+            if i != last:
+                x = self.activation(x)
+        return x
+
+    __call__ = forward
+
+
+def _rms_norm(x, weight, eps: float = 1e-6):
+    return x / np.sqrt(np.mean(x * x, axis=-1, keepdims=True) + eps) * weight
+
+
+def _softmax(x, axis: int = -1):
+    x = x - x.max(axis=axis, keepdims=True)
+    np.exp(x, out=x)
+    x /= x.sum(axis=axis, keepdims=True)
+    return x
+
+
+def init_transformer_weights(vocab_size: int = 256, d_model: int = 64, n_layers: int = 2, d_ff: int = None,
+                             max_positions: int = 512, seed: int = 0, dtype=np.float32):
+    """Returns randomly initialized TransformerLM weights, for tests and benchmarks."""
+    rng = np.random.default_rng(seed)
+    d_ff = d_ff or 4 * d_model
+
+    def normal(*shape):
+        return (rng.standard_normal(shape) / np.sqrt(shape[0])).astype(dtype)
+
+    weights = {"embed": normal(vocab_size, d_model), "pos_embed": normal(max_positions, d_model),
+               "final_norm": np.ones(d_model, dtype), "lm_head": normal(d_model, vocab_size)}
+    for i in range(n_layers):
+        weights.update({
+            f"layers.{i}.attn_norm": np.ones(d_model, dtype),
+            f"layers.{i}.qkv": normal(d_model, 3 * d_model),
+            f"layers.{i}.attn_out": normal(d_model, d_model),
+            f"layers.{i}.mlp_norm": np.ones(d_model, dtype),
+            f"layers.{i}.mlp_up": normal(d_model, d_ff),
+            f"layers.{i}.mlp_down": normal(d_ff, d_model),
+        })
+    return weights
+
+
+class TransformerLM:
+    """
+    A decoder-only transformer for autoregressive generation on CPU.
+
+    Per-sequence state lives in a cache object from new_cache(). decode() advances many
+    sequences by one token at once: every projection is one batched matrix multiply, and
+    only attention, whose context length differs per sequence, runs per sequence.
+    """
+
+    def __init__(self, weights, n_heads: int, dtype=np.float32):
+        """
+        :param weights: Mapping of weight names to arrays (or LazyTensors), see init_transformer_weights.
+        :param n_heads: Number of attention heads; must divide the model width.
+        :param dtype: Compute dtype.
+        """
+        def load(name):
+            return np.ascontiguousarray(np.asarray(weights[name], dtype=dtype))
+
+        self.embed = load("embed")
+        self.pos_embed = load("pos_embed")
+        self.final_norm = load("final_norm")
+        self.lm_head = load("lm_head")
+        self.n_layers = sum(1 for name in weights if name.startswith("layers.") and name.endswith(".qkv"))
+        self.layers = [{part: load(f"layers.{i}.{part}")
+                        for part in ("attn_norm", "qkv", "attn_out", "mlp_norm", "mlp_up", "mlp_down")}
+                       for i in range(self.n_layers)]
+        self.vocab_size, self.d_model = self.embed.shape
+        self.max_positions = self.pos_embed.shape[0]
+        if self.d_model % n_heads:
+            raise ValueError(f"n_heads ({n_heads}) must divide the model width ({self.d_model})")
+        self.n_heads = n_heads
+        self.head_dim = self.d_model // n_heads
+        self.scale = 1.0 / np.sqrt(self.head_dim)
+        self.dtype = np.dtype(dtype)
+
+    def new_cache(self):
+        """Returns an empty per-sequence cache: one growing (keys, values) pair per layer."""
+        return SequenceKVCache(self.n_layers)
+
+    def _split_heads(self, x):
+        return x.reshape(*x.shape[:-1], self.n_heads, self.head_dim)
+
+    def _mlp(self, x, layer):
+        h = _rms_norm(x, layer["mlp_norm"]) @ layer["mlp_up"]
+        return ACTIVATIONS["gelu"](h) @ layer["mlp_down"]
+
+    def prefill(self, tokens, cache):
+        """
+        Runs a prompt through the model, filling cache, and returns the logits of its last position.
+        :param tokens: Prompt token IDs.
+        :param cache: Cache of the sequence, as returned by new_cache().
+        """
+        tokens = np.asarray(tokens)
+        start = cache.length
+        length = len(tokens)
+        if start + length > self.max_positions:
+            raise ValueError(f"Sequence longer than {self.max_positions} positions")
+        x = self.embed[tokens] + self.pos_embed[start:start + length]
+        # Causal mask over the new positions; earlier cached positions are all visible
+        mask = np.triu(np.full((length, start + length), -np.inf, dtype=self.dtype), k=start + 1)
+        for index, layer in enumerate(self.layers):
+            q, k, v = np.split(_rms_norm(x, layer["attn_norm"]) @ layer["qkv"], 3, axis=-1)
+            keys, values = cache.append(index, self._split_heads(k), self._split_heads(v))
+            scores = np.einsum("qhd,khd->hqk", self._split_heads(q), keys) * self.scale + mask
+            attention = np.einsum("hqk,khd->qhd", _softmax(scores), values).reshape(length, self.d_model)
+            x = x + attention @ layer["attn_out"]
+            x = x + self._mlp(x, layer)
+        return _rms_norm(x[-1], self.final_norm) @ self.lm_head
+
+    def decode(self, tokens, caches):
+        """
+        Advances a batch of sequences by one token each.
+        :param tokens: The latest token of every sequence, shape (batch,).
+        :param caches: The cache of every sequence, in the same order.
+        :return: Next-token logits, shape (batch, vocab_size).
+        """
+        positions = np.array([cache.length for cache in caches])
+        if positions.max(initial=0) >= self.max_positions:
+            raise ValueError(f"Sequence longer than {self.max_positions} positions")
+        x = self.embed[np.asarray(tokens)] + self.pos_embed[positions]
+        for index, layer in enumerate(self.layers):
+            q, k, v = np.split(_rms_norm(x, layer["attn_norm"]) @ layer["qkv"], 3, axis=-1)
+            q, k, v = self._split_heads(q), self._split_heads(k), self._split_heads(v)
+            attention = np.empty_like(q)
+            for row, cache in enumerate(caches):
+                keys, values = cache.append(index, k[row:row + 1], v[row:row + 1])
+                scores = np.einsum("hd,khd->hk", q[row], keys) * self.scale
+                attention[row] = np.einsum("hk,khd->hd", _softmax(scores), values)
+            x = x + attention.reshape(len(caches), self.d_model) @ layer["attn_out"]
+            x = x + self._mlp(x, layer)
+        return _rms_norm(x, self.final_norm) @ self.lm_head
+
+
+class SequenceKVCache:
+    """Keys and values of one sequence, one (positions, heads, head_dim) array pair per layer."""
+
+    def __init__(self, n_layers: int):
+        self.keys = [None] * n_layers
+        self.values = [None] * n_layers
+        self.length = 0
+
+    def append(self, layer: int, keys, values):
+        """Adds the keys and values of new positions to a layer and returns the layer's full arrays."""
+        if self.keys[layer] is None:
+            self.keys[layer], self.values[layer] = keys, values
+        else:
+            self.keys[layer] = np.concatenate([self.keys[layer], keys])
+            self.values[layer] = np.concatenate([self.values[layer], values])
+        if layer == len(self.keys) - 1:
+            self.length = len(self.keys[layer])
+        return self.keys[layer], self.values[layer]
+
+
+class SharedWeights:
+    """Named arrays packed into one shared memory block that other processes map without copying."""
+
+    def __init__(self, shm: SharedMemory, layout: dict, owner: bool = False):
+        """
+        :param shm: The shared memory block holding the arrays.
+        :param layout: Mapping of array names to (offset, shape, dtype string).
+        :param owner: Whether close() also unlinks the block.
+        """
+        self.shm = shm
+        self.layout = layout
+        self.owner = owner
+        self.arrays = {}
+        for name, (offset, shape, dtype) in layout.items():
+            array = np.ndarray(shape, dtype, buffer=shm.buf, offset=offset)
+            array.flags.writeable = False
+            self.arrays[name] = array
+
+    @classmethod
+    def create(cls, weights):
+        """
+        Copies a mapping of arrays (or LazyTensors) into a new shared memory block, one tensor at a time.
+        QuantizedTensors are stored quantized, as their qweight and scales arrays.
+        """
+        weights = {stored: array for name, tensor in weights.items()
+                   for stored, array in (quantized_arrays(name, tensor) if isinstance(tensor, QuantizedTensor)
+                                         else {name: tensor}).items()}
+        layout = {}
+        size = 0
+        for name, tensor in weights.items():
+            size = -(-size // SHARED_ALIGNMENT) * SHARED_ALIGNMENT
+            dtype = np.dtype(tensor.dtype)
+            layout[name] = (size, tuple(tensor.shape), dtype.str)
+            size += int(np.prod(tensor.shape)) * dtype.itemsize
+        shm = SharedMemory(create=True, size=max(size, 1))
+        for name, tensor in weights.items():
+            offset, shape, dtype = layout[name]
+            np.ndarray(shape, dtype, buffer=shm.buf, offset=offset)[...] = np.asarray(tensor)
+        logger.info(f"Placed {len(layout)} tensors ({size} bytes) in shared memory {shm.name}")
+        return cls(shm, layout, owner=True)
+
+    @classmethod
+    def attach(cls, name: str, layout: dict):
+        """Maps a block created by another process."""
+        # Processes started by multiprocessing share the creator's resource tracker, which only
+        # removes the block once the creator unlinks it or all of them have exited
+        return cls(SharedMemory(name=name), layout)
+
+    @property
+    def handle(self):
+        """What another process needs to attach: (name, layout)."""
+        return self.shm.name, self.layout
+
+    @property
+    def nbytes(self):
+        return self.shm.size
+
+    def close(self):
+        """Unmaps the block, and removes it when this process created it."""
+        self.arrays = {}
+        try:
+            self.shm.close()
+        except BufferError:
+            # Arrays handed out earlier are still referenced; the mapping goes when they do
+            logger.warning(f"Shared memory {self.shm.name} still in use, leaving it mapped")
+        if self.owner:
+            self.shm.unlink()
+            self.owner = False
+
+
+def _reply(outbox, worker: int, request_id: int, future: Future):
+    try:
+        outbox.put((worker, request_id, True, future.result()))
+    except Exception as e:
+        try:
+            pickle.dumps(e)
+        except Exception:
+            e = RuntimeError(f"{type(e).__name__}: {e}")
+        outbox.put((worker, request_id, False, e))
+
+
+def _worker_main(worker: int, handle, weights_file: str, model_factory, inbox, outbox,
+                 max_batch_size: int, max_wait_ms: float):
+    """Entry point of a WorkerPool process: maps the weights, then batches requests from inbox."""
+    # Imported here: inference imports this module
+    from sarinfer.core.inference import BatchingEngine
+
+    try:
+        shared = SharedWeights.attach(*handle) if handle else None
+        model = model_factory(group_quantized(shared.arrays if shared else memmap_safetensors(weights_file)))
+        engine = BatchingEngine(model, max_batch_size, max_wait_ms).start()
+    except Exception as e:
+        outbox.put((worker, None, False, e))
+        return
+    outbox.put((worker, None, True, os.getpid()))
+
+    while True:
+        item = inbox.get()
+        if item is None:
+            break
+        request_id, inputs = item
+        engine.submit(inputs).add_done_callback(lambda future, request_id=request_id:
+                                                _reply(outbox, worker, request_id, future))
+    engine.stop()
+
+
+class WorkerPool:
+    """
+    Serves a model from several processes that share one copy of its weights. Has the
+    submit/infer interface of BatchingEngine.
+    """
+
+    def __init__(self, weights=None, model_factory=DenseModel, num_workers: int = None,
+                 max_batch_size: int = None, max_wait_ms: float = None, weights_file: str = None,
+                 threads_per_worker: int = None, start_method: str = None):
+        """
+        :param weights: (Optional) Mapping of weight names to arrays or LazyTensors, copied once into shared memory.
+        :param model_factory: Picklable callable building the model from the weight mapping in each worker.
+        :param num_workers: (Optional) Worker processes. Defaults to CPU_WORKERS.
+        :param max_batch_size: (Optional) Largest batch per worker, see BatchingEngine.
+        :param max_wait_ms: (Optional) Batching delay per worker, see BatchingEngine.
+        :param weights_file: (Optional) A .safetensors file every worker memory-maps instead of weights.
+        :param threads_per_worker: (Optional) BLAS threads in each worker. Defaults to CPU_WORKER_THREADS.
+        :param start_method: (Optional) multiprocessing start method. Defaults to CPU_WORKER_START_METHOD.
+        """
+        if (weights is None) == (weights_file is None):
+            raise ValueError("Pass exactly one of weights and weights_file")
+        self.weights = weights
+        self.weights_file = weights_file
+        self.model_factory = model_factory
+        self.num_workers = num_workers or CPU_WORKERS
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.threads_per_worker = threads_per_worker or CPU_WORKER_THREADS
+        self.context = multiprocessing.get_context(start_method or CPU_WORKER_START_METHOD)
+        self.shared = None
+        self.processes = []
+        self.pids = []
+        self.requests = 0
+        self.failed = 0
+        self._inboxes = []
+        self._outbox = None
+        self._in_flight = []
+        self._completed = []
+        self._alive = []
+        self._pending = {}  # request ID -> (worker, Future)
+        self._ids = itertools.count()
+        self._next = 0
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._closing = False
+        self._receiver = None
+
+    def start(self):
+        """Starts the workers and waits until each has built its model."""
+        if self.processes:
+            return self
+        if self.weights is not None:
+            self.shared = SharedWeights.create(self.weights)
+        handle = self.shared.handle if self.shared else None
+        self._outbox = self.context.Queue()
+        self._inboxes = [self.context.Queue() for _ in range(self.num_workers)]
+        self._in_flight = [0] * self.num_workers
+        self._completed = [0] * self.num_workers
+        self._alive = [True] * self.num_workers
+        self.pids = [None] * self.num_workers
+
+        # Workers read their BLAS thread count from the environment when NumPy loads
+        saved = {name: os.environ.get(name) for name in BLAS_THREAD_VARIABLES}
+        os.environ.update({name: str(self.threads_per_worker) for name in BLAS_THREAD_VARIABLES})
+        try:
+            for worker, inbox in enumerate(self._inboxes):
+                process = self.context.Process(
+                    target=_worker_main, daemon=True, name=f"inference-worker-{worker}",
+                    args=(worker, handle, self.weights_file, self.model_factory, inbox, self._outbox,
+                          self.max_batch_size, self.max_wait_ms))
+                process.start()
+                self.processes.append(process)
+        finally:
+            for name, value in saved.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+
+        try:
+            for _ in range(self.num_workers):
+                worker, _, ok, payload = self._outbox.get(timeout=CPU_WORKER_START_TIMEOUT)
+                if not ok:
+                    raise payload
+                self.pids[worker] = payload
+        except Exception:
+            self.stop()
+            raise
+        self._stopping.clear()
+        self._closing = False
+        self._receiver = threading.Thread(target=self._receive, daemon=True, name="inference-pool-receiver")
+        self._receiver.start()
+        logger.info(f"Worker pool started: {self.num_workers} workers, "
+                    f"{self.shared.nbytes if self.shared else 0} bytes of shared weights")
+        return self
+
+    def stop(self):
+        """Stops the workers; requests still in flight fail."""
+        self._closing = True
+        for worker, inbox in enumerate(self._inboxes):
+            if self._alive[worker]:
+                inbox.put(None)
+        # Replies keep being received until the workers are gone, so none blocks on a full pipe
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        self._stopping.set()
+        if self._receiver is not None:
+            self._receiver.join()
+            self._receiver = None
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for _, future in pending.values():
+            future.set_exception(RuntimeError("Worker pool stopped"))
+        for inbox in self._inboxes + ([self._outbox] if self._outbox else []):
+            inbox.close()
+            inbox.join_thread()
+        self.processes = []
+        self._inboxes = []
+        self._outbox = None
+        if self.shared is not None:
+            self.shared.close()
+            self.shared = None
+
+    @property
+    def running(self):
+        return self._receiver is not None and not self._closing and any(self._alive)
+
+    def _least_loaded(self):
+        """Returns the live worker with the fewest requests in flight, rotating between ties."""
+        live = [worker for worker in range(self.num_workers) if self._alive[worker]]
+        if not live:
+            raise RuntimeError("Worker pool is not running")
+        worker = min(live, key=lambda i: (self._in_flight[i], (i - self._next) % self.num_workers))
+        self._next = (worker + 1) % self.num_workers
+        return worker
+
+    def submit(self, inputs):
+        """Sends one example to the least loaded worker and returns a Future for its output row."""
+        if self._receiver is None or self._closing:
+            raise RuntimeError("Worker pool is not running")
+        future = Future()
+        with self._lock:
+            worker = self._least_loaded()
+            request_id = next(self._ids)
+            self._pending[request_id] = (worker, future)
+            self._in_flight[worker] += 1
+            self.requests += 1
+        self._inboxes[worker].put((request_id, inputs))
+        return future
+
+    def infer(self, inputs, timeout: float = None):
+        """Submits one example and waits for its output."""
+        return self.submit(inputs).result(timeout)
+
+    def _receive(self):
+        """Resolves Futures from worker replies and fails the requests of workers that died."""
+        next_check = time.monotonic() + CPU_WORKER_CHECK_INTERVAL
+        while not self._stopping.is_set():
+            if time.monotonic() >= next_check:
+                self._check_workers()
+                next_check = time.monotonic() + CPU_WORKER_CHECK_INTERVAL
+            try:
+                worker, request_id, ok, payload = self._outbox.get(timeout=CPU_WORKER_CHECK_INTERVAL)
+            except queue.Empty:
+                continue
+            with self._lock:
+                entry = self._pending.pop(request_id, None)
+                self._in_flight[worker] -= 1
+                self._completed[worker] += 1
+                self.failed += not ok
+            if entry is None:
+                continue
+            if ok:
+                entry[1].set_result(payload)
+            else:
+                entry[1].set_exception(payload)
+
+    def _check_workers(self):
+        if self._closing:
+            return
+        for worker, process in enumerate(self.processes):
+            if not self._alive[worker] or process.is_alive():
+                continue
+            logger.error(f"Inference worker {worker} (pid {process.pid}) exited with code {process.exitcode}")
+            error = InferenceWorkerException(INFERENCE_WORKER_ERROR.format(worker=worker, exitcode=process.exitcode))
+            with self._lock:
+                self._alive[worker] = False
+                lost = [request_id for request_id, (owner, _) in self._pending.items() if owner == worker]
+                futures = [self._pending.pop(request_id)[1] for request_id in lost]
+                self._in_flight[worker] = 0
+                self.failed += len(futures)
+            for future in futures:
+                future.set_exception(error)
+
+    def stats(self):
+        """Returns per-worker load and completions, request and failure counts, and the shared weight size."""
+        with self._lock:
+            return {
+                "workers": self.num_workers,
+                "alive_workers": sum(self._alive),
+                "in_flight": list(self._in_flight),
+                "completed": list(self._completed),
+                "requests": self.requests,
+                "failed": self.failed,
+                "shared_bytes": self.shared.nbytes if self.shared else 0,
+            }
@@ -1,8 +1,502 @@
 # src/sarinfer/core/inference.py
+#
+# CPU inference with dynamic request batching.
+#
+# BatchingEngine serves single-shot models. Callers submit single examples and get a Future
+# back. One worker thread drains the queue: it waits for the first request, then keeps
+# collecting until the batch is full or the first request has waited max_wait_ms, and runs
+# the whole batch through the model in one call.
+#
+#     engine = BatchingEngine(DenseModel(weights), max_batch_size=32, max_wait_ms=5).start()
+#     future = engine.submit(features)
+#     logits = future.result()
+#
+# ContinuousBatchingScheduler serves autoregressive models (TransformerLM). Batching happens
+# per decode step instead of per request: waiting sequences join the running batch at every
+# step and finished ones leave it at once, so a short request never waits for a long one.
+#
+#     scheduler = ContinuousBatchingScheduler(TransformerLM(weights, n_heads=8)).start()
+#     request = scheduler.submit(prompt_tokens, max_new_tokens=128, on_token=print)
+#     tokens = request.result()
+#
+# Given a PagedKVCache, sequences keep their keys and values in arena blocks. Sequences are
+# admitted only while their prompt fits, and when a decode step needs more blocks than are
+# free, the most recently admitted sequences are preempted: their blocks are freed and they
+# wait at the head of the queue to be prefilled again (prompt plus tokens so far) later.
+# With a PrefixCache as well, prompts reuse the KV blocks of earlier prompts sharing their
+# prefix and only prefill the rest; unshared cached blocks are reclaimed before preempting.
 
-def start_inference_system():
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+from sarinfer.core.cpu_manager import DenseModel, WorkerPool
+from sarinfer.logger import get_logger
+from sarinfer.utils.exceptions import KVCacheExhaustedException
+
+# Largest batch handed to the model, and how long the oldest request may wait for it to fill
+INFERENCE_MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "32"))
+INFERENCE_MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", "5"))
+
+# Sequences decoded together in one step, and tokens generated when a request does not say
+INFERENCE_MAX_ACTIVE_SEQUENCES = int(os.getenv("INFERENCE_MAX_ACTIVE_SEQUENCES", "64"))
+INFERENCE_MAX_NEW_TOKENS = int(os.getenv("INFERENCE_MAX_NEW_TOKENS", "256"))
+
+# Window over which the scheduler reports tokens per second
+THROUGHPUT_WINDOW_SECONDS = 5.0
+
+logger = get_logger(__name__)
+
+
+class _Request:
+    __slots__ = ("inputs", "future", "enqueued_at")
+
+    def __init__(self, inputs, future: Future):
+        self.inputs = inputs
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+
+class BatchingEngine:
+    """Runs a batched forward function over requests that arrive one at a time."""
+
+    def __init__(self, forward, max_batch_size: int = None, max_wait_ms: float = None, max_queue_size: int = 0):
+        """
+        :param forward: Callable taking a stacked (batch, ...) array and returning one output row per input.
+        :param max_batch_size: (Optional) Largest batch. Defaults to INFERENCE_MAX_BATCH_SIZE.
+        :param max_wait_ms: (Optional) Longest a request waits for others to join it. Defaults to INFERENCE_MAX_WAIT_MS.
+        :param max_queue_size: (Optional) Requests that may wait before submit blocks; 0 is unbounded.
+        """
+        self.forward = forward
+        self.max_batch_size = max_batch_size or INFERENCE_MAX_BATCH_SIZE
+        self.max_wait = (INFERENCE_MAX_WAIT_MS if max_wait_ms is None else max_wait_ms) / 1000
+        self.requests = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self._queue = queue.Queue(max_queue_size)
+        self._stopping = threading.Event()
+        self._worker = None
+
+    def start(self):
+        if self._worker is None:
+            self._stopping.clear()
+            self._worker = threading.Thread(target=self._run, daemon=True, name="inference-batcher")
+            self._worker.start()
+        return self
+
+    @property
+    def running(self):
+        return self._worker is not None
+
+    def stop(self):
+        """Stops the worker after the batch in flight; requests still queued fail."""
+        self._stopping.set()
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+        while True:
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            request.future.set_exception(RuntimeError("Inference engine stopped"))
+
+    def submit(self, inputs):
+        """Queues one example and returns a Future for its output row."""
+        if self._worker is None:
+            raise RuntimeError("Inference engine is not running")
+        future = Future()
+        self._queue.put(_Request(inputs, future))
+        return future
+
+    def infer(self, inputs, timeout: float = None):
+        """Submits one example and waits for its output."""
+        return self.submit(inputs).result(timeout)
+
+    def stats(self):
+        """Returns request and batch counts, the mean batch size and the current queue depth."""
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "mean_batch_size": self.requests / self.batches if self.batches else 0.0,
+            "queue_depth": self._queue.qsize(),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+        }
+
+    def _collect(self):
+        """Blocks for the first request, then gathers more until the batch is full or its deadline passes."""
+        while not self._stopping.is_set():
+            try:
+                first = self._queue.get(timeout=0.1)
+                break
+            except queue.Empty:
+                continue
+        else:
+            return []
+
+        batch = [first]
+        deadline = first.enqueued_at + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stopping.is_set():
+            batch = self._collect()
+            # Requests cancelled while queued are dropped before they cost compute
+            batch = [request for request in batch if request.future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                outputs = self.forward(np.stack([request.inputs for request in batch]))
+            except Exception as e:
+                logger.error(f"Inference batch of {len(batch)} failed: {e}")
+                self.failed_batches += 1
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+            self.batches += 1
+            self.requests += len(batch)
+            for request, output in zip(batch, outputs):
+                request.future.set_result(output)
+
+
+class GenerationRequest:
+    """One sequence being generated. result() waits for the generated tokens."""
+
+    def __init__(self, prompt, max_new_tokens: int, stop_token_ids, on_token):
+        self.prompt = list(prompt)
+        self.max_new_tokens = max_new_tokens
+        self.stop_token_ids = frozenset(stop_token_ids or ())
+        self.on_token = on_token
+        self.future = Future()
+        self.tokens = []
+        self.finish_reason = None
+        self.cache = None
+        self.enqueued_at = time.monotonic()
+        self.first_token_at = None
+        self._cancelled = False
+
+    def cancel(self):
+        """Asks the scheduler to drop the sequence at its next step, e.g. when the client went away."""
+        self._cancelled = True
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    def result(self, timeout: float = None):
+        return self.future.result(timeout)
+
+
+class ContinuousBatchingScheduler:
     """
-    Start the inference system.
-    This is where you would load models, initialize TensorStore, etc.
+    Token-level scheduler for autoregressive generation. Every step it admits waiting
+    sequences up to max_batch_size (running their prefill), decodes one token for the whole
+    running batch in a single model call, and evicts sequences that finished.
     """
-    print("Inference system started. Models are being loaded.")
+
+    def __init__(self, model, max_batch_size: int = None, eos_token_id: int = None, temperature: float = 0.0,
+                 seed: int = None, max_queue_size: int = 0, kv_cache=None, prefix_cache=None):
+        """
+        :param model: Model with new_cache(), prefill(tokens, cache) and decode(tokens, caches), e.g. TransformerLM.
+        :param max_batch_size: (Optional) Sequences decoded per step. Defaults to INFERENCE_MAX_ACTIVE_SEQUENCES.
+        :param eos_token_id: (Optional) Token that ends every sequence.
+        :param temperature: Sampling temperature; 0 decodes greedily.
+        :param seed: (Optional) Seed of the sampler.
+        :param max_queue_size: (Optional) Sequences that may wait before submit blocks; 0 is unbounded.
+        :param kv_cache: (Optional) PagedKVCache to keep sequences in; by default each grows its own arrays.
+        :param prefix_cache: (Optional) PrefixCache over kv_cache to reuse prompt prefixes.
+        """
+        self.model = model
+        self.prefix_cache = prefix_cache
+        self.kv_cache = kv_cache if kv_cache is not None or prefix_cache is None else prefix_cache.kv_cache
+        self.max_batch_size = max_batch_size or INFERENCE_MAX_ACTIVE_SEQUENCES
+        self.eos_token_id = eos_token_id
+        self.temperature = temperature
+        self.steps = 0
+        self.decoded_tokens = 0
+        self.generated_tokens = 0
+        self.completed = 0
+        self.failed = 0
+        self.preemptions = 0
+        self._rng = np.random.default_rng(seed)
+        self._waiting = queue.Queue(max_queue_size)
+        self._active = []
+        self._pending = deque()  # taken off the queue but not admitted yet: preempted or waiting for blocks
+        self._recent = deque()  # (time, tokens) per step, for tokens_per_second
+        self._stopping = threading.Event()
+        self._worker = None
+
+    def start(self):
+        if self._worker is None:
+            self._stopping.clear()
+            self._worker = threading.Thread(target=self._run, daemon=True, name="inference-scheduler")
+            self._worker.start()
+        return self
+
+    @property
+    def running(self):
+        return self._worker is not None
+
+    def stop(self):
+        """Stops the scheduler; running and waiting sequences fail."""
+        self._stopping.set()
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+        error = RuntimeError("Inference scheduler stopped")
+        for request in self._active:
+            self._finish(request, "error", error)
+        self._active = []
+        while self._pending:
+            self._finish(self._pending.popleft(), "error", error)
+        while True:
+            try:
+                self._finish(self._waiting.get_nowait(), "error", error)
+            except queue.Empty:
+                break
+
+    def submit(self, prompt, max_new_tokens: int = None, stop_token_ids=None, on_token=None):
+        """
+        Queues a sequence for generation.
+        :param prompt: Prompt token IDs.
+        :param max_new_tokens: (Optional) Tokens to generate at most. Defaults to INFERENCE_MAX_NEW_TOKENS.
+        :param stop_token_ids: (Optional) Tokens that end this sequence, in addition to eos_token_id.
+        :param on_token: (Optional) Called with every generated token, on the scheduler thread.
+        :return: A GenerationRequest.
+        """
+        if self._worker is None:
+            raise RuntimeError("Inference scheduler is not running")
+        if not len(prompt):
+            raise ValueError("prompt must contain at least one token")
+        request = GenerationRequest(prompt, max_new_tokens or INFERENCE_MAX_NEW_TOKENS, stop_token_ids, on_token)
+        self._waiting.put(request)
+        return request
+
+    def generate(self, prompt, max_new_tokens: int = None, stop_token_ids=None, timeout: float = None):
+        """Submits a sequence and waits for its generated tokens."""
+        return self.submit(prompt, max_new_tokens, stop_token_ids).result(timeout)
+
+    def tokens_per_second(self):
+        """Returns the generation rate over the last THROUGHPUT_WINDOW_SECONDS."""
+        now = time.monotonic()
+        recent = [(at, tokens) for at, tokens in list(self._recent) if now - at <= THROUGHPUT_WINDOW_SECONDS]
+        if not recent:
+            return 0.0
+        elapsed = max(now - recent[0][0], 1e-3)
+        return sum(tokens for _, tokens in recent) / elapsed
+
+    def stats(self):
+        """Returns queue depth, active batch size, throughput and lifetime counters."""
+        return {
+            "queue_depth": self._waiting.qsize() + len(self._pending),
+            "active_batch_size": len(self._active),
+            "max_batch_size": self.max_batch_size,
+            "tokens_per_second": self.tokens_per_second(),
+            "generated_tokens": self.generated_tokens,
+            "steps": self.steps,
+            "mean_batch_size": self.decoded_tokens / self.steps if self.steps else 0.0,
+            "completed": self.completed,
+            "failed": self.failed,
+            "preemptions": self.preemptions,
+            "kv_cache": self.kv_cache.stats() if self.kv_cache is not None else None,
+            "prefix_cache": self.prefix_cache.stats() if self.prefix_cache is not None else None,
+        }
+
+    def _sample(self, logits):
+        """Picks the next token of every row of logits."""
+        logits = np.atleast_2d(logits)
+        if self.temperature <= 0:
+            return logits.argmax(axis=-1)
+        scaled = logits / self.temperature
+        scaled -= scaled.max(axis=-1, keepdims=True)
+        probabilities = np.exp(scaled)
+        probabilities /= probabilities.sum(axis=-1, keepdims=True)
+        cumulative = probabilities.cumsum(axis=-1)
+        draws = self._rng.random((len(logits), 1)) * cumulative[:, -1:]
+        return (cumulative < draws).sum(axis=-1)
+
+    def _new_cache(self, context):
+        if self.prefix_cache is not None:
+            return self.prefix_cache.new_sequence(context)
+        return self.kv_cache.new_sequence() if self.kv_cache is not None else self.model.new_cache()
+
+    def _reclaim(self, blocks: int):
+        """Tries to free blocks KV blocks held only by the prefix cache."""
+        if self.prefix_cache is not None and blocks > 0:
+            self.prefix_cache.evict(blocks)
+
+    def _release(self, request: GenerationRequest):
+        if request.cache is not None and self.kv_cache is not None:
+            request.cache.free()
+        request.cache = None
+
+    def _finish(self, request: GenerationRequest, reason: str, error: Exception = None):
+        request.finish_reason = reason
+        self._release(request)
+        if request.future.done():
+            return
+        if error is not None:
+            self.failed += 1
+            request.future.set_exception(error)
+        else:
+            self.completed += 1
+            request.future.set_result(request.tokens)
+
+    def _emit(self, request: GenerationRequest, token: int):
+        """Records a generated token; returns True when the sequence is finished."""
+        request.tokens.append(token)
+        self.generated_tokens += 1
+        if request.first_token_at is None:
+            request.first_token_at = time.monotonic()
+        if request.on_token is not None:
+            try:
+                request.on_token(token)
+            except Exception as e:
+                logger.warning(f"Dropping sequence after its token callback failed: {e}")
+                request.cancel()
+        if token == self.eos_token_id or token in request.stop_token_ids:
+            self._finish(request, "stop")
+        elif len(request.tokens) >= request.max_new_tokens or \
+                request.cache.length >= self.model.max_positions:
+            self._finish(request, "length")
+        elif request.cancelled:
+            self._finish(request, "cancelled")
+        else:
+            return False
+        return True
+
+    def _next_waiting(self):
+        if self._pending:
+            return self._pending.popleft()
+        # Block only when nothing is running, so an idle scheduler does not spin
+        return self._waiting.get(timeout=0.1) if not self._active else self._waiting.get_nowait()
+
+    def _admit(self):
+        """Moves waiting sequences into the running batch while there is room, prefilling each."""
+        while len(self._active) < self.max_batch_size:
+            try:
+                request = self._next_waiting()
+            except queue.Empty:
+                return
+            if request.cancelled:
+                self._finish(request, "cancelled")
+                continue
+
+            # A preempted sequence is rebuilt from its prompt and the tokens it already generated
+            resumed = bool(request.tokens)
+            context = request.prompt + request.tokens[:-1] if resumed else request.prompt
+            if self.kv_cache is not None:
+                needed = self.kv_cache.blocks_for(len(context) + 1)
+                if needed > self.kv_cache.num_blocks:
+                    self._finish(request, "error", KVCacheExhaustedException(
+                        f"Sequence of {len(context)} tokens needs {needed} blocks, the KV cache has "
+                        f"{self.kv_cache.num_blocks}"))
+                    continue
+                self._reclaim(needed - self.kv_cache.free_blocks)
+                if needed > self.kv_cache.free_blocks:
+                    self._pending.appendleft(request)
+                    return
+
+            try:
+                request.cache = self._new_cache(context)
+                # Positions restored from the prefix cache are not computed again
+                logits = self.model.prefill(context[request.cache.length:], request.cache)
+                if self.prefix_cache is not None:
+                    self.prefix_cache.insert(context, request.cache)
+            except KVCacheExhaustedException:
+                self._release(request)
+                self._pending.appendleft(request)
+                return
+            except Exception as e:
+                logger.error(f"Prefill of a {len(context)} token prompt failed: {e}")
+                self._finish(request, "error", e)
+                continue
+            if resumed:
+                self._active.append(request)
+                continue
+            if not self._emit(request, int(self._sample(logits)[0])):
+                self._active.append(request)
+            self._recent.append((time.monotonic(), 1))
+
+    def _preempt_for_step(self):
+        """Preempts the most recently admitted sequences until the next decode step fits in the KV cache."""
+        needed = sum(request.cache.blocks_needed(1) for request in self._active)
+        self._reclaim(needed - self.kv_cache.free_blocks)
+        while needed > self.kv_cache.free_blocks and len(self._active) > 1:
+            victim = self._active.pop()
+            needed -= victim.cache.blocks_needed(1)
+            self._release(victim)
+            self._pending.appendleft(victim)
+            self.preemptions += 1
+            logger.info(f"Preempted a sequence of {len(victim.prompt) + len(victim.tokens)} tokens, "
+                        f"{self.kv_cache.free_blocks} KV blocks free")
+
+    def _step(self):
+        """Decodes one token for every running sequence and evicts the ones that finished."""
+        # Sequences cancelled since the last step leave before costing compute
+        for request in [r for r in self._active if r.cancelled]:
+            self._finish(request, "cancelled")
+        self._active = [request for request in self._active if not request.cancelled]
+        if self.kv_cache is not None and self._active:
+            self._preempt_for_step()
+        if not self._active:
+            return
+        batch = self._active
+        try:
+            logits = self.model.decode([request.tokens[-1] for request in batch],
+                                       [request.cache for request in batch])
+        except Exception as e:
+            logger.error(f"Decode step of {len(batch)} sequences failed: {e}")
+            for request in batch:
+                self._finish(request, "error", e)
+            self._active = []
+            return
+        self.steps += 1
+        self.decoded_tokens += len(batch)
+        self._recent.append((time.monotonic(), len(batch)))
+        while self._recent and time.monotonic() - self._recent[0][0] > THROUGHPUT_WINDOW_SECONDS:
+            self._recent.popleft()
+        self._active = [request for request, token in zip(batch, self._sample(logits))
+                        if not self._emit(request, int(token))]
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._admit()
+            self._step()
+
+
+def start_inference_system(model_name: str = None, version: str = None, max_batch_size: int = None,
+                           max_wait_ms: float = None, num_workers: int = 1):
+    """
+    Start the inference system: load a model and start a batching engine serving it.
+    :param model_name: (Optional) Model folder, or model ID together with version, holding DenseModel weights.
+    :param version: (Optional) Version of the model to load by ID.
+    :param num_workers: (Optional) Above 1, serve from a WorkerPool of that many processes sharing the weights.
+    :return: The running BatchingEngine or WorkerPool, or None when no model was given.
+    """
+    if model_name is None:
+        logger.info("Inference system started without a model")
+        return None
+    # Imported here: the loader pulls in the S3 and TensorStore stacks
+    from sarinfer.models.model_loader import load_model
+
+    weights = load_model(model_name, version)
+    if num_workers > 1:
+        engine = WorkerPool(weights, DenseModel, num_workers, max_batch_size, max_wait_ms).start()
+    else:
+        engine = BatchingEngine(DenseModel(weights).forward, max_batch_size, max_wait_ms).start()
+    logger.info(f"Inference system started: {model_name} {version or ''}, {engine.stats()}")
+    return engine
@@ -0,0 +1,190 @@
+# src/sarinfer/core/kv_cache.py
+#
+# Paged attention KV cache for CPU decoding.
+#
+# Keys and values of every sequence live in fixed-size blocks carved out of one preallocated
+# arena per model:
+#
+#   keys/values: (n_layers, num_blocks, block_size, n_heads, head_dim)
+#
+# A sequence owns a block table (the arena blocks holding its positions, in order) instead of
+# its own growing arrays, so memory is handed out block_size positions at a time and returned
+# whole when the sequence ends: no fragmentation, and the number of concurrent sequences is
+# bounded by the tokens actually cached rather than by worst-case lengths.
+#
+# Blocks are reference counted. Sequences that share a prefix point at the same blocks, and a
+# shared block is copied only when one of them writes into it (copy-on-write).
+
+import os
+
+import numpy as np
+
+from sarinfer.logger import get_logger
+from sarinfer.utils.errors import KV_CACHE_EXHAUSTED_ERROR
+from sarinfer.utils.exceptions import KVCacheExhaustedException
+
+# Positions per block, and the arena size used by PagedKVCache.for_model
+KV_CACHE_BLOCK_SIZE = int(os.getenv("KV_CACHE_BLOCK_SIZE", "16"))
+KV_CACHE_MAX_BYTES = int(os.getenv("KV_CACHE_MAX_BYTES", str(1024 ** 3)))
+
+logger = get_logger(__name__)
+
+
+class PagedKVCache:
+    """Block allocator over a preallocated key/value arena, shared by all sequences of a model."""
+
+    def __init__(self, n_layers: int, n_heads: int, head_dim: int, num_blocks: int, block_size: int = None,
+                 dtype=np.float32):
+        self.n_layers = n_layers
+        self.block_size = block_size or KV_CACHE_BLOCK_SIZE
+        self.num_blocks = num_blocks
+        shape = (n_layers, num_blocks, self.block_size, n_heads, head_dim)
+        self.keys = np.zeros(shape, dtype=dtype)
+        self.values = np.zeros(shape, dtype=dtype)
+        self.ref_counts = np.zeros(num_blocks, dtype=np.int32)
+        # Popped from the end, so low block IDs are handed out first
+        self._free = list(range(num_blocks - 1, -1, -1))
+        self.copies = 0
+        logger.info(f"KV cache arena: {num_blocks} blocks of {self.block_size} positions, "
+                    f"{self.keys.nbytes + self.values.nbytes} bytes")
+
+    @classmethod
+    def for_model(cls, model, max_bytes: int = None, block_size: int = None):
+        """Sizes an arena for a TransformerLM to fit in max_bytes (default KV_CACHE_MAX_BYTES)."""
+        block_size = block_size or KV_CACHE_BLOCK_SIZE
+        block_bytes = 2 * model.n_layers * block_size * model.n_heads * model.head_dim * model.dtype.itemsize
+        num_blocks = (max_bytes or KV_CACHE_MAX_BYTES) // block_bytes
+        if num_blocks < 1:
+            raise ValueError(f"max_bytes is smaller than one block ({block_bytes} bytes)")
+        return cls(model.n_layers, model.n_heads, model.head_dim, num_blocks, block_size, model.dtype)
+
+    @property
+    def free_blocks(self):
+        return len(self._free)
+
+    def blocks_for(self, positions: int):
+        """Returns the number of blocks needed to hold positions."""
+        return -(-positions // self.block_size)
+
+    def allocate(self):
+        """Takes a free block, with one reference."""
+        if not self._free:
+            raise KVCacheExhaustedException(KV_CACHE_EXHAUSTED_ERROR.format(needed=1, free=0))
+        block = self._free.pop()
+        self.ref_counts[block] = 1
+        return block
+
+    def retain(self, blocks):
+        """Adds a reference to each block, e.g. for another sequence sharing them."""
+        for block in blocks:
+            self.ref_counts[block] += 1
+
+    def release(self, blocks):
+        """Drops a reference to each block; blocks nobody references go back to the free list."""
+        for block in blocks:
+            self.ref_counts[block] -= 1
+            if self.ref_counts[block] == 0:
+                self._free.append(block)
+
+    def copy_block(self, block: int):
+        """Copies a shared block into a new private one, moving one reference over to it."""
+        copy = self.allocate()
+        self.keys[:, copy] = self.keys[:, block]
+        self.values[:, copy] = self.values[:, block]
+        self.release([block])
+        self.copies += 1
+        return copy
+
+    def new_sequence(self, prefix=None):
+        """
+        Returns an empty sequence, or one continuing prefix's cached positions without copying them.
+        :param prefix: (Optional) A PagedSequence (or anything with block_table and length) to share blocks with.
+        """
+        if prefix is None:
+            return PagedSequence(self)
+        table = list(prefix.block_table[:self.blocks_for(prefix.length)])
+        self.retain(table)
+        return PagedSequence(self, table, prefix.length)
+
+    fork = new_sequence
+
+    def stats(self):
+        """Returns block usage, sharing and copy-on-write counters."""
+        used = self.num_blocks - len(self._free)
+        return {
+            "num_blocks": self.num_blocks,
+            "block_size": self.block_size,
+            "used_blocks": used,
+            "free_blocks": len(self._free),
+            "shared_blocks": int((self.ref_counts > 1).sum()),
+            "utilization": used / self.num_blocks,
+            "copies": self.copies,
+        }
+
+
+class PagedSequence:
+    """
+    KV state of one sequence as a block table into a PagedKVCache. Has the interface
+    TransformerLM expects of a cache: length and append(layer, keys, values).
+    """
+
+    def __init__(self, cache: PagedKVCache, block_table: list = None, length: int = 0):
+        self.cache = cache
+        self.block_table = block_table or []
+        self.length = length
+
+    @property
+    def num_blocks(self):
+        return len(self.block_table)
+
+    def blocks_needed(self, positions: int = 1):
+        """Returns the blocks that appending positions would take from the free list."""
+        needed = self.cache.blocks_for(self.length + positions) - len(self.block_table)
+        first = self.length // self.cache.block_size
+        last = min(len(self.block_table), self.cache.blocks_for(self.length + positions))
+        # Shared blocks about to be written are copied first
+        shared = sum(1 for block in self.block_table[first:last] if self.cache.ref_counts[block] > 1)
+        return max(needed, 0) + shared
+
+    def _reserve(self, positions: int):
+        """Makes positions [length, length + positions) writable: new blocks, private copies of shared ones."""
+        cache = self.cache
+        needed = self.blocks_needed(positions)
+        if needed > cache.free_blocks:
+            raise KVCacheExhaustedException(KV_CACHE_EXHAUSTED_ERROR.format(needed=needed, free=cache.free_blocks))
+        first = self.length // cache.block_size
+        for index in range(first, min(len(self.block_table), cache.blocks_for(self.length + positions))):
+            if cache.ref_counts[self.block_table[index]] > 1:
+                self.block_table[index] = cache.copy_block(self.block_table[index])
+        while len(self.block_table) < cache.blocks_for(self.length + positions):
+            self.block_table.append(cache.allocate())
+
+    def append(self, layer: int, keys, values):
+        """
+        Writes the keys and values of new positions for a layer and returns the layer's keys and
+        values for the whole sequence, each (positions, heads, head_dim). Blocks are reserved when
+        layer 0 is written; length advances once the last layer is written.
+        """
+        cache = self.cache
+        count = len(keys)
+        if layer == 0:
+            self._reserve(count)
+        positions = np.arange(self.length, self.length + count)
+        table = np.asarray(self.block_table)
+        blocks, offsets = table[positions // cache.block_size], positions % cache.block_size
+        cache.keys[layer, blocks, offsets] = keys
+        cache.values[layer, blocks, offsets] = values
+
+        total = self.length + count
+        used = table[:cache.blocks_for(total)]
+        layer_keys = cache.keys[layer, used].reshape(-1, *cache.keys.shape[3:])[:total]
+        layer_values = cache.values[layer, used].reshape(-1, *cache.values.shape[3:])[:total]
+        if layer == cache.n_layers - 1:
+            self.length = total
+        return layer_keys, layer_values
+
+    def free(self):
+        """Returns the sequence's blocks to the arena."""
+        self.cache.release(self.block_table)
+        self.block_table = []
+        self.length = 0
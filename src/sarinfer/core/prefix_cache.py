@@ -0,0 +1,147 @@
+# src/sarinfer/core/prefix_cache.py
+#
+# Prompt prefix cache on top of the paged KV cache.
+#
+# Prompts are cut into blocks of the KV cache's block size and every full block is identified
+# by a chained hash: the digest of its tokens together with the digest of the block before it,
+# so one digest stands for the whole prefix up to and including that block. After a prefill,
+# the sequence's full prompt blocks are registered under their digests; a later prompt that
+# starts with the same tokens gets those KV blocks shared into its block table and only the
+# remaining tokens are prefilled.
+#
+# Cached blocks hold a reference in the KV arena. Entries are evicted least recently used
+# first once the cache exceeds its budget, or on demand when the arena runs short.
+
+import hashlib
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+from sarinfer.logger import get_logger
+
+# Memory the cache may pin in the KV arena
+PREFIX_CACHE_MAX_BYTES = int(os.getenv("PREFIX_CACHE_MAX_BYTES", str(256 * 1024 ** 2)))
+
+logger = get_logger(__name__)
+
+
+def block_digests(tokens, block_size: int):
+    """Returns the chained digest of every full block of tokens."""
+    digests = []
+    parent = b""
+    tokens = np.asarray(tokens, dtype=np.int64)
+    for start in range(0, len(tokens) - block_size + 1, block_size):
+        parent = hashlib.blake2b(parent + tokens[start:start + block_size].tobytes(), digest_size=16).digest()
+        digests.append(parent)
+    return digests
+
+
+class PrefixCache:
+    """LRU map from prefix digests to KV blocks, with hit-rate accounting."""
+
+    def __init__(self, kv_cache, max_bytes: int = None, max_blocks: int = None):
+        """
+        :param kv_cache: The PagedKVCache whose blocks are shared.
+        :param max_bytes: (Optional) Arena memory the cache may pin. Defaults to PREFIX_CACHE_MAX_BYTES.
+        :param max_blocks: (Optional) Budget in blocks instead of bytes.
+        """
+        self.kv_cache = kv_cache
+        block_bytes = (kv_cache.keys.nbytes + kv_cache.values.nbytes) // kv_cache.num_blocks
+        self.max_blocks = max_blocks or max(1, (max_bytes or PREFIX_CACHE_MAX_BYTES) // block_bytes)
+        self._blocks = OrderedDict()  # digest -> block, least recently used first
+        self.lookups = 0
+        self.hits = 0
+        self.prompt_tokens = 0
+        self.hit_tokens = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._blocks)
+
+    def _touch(self, digests):
+        # Deepest block first, so a prefix always ranks as more recent than its extensions and
+        # eviction trims chains from the end instead of orphaning their tails
+        for digest in reversed(digests):
+            self._blocks.move_to_end(digest)
+
+    def match(self, tokens):
+        """
+        Returns the cached blocks covering the longest prefix of tokens. At least one token is
+        always left out, so the caller's prefill still produces next-token logits.
+        """
+        block_size = self.kv_cache.block_size
+        matched = []
+        for digest in block_digests(tokens[:len(tokens) - 1], block_size):
+            if digest not in self._blocks:
+                break
+            matched.append(digest)
+        self._touch(matched)
+        blocks = [self._blocks[digest] for digest in matched]
+
+        self.lookups += 1
+        self.prompt_tokens += len(tokens)
+        if blocks:
+            self.hits += 1
+            self.hit_tokens += len(blocks) * block_size
+        return blocks
+
+    def new_sequence(self, tokens):
+        """Returns a sequence of the KV cache that already holds the cached prefix of tokens."""
+        blocks = self.match(tokens)
+        sequence = self.kv_cache.new_sequence()
+        if blocks:
+            self.kv_cache.retain(blocks)
+            sequence.block_table = list(blocks)
+            sequence.length = len(blocks) * self.kv_cache.block_size
+        return sequence
+
+    def insert(self, tokens, sequence):
+        """Registers the full blocks of a prefilled sequence holding tokens, so later prompts can reuse them."""
+        digests = block_digests(tokens[:sequence.length], self.kv_cache.block_size)
+        for index, digest in enumerate(digests):
+            if digest not in self._blocks:
+                block = sequence.block_table[index]
+                self.kv_cache.retain([block])
+                self._blocks[digest] = block
+        self._touch(digests)
+        while len(self._blocks) > self.max_blocks:
+            self._evict_one()
+
+    def _evict_one(self):
+        _, block = self._blocks.popitem(last=False)
+        self.kv_cache.release([block])
+        self.evictions += 1
+
+    def evict(self, blocks: int):
+        """
+        Frees up to blocks arena blocks by dropping least recently used entries that no running
+        sequence shares. Returns the number of blocks returned to the arena.
+        """
+        freed = 0
+        for digest, block in list(self._blocks.items()):
+            if freed >= blocks:
+                break
+            if self.kv_cache.ref_counts[block] == 1:
+                del self._blocks[digest]
+                self.kv_cache.release([block])
+                self.evictions += 1
+                freed += 1
+        return freed
+
+    def clear(self):
+        while self._blocks:
+            self._evict_one()
+
+    def stats(self):
+        """Returns request and token hit rates, occupancy and evictions."""
+        return {
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+            "token_hit_rate": self.hit_tokens / self.prompt_tokens if self.prompt_tokens else 0.0,
+            "hit_tokens": self.hit_tokens,
+            "cached_blocks": len(self._blocks),
+            "max_blocks": self.max_blocks,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,244 @@
+# src/sarinfer/core/quantization.py
+#
+# Int8 and int4 weight quantization for CPU inference.
+#
+# A (out, in) weight is quantized symmetrically row by row: each output channel is split into
+# groups of group_size inputs (one group covering the whole row gives per-channel scales), and
+# every group is scaled so its largest magnitude maps to the largest integer. A quantized
+# tensor is stored as two plain arrays next to each other:
+#
+#   <name>.qweight  int8 (out, in), or uint8 (out, in / 2) holding two int4 values per byte (see pack_int4)
+#   <name>.scales   float32 (out, in / group_size)
+#
+# so it goes through safetensors, .npy, zarr and S3 like any other tensor, at a quarter (int8)
+# or an eighth (int4) of the fp32 size. group_quantized() turns such pairs back into
+# QuantizedTensors when a model is opened.
+#
+# CPU decoding is bound by memory bandwidth, so QuantizedTensor.linear keeps the weights
+# quantized in memory and either dequantizes them a cache-sized tile at a time right before the
+# BLAS call ("dequant"), or quantizes the activations to int8 as well and accumulates exact
+# integer products ("int").
+
+import os
+
+import numpy as np
+
+# Suffixes of the two arrays a quantized tensor is stored as
+QWEIGHT_SUFFIX = ".qweight"
+SCALES_SUFFIX = ".scales"
+
+# Default group size for int4; int8 defaults to one scale per output channel
+QUANTIZE_INT4_GROUP_SIZE = int(os.getenv("QUANTIZE_INT4_GROUP_SIZE", "128"))
+
+# Dequantized weight tile kept by the "dequant" kernel, sized to stay in cache
+QUANTIZED_TILE_BYTES = int(os.getenv("QUANTIZED_TILE_BYTES", str(1024 * 1024)))
+
+# Kernel used by QuantizedTensor.linear when none is given: "dequant" or "int"
+QUANTIZED_MATMUL = os.getenv("QUANTIZED_MATMUL", "dequant")
+
+_MAX_INT = {8: 127, 4: 7}
+
+
+def pack_int4(values):
+    """
+    Packs int4 values in [-8, 7] of shape (rows, even columns) two per byte: column j in the low
+    nibble and column j + columns / 2 in the high one, so unpacking writes two contiguous halves.
+    """
+    half = values.shape[1] // 2
+    nibbles = (values.astype(np.int16) + 8).astype(np.uint8)
+    return nibbles[:, :half] | (nibbles[:, half:] << 4)
+
+
+def unpack_int4(packed):
+    """Inverse of pack_int4: returns int8 values of shape (rows, 2 * packed columns)."""
+    half = packed.shape[1]
+    values = np.empty((packed.shape[0], 2 * half), dtype=np.int8)
+    np.subtract(packed & 0x0F, 8, out=values[:, :half], casting="unsafe")
+    np.subtract(packed >> 4, 8, out=values[:, half:], casting="unsafe")
+    return values
+
+
+def quantize(weight, bits: int = 8, group_size: int = None):
+    """
+    Quantizes a (out, in) float weight.
+    :param weight: The weight to quantize.
+    :param bits: 8 or 4.
+    :param group_size: (Optional) Inputs sharing one scale; must divide in. Defaults to the whole row for
+                       int8 and QUANTIZE_INT4_GROUP_SIZE for int4.
+    :return: A QuantizedTensor.
+    """
+    weight = np.asarray(weight, dtype=np.float32)
+    if bits not in _MAX_INT:
+        raise ValueError("bits must be 8 or 4")
+    if weight.ndim != 2:
+        raise ValueError(f"Only 2-D weights can be quantized, got shape {weight.shape}")
+    rows, cols = weight.shape
+    group_size = group_size or (cols if bits == 8 else min(QUANTIZE_INT4_GROUP_SIZE, cols))
+    if cols % group_size or (bits == 4 and cols % 2):
+        raise ValueError(f"group_size ({group_size}) must divide the input size ({cols}), which must be even for int4")
+
+    groups = weight.reshape(rows, cols // group_size, group_size)
+    scales = np.abs(groups).max(axis=-1) / _MAX_INT[bits]
+    scales[scales == 0] = 1.0
+    values = np.rint(groups / scales[..., None]).clip(-_MAX_INT[bits], _MAX_INT[bits]).astype(np.int8)
+    values = values.reshape(rows, cols)
+    return QuantizedTensor(values if bits == 8 else pack_int4(values), scales.astype(np.float32), bits)
+
+
+class QuantizedTensor:
+    """
+    A quantized (out, in) weight. Looks like a float32 tensor (shape, dtype, np.asarray
+    dequantizes) and computes x @ W.T without dequantizing it whole via linear().
+    """
+
+    def __init__(self, qweight, scales, bits: int = None, name: str = None):
+        """
+        :param qweight: int8 (out, in) values, or uint8 (out, in / 2) packed int4 values. May be a LazyTensor.
+        :param scales: float32 (out, groups) scales. May be a LazyTensor.
+        :param bits: (Optional) 8 or 4. Defaults to 4 for uint8 qweight, 8 otherwise.
+        :param name: (Optional) Name of the dequantized tensor.
+        """
+        self.name = name
+        self.qweight = qweight
+        self.scales = scales
+        self.bits = bits or (4 if np.dtype(qweight.dtype) == np.uint8 else 8)
+        rows, cols = qweight.shape
+        self.shape = (rows, cols * 2 if self.bits == 4 else cols)
+        self.dtype = np.dtype(np.float32)
+        self.group_size = self.shape[1] // scales.shape[1]
+        # Materialized arrays, read once on first use so decode steps never go back to storage
+        self._qweight_array = None
+        self._scales_array = None
+
+    @property
+    def nbytes(self):
+        """Stored size: the quantized values and scales, not the dequantized tensor."""
+        return int(self.qweight.nbytes) + int(self.scales.nbytes)
+
+    @property
+    def loaded(self):
+        return self._qweight_array is not None or getattr(self.qweight, "loaded", True)
+
+    def release(self):
+        """Drops the materialized arrays; the next use reads them again."""
+        self._qweight_array = None
+        self._scales_array = None
+        for part in (self.qweight, self.scales):
+            if hasattr(part, "release"):
+                part.release()
+
+    def _values(self, rows: slice):
+        """Returns the int8 values of a range of output rows."""
+        if self._qweight_array is None:
+            # A LazyTensor also keeps the array, so its model's resident_bytes counts it
+            self._qweight_array = np.asarray(self.qweight)
+        qweight = self._qweight_array[rows]
+        return unpack_int4(qweight) if self.bits == 4 else qweight
+
+    def _scales(self):
+        if self._scales_array is None:
+            scales = np.asarray(self.scales)
+            self._scales_array = scales if scales.dtype == np.float32 else scales.astype(np.float32)
+        return self._scales_array
+
+    def dequantize(self, rows: slice = slice(None)):
+        """Returns the float32 weight, or a range of its output rows."""
+        values = self._values(rows)
+        scales = self._scales()[rows]
+        grouped = values.reshape(values.shape[0], -1, self.group_size).astype(np.float32)
+        grouped *= scales[..., None]
+        return grouped.reshape(values.shape)
+
+    def __array__(self, dtype=None, copy=None):
+        array = self.dequantize()
+        return array if dtype is None else array.astype(dtype)
+
+    def __getitem__(self, index):
+        rows = index[0] if isinstance(index, tuple) else index
+        rest = index[1:] if isinstance(index, tuple) else ()
+        if isinstance(rows, slice) and rows.step in (None, 1):
+            return self.dequantize(rows)[(slice(None),) + rest]
+        return self.dequantize()[index]
+
+    def _tile_rows(self):
+        return max(1, QUANTIZED_TILE_BYTES // (self.shape[1] * 4))
+
+    def linear(self, x, mode: str = None):
+        """
+        Returns x @ W.T for a (batch, in) float array, a tile of output rows at a time.
+        :param x: Input activations.
+        :param mode: (Optional) "dequant" (float32 BLAS on dequantized tiles) or "int" (int8 activations,
+                     exact integer accumulation). Defaults to QUANTIZED_MATMUL.
+        """
+        mode = mode or QUANTIZED_MATMUL
+        if mode not in ("dequant", "int"):
+            raise ValueError("mode must be dequant or int")
+        x = np.asarray(x, dtype=np.float32)
+        out_features = self.shape[0]
+        out = np.empty((x.shape[0], out_features), dtype=np.float32)
+        tile = self._tile_rows()
+
+        groups = self.shape[1] // self.group_size
+        scales = self._scales()
+        if mode == "dequant":
+            for start in range(0, out_features, tile):
+                rows = slice(start, min(start + tile, out_features))
+                if groups == 1:
+                    # One scale per output row factors out of the product: cast, multiply, rescale
+                    np.matmul(x, self._values(rows).astype(np.float32).T, out=out[:, rows])
+                    out[:, rows] *= scales[rows, 0]
+                else:
+                    np.matmul(x, self.dequantize(rows).T, out=out[:, rows])
+            return out
+
+        # Activations get one scale per row and weights one per group, so integer dot products
+        # are summed per block of inputs and scaled before the blocks are added up. Integer sums
+        # below 2**24 are exact in float32, so blocks small enough for that accumulate through
+        # BLAS instead of NumPy's unvectorized integer matmul
+        x_scales = np.abs(x).max(axis=1, keepdims=True) / 127
+        x_scales[x_scales == 0] = 1.0
+        block = self._exact_block()
+        blocks = self.shape[1] // block
+        x_values = np.rint(x / x_scales)
+        x_blocks = x_values.reshape(x.shape[0], blocks, block).transpose(1, 0, 2)
+        for start in range(0, out_features, tile):
+            rows = slice(start, min(start + tile, out_features))
+            values = self._values(rows).astype(np.float32)
+            w_blocks = values.reshape(values.shape[0], blocks, block).transpose(1, 2, 0)
+            # (blocks, batch, rows) exact partial sums
+            partial = np.matmul(x_blocks, w_blocks)
+            block_scales = np.repeat(scales[rows], blocks // groups, axis=1)
+            out[:, rows] = np.einsum("kbr,rk->br", partial, block_scales)
+        out *= x_scales
+        return out
+
+    def _exact_block(self):
+        """Returns the largest divisor of the group size whose int8 x int{bits} dot products fit float32 exactly."""
+        limit = 2 ** 24 // (127 * _MAX_INT[self.bits])
+        return next(size for size in range(min(self.group_size, limit), 0, -1) if self.group_size % size == 0)
+
+    def __repr__(self):
+        return f"QuantizedTensor({self.name!r}, shape={self.shape}, int{self.bits}, group_size={self.group_size})"
+
+
+def group_quantized(tensors: dict):
+    """
+    Replaces every <name>.qweight / <name>.scales pair in a mapping of tensors with one
+    QuantizedTensor under <name>. Other tensors are returned unchanged.
+    """
+    grouped = {}
+    for name, tensor in tensors.items():
+        if name.endswith(SCALES_SUFFIX) and name[:-len(SCALES_SUFFIX)] + QWEIGHT_SUFFIX in tensors:
+            continue
+        if name.endswith(QWEIGHT_SUFFIX):
+            base = name[:-len(QWEIGHT_SUFFIX)]
+            if base + SCALES_SUFFIX in tensors:
+                grouped[base] = QuantizedTensor(tensor, tensors[base + SCALES_SUFFIX], name=base)
+                continue
+        grouped[name] = tensor
+    return grouped
+
+
+def quantized_arrays(name: str, tensor):
+    """Returns the arrays a QuantizedTensor is stored as: {<name>.qweight: ..., <name>.scales: ...}."""
+    return {name + QWEIGHT_SUFFIX: np.asarray(tensor.qweight), name + SCALES_SUFFIX: np.asarray(tensor.scales)}
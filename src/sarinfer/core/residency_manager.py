@@ -0,0 +1,349 @@
+# src/sarinfer/core/residency_manager.py
+#
+# Keeps several models loaded at once under a memory budget.
+#
+# Models are loaded on first use and stay resident until room is needed for another one;
+# then the least recently used models that nobody is using are unloaded first. Models in
+# use (inside a use() block) are pinned and never unloaded. When a model's size is known
+# before it is loaded (expected_size, by default from its storage_layout), room is made
+# first and reserved while it loads, so the budget holds even at the peak of a load.
+#
+#     residency = ResidencyManager(max_bytes=16 * 1024 ** 3, metadata_manager=ModelMetadataManager())
+#     with residency.use(model_id, version) as model:
+#         ...
+#
+# The manager also learns which model tends to be requested after which, and loads the usual
+# successor in the background before it is asked for. Prefetches only use free budget: they
+# never unload another model, and they are the first to go if they are never used.
+#
+# Every transition is written back to the model's load_status (loading, loaded, unloaded or
+# failed) and last_loaded through ModelMetadataManager.
+
+import os
+import threading
+from collections import Counter, OrderedDict, defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+
+from sarinfer.logger import get_logger
+from sarinfer.utils.errors import RESIDENCY_BUDGET_ERROR
+from sarinfer.utils.exceptions import ModelResidencyException
+
+# Memory the resident models may take together
+RESIDENCY_MAX_BYTES = int(os.getenv("RESIDENCY_MAX_BYTES", str(8 * 1024 ** 3)))
+
+# Background loads at once, and how often a model must have followed another before it is prefetched
+RESIDENCY_PREFETCH_WORKERS = int(os.getenv("RESIDENCY_PREFETCH_WORKERS", "2"))
+RESIDENCY_PREFETCH_MIN_COUNT = int(os.getenv("RESIDENCY_PREFETCH_MIN_COUNT", "2"))
+
+logger = get_logger(__name__)
+
+
+def _load_model(model_id: str, version: str = None):
+    # Imported here: the loader pulls in the S3 and TensorStore stacks
+    from sarinfer.models.model_loader import load_model
+
+    return load_model(model_id, version)
+
+
+def model_bytes(model):
+    """Returns the memory a model takes: its nbytes, or the sum over the arrays of a mapping."""
+    if hasattr(model, "nbytes"):
+        return int(model.nbytes)
+    if hasattr(model, "values"):
+        return sum(int(getattr(tensor, "nbytes", 0)) for tensor in model.values())
+    raise TypeError(f"Cannot size a {type(model).__name__}; pass size_of")
+
+
+def layout_bytes(storage_layout: dict):
+    """Returns the size of the tensors described by a storage_layout ({name: {"shape", "dtype", ...}})."""
+    return sum(int(np.prod(spec["shape"], dtype=np.int64)) * np.dtype(spec["dtype"]).itemsize
+               for spec in storage_layout.values())
+
+
+class _Resident:
+    __slots__ = ("model", "nbytes", "pins", "prefetched")
+
+    def __init__(self, model, nbytes: int, prefetched: bool):
+        self.model = model
+        self.nbytes = nbytes
+        self.pins = 0
+        self.prefetched = prefetched
+
+
+class ResidencyManager:
+    """LRU set of loaded models, keyed by (model_id, version), within a byte budget."""
+
+    def __init__(self, max_bytes: int = None, loader=None, metadata_manager=None, size_of=None,
+                 prefetch_workers: int = None, prefetch_min_count: int = None, expected_size=None):
+        """
+        :param max_bytes: (Optional) Budget for all resident models. Defaults to RESIDENCY_MAX_BYTES.
+        :param loader: (Optional) Callable (model_id, version) returning a model. Defaults to load_model.
+        :param metadata_manager: (Optional) ModelMetadataManager that load_status and last_loaded are written to.
+        :param size_of: (Optional) Callable returning the bytes a model takes. Defaults to model_bytes.
+        :param prefetch_workers: (Optional) Background loader threads; 0 disables prefetching.
+        :param prefetch_min_count: (Optional) Times a model must have followed another to be prefetched after it.
+        :param expected_size: (Optional) Callable (model_id, version) returning the bytes a model will take once
+                              loaded, or None if unknown. Defaults to the size of its storage_layout in the
+                              metadata. Without an estimate, room is only made once the model is loaded.
+        """
+        self.max_bytes = max_bytes or RESIDENCY_MAX_BYTES
+        self.loader = loader or _load_model
+        self.metadata_manager = metadata_manager
+        self.size_of = size_of or model_bytes
+        self.expected_size = expected_size or self._layout_size
+        workers = RESIDENCY_PREFETCH_WORKERS if prefetch_workers is None else prefetch_workers
+        self.prefetch_min_count = prefetch_min_count or RESIDENCY_PREFETCH_MIN_COUNT
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="model-prefetch") if workers else None
+        self._resident = OrderedDict()  # (model_id, version) -> _Resident, least recently used first
+        self._loading = {}  # (model_id, version) -> Future of the _Resident
+        self._successors = defaultdict(Counter)  # key -> how often each other key was requested next
+        self._last_key = None
+        self._lock = threading.Lock()
+        self.resident_bytes = 0
+        self.reserved_bytes = 0  # room made for models still loading
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.failed_loads = 0
+        self.evictions = 0
+        self.prefetches = 0
+        self.prefetch_hits = 0
+
+    def __contains__(self, key):
+        return key in self._resident
+
+    def get(self, model_id: str, version: str = None):
+        """Returns the model, loading it (and unloading others to make room) if it is not resident."""
+        return self._get((model_id, version), pin=False)
+
+    @contextmanager
+    def use(self, model_id: str, version: str = None):
+        """Like get, but the model cannot be unloaded until the block exits."""
+        key = (model_id, version)
+        model = self._get(key, pin=True)
+        try:
+            yield model
+        finally:
+            with self._lock:
+                resident = self._resident.get(key)
+                if resident is not None:
+                    resident.pins -= 1
+
+    def prefetch(self, model_id: str, version: str = None):
+        """
+        Loads a model in the background if it fits in the free budget. Returns a Future of the
+        model, or None when it is already resident or loading, or prefetching is disabled.
+        """
+        key = (model_id, version)
+        with self._lock:
+            if self._executor is None or key in self._resident or key in self._loading:
+                return None
+            self.prefetches += 1
+        return self._executor.submit(self._prefetch, key)
+
+    def unload(self, model_id: str, version: str = None):
+        """Unloads a model unless it is in use. Returns whether it was unloaded."""
+        key = (model_id, version)
+        with self._lock:
+            resident = self._resident.get(key)
+            if resident is None or resident.pins:
+                return False
+            unloaded = self._remove([key])
+        self._record_unloaded(unloaded)
+        return True
+
+    def close(self):
+        """Stops prefetching and unloads every model."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        with self._lock:
+            unloaded = self._remove(list(self._resident))
+        self._record_unloaded(unloaded)
+
+    def stats(self):
+        """Returns residency, hit, load, eviction and prefetch counters."""
+        with self._lock:
+            return {
+                "resident_models": len(self._resident),
+                "resident_bytes": self.resident_bytes,
+                "reserved_bytes": self.reserved_bytes,
+                "max_bytes": self.max_bytes,
+                "pinned_models": sum(1 for resident in self._resident.values() if resident.pins),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / (self.hits + self.misses) if self.hits + self.misses else 0.0,
+                "loads": self.loads,
+                "failed_loads": self.failed_loads,
+                "evictions": self.evictions,
+                "prefetches": self.prefetches,
+                "prefetch_hits": self.prefetch_hits,
+            }
+
+    def _get(self, key, pin: bool):
+        with self._lock:
+            hit = key in self._resident
+            self.hits += hit
+            self.misses += not hit
+        while True:
+            if not hit:
+                self._load(key)
+            with self._lock:
+                resident = self._resident.get(key)
+                if resident is None:
+                    # Unloaded again between loading and here; rare, so just load again
+                    hit = False
+                    continue
+                self._resident.move_to_end(key)
+                if resident.prefetched:
+                    resident.prefetched = False
+                    self.prefetch_hits += 1
+                resident.pins += pin
+                predicted = self._observe(key)
+            break
+        if predicted is not None:
+            self.prefetch(*predicted)
+        return resident.model
+
+    def _observe(self, key):
+        """Counts key as following the previous request and returns the key usually requested after it."""
+        if self._last_key is not None and self._last_key != key:
+            self._successors[self._last_key][key] += 1
+        self._last_key = key
+        successors = self._successors.get(key)
+        if not successors:
+            return None
+        predicted, count = successors.most_common(1)[0]
+        if count < self.prefetch_min_count or predicted in self._resident or predicted in self._loading:
+            return None
+        return predicted
+
+    def _prefetch(self, key):
+        try:
+            return self._load(key, prefetch=True).model
+        except Exception as e:
+            logger.info(f"Prefetch of model {key[0]} {key[1] or ''} skipped: {e}")
+            raise
+
+    def _load(self, key, prefetch: bool = False):
+        """Loads key once, however many callers ask for it at the same time."""
+        with self._lock:
+            if key in self._resident:
+                return self._resident[key]
+            future = self._loading.get(key)
+            if future is not None:
+                owner = False
+            else:
+                owner = True
+                future = self._loading[key] = Future()
+        if not owner:
+            try:
+                return future.result()
+            except ModelResidencyException:
+                # A prefetch that did not fit the free budget; a foreground load may unload others
+                if prefetch:
+                    raise
+                return self._load(key)
+
+        model_id, version = key
+        self._record(model_id, {"load_status": "loading"})
+        unloaded = []
+        reserved = 0
+        try:
+            # Make room before loading, so an eager loader never holds the new model while the
+            # ones it replaces are still resident
+            expected = self.expected_size(model_id, version)
+            if expected:
+                with self._lock:
+                    unloaded = self._make_room(model_id, expected, evict=not prefetch)
+                    reserved = expected
+                    self.reserved_bytes += reserved
+            model = self.loader(model_id, version)
+            nbytes = self.size_of(model)
+            with self._lock:
+                # Settle the reservation; only an underestimate still needs room here
+                self.reserved_bytes -= reserved
+                reserved = 0
+                unloaded += self._make_room(model_id, nbytes, evict=not prefetch)
+                resident = self._resident[key] = _Resident(model, nbytes, prefetched=prefetch)
+                if prefetch:
+                    # Never used yet, so first in line to be unloaded
+                    self._resident.move_to_end(key, last=False)
+                self.resident_bytes += nbytes
+                self.loads += 1
+                del self._loading[key]
+        except Exception as e:
+            with self._lock:
+                self.reserved_bytes -= reserved
+                del self._loading[key]
+                self.failed_loads += 1
+            future.set_exception(e)
+            self._record_unloaded(unloaded)
+            self._record(model_id, {"load_status": "failed" if not isinstance(e, ModelResidencyException)
+                                    else "unloaded"})
+            raise
+        future.set_result(resident)
+        logger.info(f"Model {model_id} {version or ''} loaded{' (prefetch)' if prefetch else ''}: {nbytes} bytes, "
+                    f"{self.resident_bytes} of {self.max_bytes} bytes resident")
+        self._record_unloaded(unloaded)
+        self._record(model_id, {"load_status": "loaded", "last_loaded": datetime.utcnow()})
+        return resident
+
+    def _make_room(self, model_id: str, nbytes: int, evict: bool = True):
+        """Unloads least recently used unpinned models until nbytes fit. Called with the lock held."""
+        used = self.resident_bytes + self.reserved_bytes
+        needed = used + nbytes - self.max_bytes
+        if needed <= 0:
+            return []
+        candidates = [key for key, resident in self._resident.items() if not resident.pins] if evict else []
+        available = self.max_bytes - used + sum(self._resident[key].nbytes for key in candidates)
+        if nbytes > available:
+            raise ModelResidencyException(RESIDENCY_BUDGET_ERROR.format(
+                model_id=model_id, needed=nbytes, available=max(available, 0), budget=self.max_bytes))
+        victims = []
+        for key in candidates:
+            if needed <= 0:
+                break
+            victims.append(key)
+            needed -= self._resident[key].nbytes
+        self.evictions += len(victims)
+        return self._remove(victims)
+
+    def _remove(self, keys):
+        """Drops keys from the resident set and returns the model IDs no longer resident in any version."""
+        for key in keys:
+            resident = self._resident.pop(key)
+            self.resident_bytes -= resident.nbytes
+            logger.info(f"Model {key[0]} {key[1] or ''} unloaded: {resident.nbytes} bytes freed")
+        still_resident = {model_id for model_id, _ in self._resident}
+        return [model_id for model_id in dict.fromkeys(key[0] for key in keys) if model_id not in still_resident]
+
+    def _layout_size(self, model_id: str, version: str = None):
+        """Size of the model's storage_layout in its metadata, or None when it has none."""
+        if self.metadata_manager is None:
+            return None
+        try:
+            metadata = self.metadata_manager.get_model_metadata(model_id)
+        except Exception as e:
+            logger.warning(f"Could not read the metadata of model {model_id}: {e}")
+            return None
+        if metadata is None or not metadata.storage_layout or version not in (None, metadata.version):
+            return None
+        return layout_bytes(metadata.storage_layout)
+
+    def _record_unloaded(self, model_ids):
+        for model_id in model_ids:
+            self._record(model_id, {"load_status": "unloaded"})
+
+    def _record(self, model_id: str, updates: dict):
+        """Writes a load transition to the model's metadata; failures are logged, not raised."""
+        if self.metadata_manager is None:
+            return
+        try:
+            self.metadata_manager.update_model_metadata(model_id, updates)
+        except Exception as e:
+            logger.warning(f"Could not record {updates['load_status']} for model {model_id}: {e}")
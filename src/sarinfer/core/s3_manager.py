@@ -1,8 +1,15 @@
 import boto3
+import hashlib
 import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
+from sarinfer.core.transfer_journal import TransferJournal
 from sarinfer.logger import get_logger
 from sarinfer.utils.exceptions import S3BucketNotFoundException, GenericS3Exception
 
@@ -10,29 +17,300 @@ from sarinfer.utils.exceptions import S3BucketNotFoundException, GenericS3Except
 S3_BUCKET_NAME = os.getenv("S3_BUCKET_NAME")
 AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
 AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL", "http://127.0.0.1:9000")
+
+# Transfer tuning: files in flight, multipart part size and parts in flight per file
+S3_MAX_WORKERS = int(os.getenv("S3_MAX_WORKERS", "8"))
+S3_MULTIPART_CHUNKSIZE = int(os.getenv("S3_MULTIPART_CHUNKSIZE", str(64 * 1024 * 1024)))
+S3_MAX_CONCURRENCY = int(os.getenv("S3_MAX_CONCURRENCY", "4"))
 
 # Get logger for this module
 logger = get_logger(__name__)
 
+
+def create_s3_client(max_pool_connections: int = None):
+    """
+    Creates an S3 client for the configured endpoint and credentials.
+    :param max_pool_connections: (Optional) Size of the client's HTTP connection pool. Defaults to one
+        connection per part in flight, S3_MAX_WORKERS * S3_MAX_CONCURRENCY.
+    """
+    return boto3.client(
+        "s3",
+        endpoint_url=S3_ENDPOINT_URL,
+        aws_access_key_id=AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+        config=Config(max_pool_connections=max_pool_connections or S3_MAX_WORKERS * S3_MAX_CONCURRENCY),
+    )
+
+
 # Initialize the S3 client
-s3_client = boto3.client(
-    "s3",
-    endpoint_url="http://127.0.0.1:9000",
-    aws_access_key_id=AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-)
+s3_client = create_s3_client()
+
+
+def model_s3_prefix(model_id: str, version: str):
+    """Returns the S3 key prefix a model version is backed up under and loaded from."""
+    return f"models/{model_id}/{version}"
+
+
+class TransferSummary:
+    """Per-run statistics for a folder upload or restore."""
+
+    def __init__(self):
+        self.files = 0
+        self.bytes = 0
+        self.skipped_files = 0
+        self.skipped_bytes = 0
+        self.deleted_files = 0
+        self.failed = []
+        self.progress = None
+        self.started_at = time.monotonic()
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, size: int):
+        """Records one successfully transferred file."""
+        with self._lock:
+            self.files += 1
+            self.bytes += size
+
+    def record_skip(self, size: int):
+        """Records a file that did not need to be transferred."""
+        with self._lock:
+            self.skipped_files += 1
+            self.skipped_bytes += size
+
+    def record_delete(self, count: int = 1):
+        """Records stale files removed by a sync."""
+        with self._lock:
+            self.deleted_files += count
 
+    def record_failure(self, key: str):
+        """Records a file that could not be transferred."""
+        with self._lock:
+            self.failed.append(key)
 
-def upload_model_folder_to_s3(folder_path: str, bucket_name: str, s3_prefix: str = ''):
+    def finish(self):
+        """Stops the clock for this run."""
+        self.elapsed = time.monotonic() - self.started_at
+        return self
+
+    @property
+    def bytes_per_second(self):
+        return self.bytes / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def files_per_second(self):
+        return self.files / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        return (f"{self.files} files, {self.bytes} bytes in {self.elapsed:.2f}s "
+                f"({self.bytes_per_second / (1024 * 1024):.2f} MiB/s, {self.files_per_second:.2f} files/s, "
+                f"{self.skipped_files} skipped, {self.deleted_files} deleted, {len(self.failed)} failed)")
+
+
+def _transfer_config(multipart_chunksize=None, max_concurrency=None, use_threads=True):
+    """Builds the boto3 multipart settings used for every file of a run."""
+    chunksize = multipart_chunksize or S3_MULTIPART_CHUNKSIZE
+    return TransferConfig(
+        multipart_threshold=chunksize,
+        multipart_chunksize=chunksize,
+        max_concurrency=max_concurrency or S3_MAX_CONCURRENCY,
+        use_threads=use_threads,
+    )
+
+
+def _iter_local_files(folder_path: str, s3_prefix: str, onerror=None):
     """
-    Uploads all files in a folder to the specified S3 bucket.
-    :param folder_path: Path to the local folder to be uploaded.
-    :param bucket_name: Name of the target S3 bucket.
-    :param s3_prefix: (Optional) The S3 key prefix under which to store the folder content.
+    Yields (local_file_path, s3_key) for every file under folder_path.
+    :param onerror: (Optional) Called with the OSError of every directory that cannot be listed.
     """
-    # Check if the bucket exists
+    for root, dirs, files in os.walk(folder_path, onerror=onerror):
+        for file in files:
+            # Full local path of the file
+            local_file_path = os.path.join(root, file)
+
+            # Create the S3 key by joining the prefix and relative file path
+            relative_path = os.path.relpath(local_file_path, folder_path)
+            s3_key = os.path.join(s3_prefix, relative_path).replace("\\", "/")  # Convert to Unix-style path
+            yield local_file_path, s3_key
+
+
+def _iter_s3_objects(bucket_name: str, s3_prefix: str):
+    """Yields every object under s3_prefix, fetching listing pages lazily."""
+    paginator = s3_client.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket_name, Prefix=s3_prefix):
+        for obj in page.get("Contents", []):
+            yield obj
+
+
+def _run_bounded(executor, fn, items, max_in_flight: int):
+    """
+    Submits fn(*item) for every item while keeping at most max_in_flight tasks pending,
+    so items are produced (walked, listed) only as fast as they are transferred.
+    """
+    pending = set()
+    for item in items:
+        if len(pending) >= max_in_flight:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        pending.add(executor.submit(fn, *item))
+    wait(pending)
+
+
+def _local_etag(local_file_path: str, chunksize: int):
+    """
+    Computes the ETag S3 assigns to a file uploaded with the given multipart chunk size:
+    the MD5 of the content, or the MD5 of the part MD5s suffixed with the part count.
+    """
+    with open(local_file_path, "rb") as f:
+        part_digests = [hashlib.md5(part).digest() for part in iter(lambda: f.read(chunksize), b"")]
+    if os.path.getsize(local_file_path) < chunksize:
+        # Uploaded in a single request
+        return part_digests[0].hex() if part_digests else hashlib.md5(b"").hexdigest()
+    return f"{hashlib.md5(b''.join(part_digests)).hexdigest()}-{len(part_digests)}"
+
+
+def _is_unchanged(local_file_path: str, obj: dict, upload: bool, checksum: bool, chunksize: int):
+    """Compares a local file with its listed S3 object the way a sync does."""
+    stat = os.stat(local_file_path)
+    if stat.st_size != obj['Size']:
+        return False
+    if checksum:
+        return _local_etag(local_file_path, chunksize) == obj['ETag'].strip('"')
+
+    remote_mtime = obj['LastModified'].timestamp()
+    if upload:
+        # The object is stamped (to the second) when uploaded, so only a later local edit counts
+        return stat.st_mtime < remote_mtime + 1
+    # Restored files carry the object's timestamp
+    return abs(stat.st_mtime - remote_mtime) < 1
+
+
+def _delete_s3_keys(bucket_name: str, keys: list, summary: TransferSummary):
+    """Deletes keys in batches of 1000, the DeleteObjects limit."""
+    for i in range(0, len(keys), 1000):
+        batch = keys[i:i + 1000]
+        logger.info(f"Deleting {len(batch)} stale objects from s3://{bucket_name}")
+        s3_client.delete_objects(Bucket=bucket_name, Delete={'Objects': [{'Key': key} for key in batch]})
+        summary.record_delete(len(batch))
+
+
+def _abort_multipart_upload(bucket_name: str, s3_key: str, upload_id: str):
+    """Aborts a multipart upload so its stored parts stop accruing storage charges."""
+    try:
+        s3_client.abort_multipart_upload(Bucket=bucket_name, Key=s3_key, UploadId=upload_id)
+    except ClientError as e:
+        # Already aborted, completed or expired on the server
+        logger.warning(f"Could not abort multipart upload {upload_id} of {s3_key}: {e}")
+
+
+def _upload_file_resumable(local_file_path: str, bucket_name: str, s3_key: str, config: TransferConfig,
+                           journal: TransferJournal):
+    """
+    Uploads one file, recording each multipart part in the journal so a restarted run only
+    uploads the parts that are missing. Returns False if the journal shows the file is already done.
+    """
+    stat = os.stat(local_file_path)
+    version = f"{stat.st_size}:{stat.st_mtime_ns}"
+    journal.plan(s3_key, stat.st_size)
+    if journal.is_complete(s3_key, version):
+        return False
+
+    chunksize = config.multipart_chunksize
+    if stat.st_size < config.multipart_threshold:
+        s3_client.upload_file(local_file_path, bucket_name, s3_key, Config=config)
+        journal.complete_file(s3_key, version)
+        return True
+
+    superseded_id = journal.superseded_upload(s3_key, version, chunksize)
+    if superseded_id is not None:
+        # Its parts hold other bytes or were cut at other offsets, so the upload has to start over
+        _abort_multipart_upload(bucket_name, s3_key, superseded_id)
+        journal.reset_parts(s3_key)
+    upload_id = journal.multipart_upload(s3_key, version, chunksize)
+    if upload_id is not None:
+        try:
+            # Parts of an upload that was aborted or expired on the server cannot be reused
+            s3_client.list_parts(Bucket=bucket_name, Key=s3_key, UploadId=upload_id, MaxParts=1)
+        except ClientError:
+            upload_id = None
+    if upload_id is None:
+        upload_id = s3_client.create_multipart_upload(Bucket=bucket_name, Key=s3_key)["UploadId"]
+        journal.start_multipart_upload(s3_key, upload_id, version, chunksize)
+    done = journal.completed_parts(s3_key)
+
+    def upload_part(part_number):
+        offset = (part_number - 1) * chunksize
+        with open(local_file_path, "rb") as f:
+            f.seek(offset)
+            body = f.read(chunksize)
+        response = s3_client.upload_part(Bucket=bucket_name, Key=s3_key, UploadId=upload_id,
+                                         PartNumber=part_number, Body=body)
+        journal.complete_part(s3_key, part_number, len(body), etag=response["ETag"])
+
+    num_parts = -(-stat.st_size // chunksize)
+    missing = [n for n in range(1, num_parts + 1) if n not in done]
+    with ThreadPoolExecutor(max_workers=config.max_concurrency) as executor:
+        list(executor.map(upload_part, missing))
+
+    parts = journal.completed_parts(s3_key)
+    s3_client.complete_multipart_upload(
+        Bucket=bucket_name, Key=s3_key, UploadId=upload_id,
+        MultipartUpload={"Parts": [{"PartNumber": n, "ETag": parts[n]["etag"]} for n in sorted(parts)]},
+    )
+    journal.complete_file(s3_key, version)
+    return True
+
+
+def _download_file_resumable(bucket_name: str, obj: dict, local_file_path: str, config: TransferConfig,
+                             journal: TransferJournal):
+    """
+    Downloads one object as ranged GETs into <file>.part, recording each range in the journal
+    so a restarted run only fetches the ranges that are missing. Returns False if the journal
+    shows the file is already done.
+    """
+    s3_key, size, etag = obj['Key'], obj['Size'], obj['ETag']
+    journal.plan(s3_key, size)
+    if journal.is_complete(s3_key, etag) and os.path.exists(local_file_path) \
+            and os.path.getsize(local_file_path) == size:
+        return False
+
+    chunksize = config.multipart_chunksize
+    part_path = local_file_path + ".part"
+    done = journal.completed_parts(s3_key, etag, chunksize)
+    if not done or not os.path.exists(part_path):
+        journal.reset_parts(s3_key)
+        done = {}
+        with open(part_path, "wb") as f:
+            f.truncate(size)
+
+    fd = os.open(part_path, os.O_WRONLY)
     try:
-        s3_client.head_bucket(Bucket=bucket_name)
+        def download_range(part_number):
+            start = (part_number - 1) * chunksize
+            end = min(start + chunksize, size) - 1
+            # IfMatch fails the request if the object changed since it was listed
+            response = s3_client.get_object(Bucket=bucket_name, Key=s3_key, Range=f"bytes={start}-{end}",
+                                            IfMatch=etag)
+            os.pwrite(fd, response["Body"].read(), start)
+            journal.complete_part(s3_key, part_number, end - start + 1, version=etag, chunksize=chunksize)
+
+        num_parts = -(-size // chunksize)
+        missing = [n for n in range(1, num_parts + 1) if n not in done]
+        with ThreadPoolExecutor(max_workers=config.max_concurrency) as executor:
+            list(executor.map(download_range, missing))
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+    os.replace(part_path, local_file_path)
+    journal.complete_file(s3_key, etag)
+    return True
+
+
+def _check_bucket(bucket_name: str, client=None):
+    """Raises if the bucket does not exist or cannot be reached."""
+    try:
+        (client or s3_client).head_bucket(Bucket=bucket_name)
     except ClientError as e:
         error_code = int(e.response['Error']['Code'])
         if error_code == 404:
@@ -40,65 +318,231 @@ def upload_model_folder_to_s3(folder_path: str, bucket_name: str, s3_prefix: str
         else:
             raise GenericS3Exception(f"An error occurred: {e}")
 
+
+def _changed_local_files(files, remote: dict, summary: TransferSummary, chunksize: int, checksum: bool):
+    """Filters (local_file_path, s3_key) pairs down to files that differ from S3, claiming matched keys."""
+    for local_file_path, s3_key in files:
+        obj = remote.pop(s3_key, None)
+        if obj is not None and _is_unchanged(local_file_path, obj, True, checksum, chunksize):
+            summary.record_skip(obj['Size'])
+            continue
+        yield local_file_path, s3_key
+
+
+def _can_delete_stale(summary: TransferSummary, source: str):
+    """
+    Whether a sync may delete what the source did not claim. Not after failures, which may have
+    hidden part of the source, nor when the source was empty, which is far more likely a wrong
+    path or prefix than a model whose every file was removed.
+    """
+    if summary.failed:
+        logger.warning(f"Not deleting stale files: {len(summary.failed)} transfers from {source} failed")
+        return False
+    if not summary.files and not summary.skipped_files:
+        logger.warning(f"Not deleting stale files: {source} is empty")
+        return False
+    return True
+
+
+def _open_journal(journal_path: str, direction: str, bucket_name: str, s3_prefix: str):
+    if journal_path is None:
+        return None
+    journal = TransferJournal(journal_path)
+    journal.begin(direction, bucket_name, s3_prefix)
+    return journal
+
+
+def _close_journal(journal: TransferJournal, summary: TransferSummary):
+    if journal is None:
+        return
+    progress = journal.progress()
+    summary.progress = progress
+    if summary.failed:
+        logger.info(f"Transfer incomplete, resume with journal {journal.path}: "
+                    f"{progress['bytes_remaining']} bytes remaining")
+    journal.close(remove=not summary.failed)
+
+
+def upload_model_folder_to_s3(folder_path: str, bucket_name: str, s3_prefix: str = '', max_workers: int = None,
+                              multipart_chunksize: int = None, max_concurrency: int = None, sync: bool = False,
+                              delete: bool = False, checksum: bool = False, journal_path: str = None):
+    """
+    Uploads all files in a folder to the specified S3 bucket.
+    Files are uploaded concurrently; large files are additionally split into multipart chunks.
+    In sync mode only files whose size differs, or that were modified after their object was
+    uploaded, are transferred.
+    :param folder_path: Path to the local folder to be uploaded.
+    :param bucket_name: Name of the target S3 bucket.
+    :param s3_prefix: (Optional) The S3 key prefix under which to store the folder content.
+    :param max_workers: (Optional) Number of files uploaded at once. Defaults to S3_MAX_WORKERS.
+    :param multipart_chunksize: (Optional) Multipart part size in bytes. Defaults to S3_MULTIPART_CHUNKSIZE.
+    :param max_concurrency: (Optional) Number of parts uploaded at once per file. Defaults to S3_MAX_CONCURRENCY.
+    :param sync: (Optional) Skip files that are unchanged on S3.
+    :param delete: (Optional) In sync mode, delete objects under the prefix that no longer exist locally.
+        Skipped when the folder is empty or any file failed.
+    :param checksum: (Optional) In sync mode, compare ETags with local MD5s instead of modification times.
+        Multipart ETags only match when the objects were uploaded with the same multipart_chunksize.
+    :param journal_path: (Optional) Checkpoint journal file. Completed files and multipart parts are
+        recorded there, and re-running with the same journal after an interruption resumes where the
+        previous run stopped. The journal is removed once every file is uploaded.
+    :return: A TransferSummary for the run.
+    :raises NotADirectoryError: folder_path is not a directory.
+    """
+    # Check if the bucket exists
+    _check_bucket(bucket_name)
+    if not os.path.isdir(folder_path):
+        raise NotADirectoryError(f"Folder {folder_path} does not exist or is not a directory")
+
+    summary = TransferSummary()
+    config = _transfer_config(multipart_chunksize, max_concurrency)
+    journal = _open_journal(journal_path, "upload", bucket_name, s3_prefix)
+
+    def upload(local_file_path, s3_key):
+        try:
+            # Upload file to S3
+            logger.info(f"Uploading {local_file_path} to s3://{bucket_name}/{s3_key}")
+            if journal is None:
+                s3_client.upload_file(local_file_path, bucket_name, s3_key, Config=config)
+            elif not _upload_file_resumable(local_file_path, bucket_name, s3_key, config, journal):
+                summary.record_skip(os.path.getsize(local_file_path))
+                return
+            summary.record(os.path.getsize(local_file_path))
+        except Exception as e:
+            logger.error(f"Failed to upload {local_file_path} to S3: {e}")
+            summary.record_failure(s3_key)
+
+    max_workers = max_workers or S3_MAX_WORKERS
     try:
-        # Walk through the folder recursively
-        for root, dirs, files in os.walk(folder_path):
-            for file in files:
-                # Full local path of the file
-                local_file_path = os.path.join(root, file)
+        def walk_error(error):
+            logger.error(f"Failed to list {error.filename}: {error}")
+            summary.record_failure(error.filename)
 
-                # Create the S3 key by joining the prefix and relative file path
-                relative_path = os.path.relpath(local_file_path, folder_path)
-                s3_key = os.path.join(s3_prefix, relative_path).replace("\\", "/")  # Convert to Unix-style path
+        files = _iter_local_files(folder_path, s3_prefix, onerror=walk_error)
+        if sync:
+            list_prefix = s3_prefix.rstrip("/") + "/" if s3_prefix else ""
+            remote = {obj['Key']: obj for obj in _iter_s3_objects(bucket_name, list_prefix)}
+            files = _changed_local_files(files, remote, summary, config.multipart_chunksize, checksum)
 
-                # Upload file to S3
-                logger.info(f"Uploading {local_file_path} to s3://{bucket_name}/{s3_key}")
-                s3_client.upload_file(local_file_path, bucket_name, s3_key)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            _run_bounded(executor, upload, files, max_workers * 2)
 
-        logger.info(f"Folder {folder_path} uploaded successfully to s3://{bucket_name}/{s3_prefix}")
+        if sync and delete and _can_delete_stale(summary, folder_path):
+            # Everything the walk did not claim is stale
+            _delete_s3_keys(bucket_name, sorted(remote), summary)
+
+        if summary.failed:
+            logger.error(f"Failed to upload {len(summary.failed)} files from {folder_path} to S3")
+        else:
+            logger.info(f"Folder {folder_path} uploaded successfully to s3://{bucket_name}/{s3_prefix}")
 
     except Exception as e:
         logger.error(f"Failed to upload folder to S3: {e}")
+        summary.record_failure(folder_path)
+
+    _close_journal(journal, summary)
+    logger.info(f"Upload summary: {summary.finish()}")
+    return summary
 
 
-def restore_model_folder_from_s3(bucket_name: str, s3_prefix: str, local_folder_path: str):
+def _changed_s3_objects(objects, local: dict, summary: TransferSummary, chunksize: int, checksum: bool):
+    """Filters listed objects down to those that differ from the local copy, claiming matched files."""
+    for (obj,) in objects:
+        local_file_path = local.pop(obj['Key'], None)
+        if local_file_path is not None and _is_unchanged(local_file_path, obj, False, checksum, chunksize):
+            summary.record_skip(obj['Size'])
+            continue
+        yield (obj,)
+
+
+def restore_model_folder_from_s3(bucket_name: str, s3_prefix: str, local_folder_path: str, max_workers: int = None,
+                                 multipart_chunksize: int = None, max_concurrency: int = None, sync: bool = False,
+                                 delete: bool = False, checksum: bool = False, journal_path: str = None):
     """
     Restores all files in a folder from the specified S3 bucket and key prefix.
+    The listing is paginated and streamed into a pool of downloads, so files are fetched while
+    later pages are still being listed; large objects are fetched as concurrent ranged GETs.
+    Restored files take the object's modification time, so a later sync can tell them apart
+    from files that changed.
     :param bucket_name: Name of the S3 bucket.
     :param s3_prefix: The S3 key prefix where the folder is stored.
     :param local_folder_path: Path to the local folder where the content will be restored.
+    :param max_workers: (Optional) Number of files downloaded at once. Defaults to S3_MAX_WORKERS.
+    :param multipart_chunksize: (Optional) Ranged GET size in bytes. Defaults to S3_MULTIPART_CHUNKSIZE.
+    :param max_concurrency: (Optional) Number of ranges fetched at once per file. Defaults to S3_MAX_CONCURRENCY.
+    :param sync: (Optional) Skip local files that already match S3.
+    :param delete: (Optional) In sync mode, delete local files that no longer exist under the prefix.
+        Skipped when nothing is listed under the prefix or any file failed.
+    :param checksum: (Optional) In sync mode, compare ETags with local MD5s instead of modification times.
+    :param journal_path: (Optional) Checkpoint journal file. Completed files and byte ranges are
+        recorded there, and re-running with the same journal after an interruption resumes where the
+        previous run stopped. The journal is removed once every file is restored.
+    :return: A TransferSummary for the run.
     """
-    try:
-        # Ensure local folder path exists
-        if not os.path.exists(local_folder_path):
-            os.makedirs(local_folder_path)
-
-        # List all objects with the specified prefix in S3
-        response = s3_client.list_objects_v2(Bucket=bucket_name, Prefix=s3_prefix)
-
-        if "Contents" not in response:
-            logger.info(f"No files found under s3://{bucket_name}/{s3_prefix}")
-            return
+    summary = TransferSummary()
+    config = _transfer_config(multipart_chunksize, max_concurrency)
+    journal = _open_journal(journal_path, "restore", bucket_name, s3_prefix)
 
-        # Iterate over all files in the S3 folder and download them
-        for obj in response.get("Contents", []):
-            # Get the relative path within the S3 prefix
-            s3_key = obj['Key']
-            relative_path = os.path.relpath(s3_key, s3_prefix)
+    # Only list keys inside the folder, not siblings sharing the same name prefix
+    list_prefix = s3_prefix.rstrip("/") + "/" if s3_prefix else ""
 
-            # Construct the full local path for the file
-            local_file_path = os.path.join(local_folder_path, relative_path)
+    def download(obj):
+        # Get the relative path within the S3 prefix
+        s3_key = obj['Key']
+        relative_path = os.path.relpath(s3_key, s3_prefix)
 
+        # Construct the full local path for the file
+        local_file_path = os.path.join(local_folder_path, relative_path)
+        try:
             # Ensure local directory exists for the file
-            local_dir = os.path.dirname(local_file_path)
-            if not os.path.exists(local_dir):
-                os.makedirs(local_dir)
+            os.makedirs(os.path.dirname(local_file_path), exist_ok=True)
 
             # Download the file from S3
             logger.info(f"Downloading s3://{bucket_name}/{s3_key} to {local_file_path}")
-            s3_client.download_file(bucket_name, s3_key, local_file_path)
+            if journal is None:
+                s3_client.download_file(bucket_name, s3_key, local_file_path, Config=config)
+            elif not _download_file_resumable(bucket_name, obj, local_file_path, config, journal):
+                summary.record_skip(obj['Size'])
+                return
+            last_modified = obj['LastModified'].timestamp()
+            os.utime(local_file_path, (last_modified, last_modified))
+            summary.record(obj['Size'])
+        except Exception as e:
+            logger.error(f"Failed to download s3://{bucket_name}/{s3_key}: {e}")
+            summary.record_failure(s3_key)
+
+    max_workers = max_workers or S3_MAX_WORKERS
+    try:
+        # Ensure local folder path exists
+        os.makedirs(local_folder_path, exist_ok=True)
 
-        logger.info(f"Folder restored successfully to {local_folder_path}.")
+        # Skip "directory" placeholder keys, they have no file to restore
+        objects = ((obj,) for obj in _iter_s3_objects(bucket_name, list_prefix) if not obj['Key'].endswith("/"))
+        if sync:
+            local = {s3_key: local_file_path for local_file_path, s3_key in _iter_local_files(local_folder_path,
+                                                                                              s3_prefix)}
+            objects = _changed_s3_objects(objects, local, summary, config.multipart_chunksize, checksum)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            _run_bounded(executor, download, objects, max_workers * 2)
+
+        if sync and delete and _can_delete_stale(summary, f"s3://{bucket_name}/{s3_prefix}"):
+            # Everything the listing did not claim is stale
+            for local_file_path in local.values():
+                logger.info(f"Deleting stale file {local_file_path}")
+                os.remove(local_file_path)
+                summary.record_delete()
+
+        if summary.failed:
+            logger.error(f"Failed to restore {len(summary.failed)} files from s3://{bucket_name}/{s3_prefix}")
+        elif not summary.files and not summary.skipped_files:
+            logger.info(f"No files found under s3://{bucket_name}/{s3_prefix}")
+        else:
+            logger.info(f"Folder restored successfully to {local_folder_path}.")
 
     except Exception as e:
         logger.error(f"Failed to restore folder from S3: {e}")
+        summary.record_failure(s3_prefix)
+
+    _close_journal(journal, summary)
+    logger.info(f"Restore summary: {summary.finish()}")
+    return summary
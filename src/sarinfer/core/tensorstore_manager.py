@@ -0,0 +1,128 @@
+# src/sarinfer/core/tensorstore_manager.py
+
+import json
+import os
+
+import tensorstore as ts
+
+from sarinfer.core import s3_manager
+from sarinfer.logger import get_logger
+
+# Bytes of decoded chunks TensorStore keeps in memory, and threads used to decode them
+TENSORSTORE_CACHE_BYTES = int(os.getenv("TENSORSTORE_CACHE_BYTES", str(256 * 1024 * 1024)))
+TENSORSTORE_CONCURRENCY = int(os.getenv("TENSORSTORE_CONCURRENCY", str(os.cpu_count() or 4)))
+
+# Chunk requests in flight against S3 when arrays are read remotely
+TENSORSTORE_S3_CONCURRENCY = int(os.getenv("TENSORSTORE_S3_CONCURRENCY", "32"))
+
+logger = get_logger(__name__)
+
+
+def create_context(cache_bytes: int = None, concurrency: int = None, s3_concurrency: int = None):
+    """
+    Creates a TensorStore context shared by the arrays of one model, so they draw from one
+    chunk cache, one pool of decode threads and one limit on concurrent S3 chunk fetches.
+    """
+    return ts.Context({
+        "cache_pool": {"total_bytes_limit": cache_bytes if cache_bytes is not None else TENSORSTORE_CACHE_BYTES},
+        "data_copy_concurrency": {"limit": concurrency or TENSORSTORE_CONCURRENCY},
+        "s3_request_concurrency": {"limit": s3_concurrency or TENSORSTORE_S3_CONCURRENCY},
+    })
+
+
+def s3_kvstore_spec(bucket_name: str, path: str, endpoint: str = None, region: str = None):
+    """
+    Returns a TensorStore S3 key-value store spec for a key prefix. Defaults to the endpoint
+    used by s3_manager (MinIO locally); credentials come from the usual AWS environment.
+    """
+    return {
+        "driver": "s3",
+        "bucket": bucket_name,
+        "path": path.rstrip("/") + "/",
+        "endpoint": endpoint or s3_manager.S3_ENDPOINT_URL,
+        "aws_region": region or os.getenv("AWS_DEFAULT_REGION", "us-east-1"),
+    }
+
+
+def zarr_spec(path: str, kvstore: dict = None):
+    """
+    Returns the TensorStore spec of a zarr array stored in a local directory, or at the
+    given key-value store (e.g. s3_kvstore_spec) when one is passed.
+    """
+    return {"driver": "zarr", "kvstore": kvstore or {"driver": "file", "path": path}}
+
+
+def is_zarr_array(path: str):
+    return os.path.isfile(os.path.join(path, ".zarray"))
+
+
+def read_zarr_metadata(path: str):
+    """Reads a zarr array's .zarray metadata (shape, chunks, dtype, compressor) without opening it."""
+    with open(os.path.join(path, ".zarray")) as f:
+        return json.load(f)
+
+
+def find_zarr_arrays(folder_path: str):
+    """
+    Returns {name: path} for every zarr array under folder_path. Names are the array's
+    directory relative to the folder, e.g. "layers/0/attention/wq".
+    """
+    arrays = {}
+    for root, dirs, files in os.walk(folder_path):
+        if ".zarray" in files:
+            arrays[os.path.relpath(root, folder_path).replace("\\", "/")] = root
+            # Chunk files live below the array, nothing else to find there
+            dirs[:] = []
+    return arrays
+
+
+def find_remote_zarr_arrays(bucket_name: str, s3_prefix: str):
+    """
+    Returns {name: {"shape", "dtype", ...}} for every zarr array under an S3 prefix.
+    Uses the layout.json written by checkpoint conversion when present (one request), otherwise
+    lists the prefix and reads each array's .zarray.
+    """
+    prefix = s3_prefix.rstrip("/") + "/"
+    try:
+        response = s3_manager.s3_client.get_object(Bucket=bucket_name, Key=prefix + "layout.json")
+        return json.loads(response["Body"].read())
+    except s3_manager.s3_client.exceptions.NoSuchKey:
+        pass
+
+    arrays = {}
+    for obj in s3_manager._iter_s3_objects(bucket_name, prefix):
+        if obj["Key"].endswith("/.zarray"):
+            response = s3_manager.s3_client.get_object(Bucket=bucket_name, Key=obj["Key"])
+            arrays[obj["Key"][len(prefix):-len("/.zarray")]] = json.loads(response["Body"].read())
+    return arrays
+
+
+def open_array(spec: dict, context: ts.Context = None):
+    """Opens an existing array. Only its metadata is read; data is fetched per chunk on read."""
+    return ts.open(spec, read=True, context=context or create_context()).result()
+
+
+def compressor_spec(codec: str = "blosc", level: int = None):
+    """
+    Returns the zarr compressor for a codec name: "blosc" (zstd inside blosc, byte shuffle),
+    "zstd", or "none".
+    """
+    if codec == "blosc":
+        return {"id": "blosc", "cname": "zstd", "clevel": 5 if level is None else level, "shuffle": 1}
+    if codec == "zstd":
+        return {"id": "zstd", "level": 3 if level is None else level}
+    if codec == "none":
+        return None
+    raise ValueError(f"Unknown codec {codec}, expected blosc, zstd or none")
+
+
+def create_array(path: str, shape, dtype, chunks, compressor: dict = None, context: ts.Context = None):
+    """Creates (replacing any existing one) a zarr array in a local directory and returns it open for writing."""
+    spec = zarr_spec(path)
+    spec["metadata"] = {
+        "shape": list(shape),
+        "chunks": list(chunks),
+        "dtype": dtype.str,
+        "compressor": compressor,
+    }
+    return ts.open(spec, create=True, delete_existing=True, context=context or create_context()).result()
@@ -0,0 +1,165 @@
+# src/sarinfer/core/transfer_journal.py
+#
+# On-disk checkpoint journal for folder uploads and restores.
+#
+# The journal is an append-only JSON-lines file. Every line is one event:
+#
+#   {"event": "begin", "direction": "upload", "bucket": ..., "prefix": ...}
+#   {"event": "plan", "key": ..., "size": ...}                          file discovered
+#   {"event": "upload", "key": ..., "upload_id": ..., "version": ..., "chunksize": ...}
+#                                                                        multipart upload started
+#   {"event": "part", "key": ..., "part": 3, "etag": ..., "size": ...}   part uploaded / range downloaded
+#   {"event": "reset", "key": ...}                                       partial data discarded
+#   {"event": "file", "key": ..., "version": ...}                        file finished
+#
+# "version" identifies the content a record belongs to (size/mtime for uploads, ETag for restores),
+# so records about a file that has since changed are ignored. Part numbers only map to the same byte
+# offsets under the same part size, so uploads and downloaded ranges also record "chunksize" and parts
+# journaled with another size are discarded. Replaying the journal after a crash
+# tells the transfer which files and parts it can skip.
+
+import json
+import os
+import threading
+
+from sarinfer.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class TransferJournal:
+    """Records completed files and multipart parts so an interrupted transfer can resume."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.header = None
+        self._planned = {}
+        self._uploads = {}
+        self._parts = {}
+        self._files = {}
+        self._lock = threading.Lock()
+        self._replay()
+        self._file = open(path, "a")
+
+    def _replay(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A line cut short by the crash we are recovering from
+                    continue
+                self._apply(record)
+
+    def _apply(self, record: dict):
+        event = record["event"]
+        key = record.get("key")
+        if event == "begin":
+            self.header = record
+        elif event == "plan":
+            self._planned[key] = record["size"]
+        elif event == "upload":
+            self._uploads[key] = (record["upload_id"], record["version"], record.get("chunksize"))
+            self._parts[key] = {}
+        elif event == "part":
+            self._parts.setdefault(key, {})[record["part"]] = record
+        elif event == "reset":
+            self._parts.pop(key, None)
+            self._uploads.pop(key, None)
+        elif event == "file":
+            self._files[key] = record["version"]
+
+    def _append(self, record: dict):
+        with self._lock:
+            self._apply(record)
+            self._file.write(json.dumps(record) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def begin(self, direction: str, bucket_name: str, s3_prefix: str):
+        """Starts or resumes a transfer; a journal belongs to exactly one direction, bucket and prefix."""
+        header = {"event": "begin", "direction": direction, "bucket": bucket_name, "prefix": s3_prefix}
+        if self.header is None:
+            self._append(header)
+        elif self.header != header:
+            raise ValueError(f"Journal {self.path} belongs to another transfer: {self.header}")
+        else:
+            logger.info(f"Resuming {direction} from journal {self.path}: {self.progress()}")
+
+    def plan(self, key: str, size: int):
+        """Records a file that is part of the transfer, for progress reporting."""
+        if self._planned.get(key) != size:
+            self._append({"event": "plan", "key": key, "size": size})
+
+    def is_complete(self, key: str, version):
+        return self._files.get(key) == version
+
+    def complete_file(self, key: str, version):
+        self._append({"event": "file", "key": key, "version": version})
+
+    def multipart_upload(self, key: str, version, chunksize: int):
+        """Returns the upload ID of an unfinished multipart upload of this content and part size, if any."""
+        upload_id, upload_version, upload_chunksize = self._uploads.get(key, (None, None, None))
+        return upload_id if (upload_version, upload_chunksize) == (version, chunksize) else None
+
+    def superseded_upload(self, key: str, version, chunksize: int):
+        """
+        Returns the upload ID of an unfinished multipart upload that cannot be resumed because
+        the file changed or the part size differs, if any.
+        """
+        upload_id, upload_version, upload_chunksize = self._uploads.get(key, (None, None, None))
+        if upload_id is None or (upload_version, upload_chunksize) == (version, chunksize):
+            return None
+        return upload_id
+
+    def start_multipart_upload(self, key: str, upload_id: str, version, chunksize: int):
+        self._append({"event": "upload", "key": key, "upload_id": upload_id, "version": version,
+                      "chunksize": chunksize})
+
+    def completed_parts(self, key: str, version=None, chunksize: int = None):
+        """
+        Returns {part_number: record} of finished parts. Download ranges carry the object ETag
+        as their version and their part size, and only count while both match.
+        """
+        parts = self._parts.get(key, {})
+        if version is None:
+            return dict(parts)
+        return {number: part for number, part in parts.items()
+                if part.get("version") == version and part.get("chunksize") == chunksize}
+
+    def complete_part(self, key: str, part_number: int, size: int, etag: str = None, version=None,
+                      chunksize: int = None):
+        self._append({"event": "part", "key": key, "part": part_number, "size": size, "etag": etag,
+                      "version": version, "chunksize": chunksize})
+
+    def reset_parts(self, key: str):
+        """Forgets the parts of a file whose partial data can no longer be used."""
+        if key in self._parts or key in self._uploads:
+            self._append({"event": "reset", "key": key})
+
+    def progress(self):
+        """Returns files and bytes done, total and remaining for the files planned so far."""
+        with self._lock:
+            bytes_done = 0
+            for key, size in self._planned.items():
+                if key in self._files:
+                    bytes_done += size
+                else:
+                    bytes_done += sum(part["size"] for part in self._parts.get(key, {}).values())
+            bytes_total = sum(self._planned.values())
+            files_done = sum(1 for key in self._planned if key in self._files)
+            return {
+                "files_done": files_done,
+                "files_total": len(self._planned),
+                "bytes_done": bytes_done,
+                "bytes_total": bytes_total,
+                "bytes_remaining": bytes_total - bytes_done,
+            }
+
+    def close(self, remove: bool = False):
+        """Closes the journal; remove it once the transfer finished cleanly."""
+        self._file.close()
+        if remove and os.path.exists(self.path):
+            os.remove(self.path)
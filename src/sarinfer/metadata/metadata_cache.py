@@ -0,0 +1,102 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire ttl seconds after they were stored.
+
+    A reader that fills the cache after a miss takes generation() before fetching and passes it
+    to set; the value is then dropped if its key was invalidated during the fetch, since it may
+    predate the write that caused the invalidation.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        # Sequence number of each key's latest invalidation, for the most recent maxsize keys;
+        # keys forgotten from it count as invalidated at _forgotten_generation
+        self._generation = 0
+        self._invalidated = OrderedDict()
+        self._forgotten_generation = 0
+
+    def get(self, key):
+        """Returns (True, value) on a hit and (False, None) on a miss or expired entry."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if time.monotonic() < expires_at:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._data[key]
+            self.misses += 1
+            return False, None
+
+    def generation(self):
+        """Returns the current invalidation sequence number, to take before a fetch and pass to set."""
+        with self._lock:
+            return self._generation
+
+    def set(self, key, value, generation: int = None):
+        """
+        Stores a value. With a generation from generation(), the value is not stored if key
+        was invalidated since. Returns whether it was stored.
+        """
+        with self._lock:
+            if generation is not None and (self._invalidated.get(key, 0) > generation
+                                           or self._forgotten_generation > generation):
+                return False
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+            return True
+
+    def items(self):
+        """Returns a snapshot of the unexpired (key, value) pairs, without counting hits or reordering."""
+        now = time.monotonic()
+        with self._lock:
+            return [(key, value) for key, (value, expires_at) in self._data.items() if now < expires_at]
+
+    def invalidate(self, key):
+        with self._lock:
+            self._generation += 1
+            self._invalidated[key] = self._generation
+            self._invalidated.move_to_end(key)
+            while len(self._invalidated) > self.maxsize:
+                self._forgotten_generation = self._invalidated.popitem(last=False)[1]
+            if self._data.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._invalidated.clear()
+            self._forgotten_generation = self._generation
+            self.invalidations += len(self._data)
+            self._data.clear()
+
+    def stats(self):
+        """Returns hit/miss counters, hit rate and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+            }
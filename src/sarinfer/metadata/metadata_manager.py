@@ -1,54 +1,481 @@
+import os
+import random
+import re
+import threading
+import time
 from datetime import datetime
 
-from pymongo.errors import DuplicateKeyError
+from pymongo import ReturnDocument, UpdateMany
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
 
 from sarinfer.config.mongo_config import MongoDBConfig
+from sarinfer.logger import get_logger
+from sarinfer.metadata.metadata_cache import TTLCache
 from sarinfer.metadata.model_metadata import ModelMetadata
+from sarinfer.utils.errors import REVISION_CONFLICT_ERROR
+from sarinfer.utils.exceptions import ModelRevisionConflictException
 
+# Read-through cache of get_model_metadata; a TTL of 0 disables it
+METADATA_CACHE_TTL = float(os.getenv("METADATA_CACHE_TTL", "30"))
+METADATA_CACHE_SIZE = int(os.getenv("METADATA_CACHE_SIZE", "1024"))
 
-class ModelMetadataManager:
-    def __init__(self):
-        self.db_config = MongoDBConfig()  # Connect using project-level configuration
-        self.collection = self.db_config.get_collection("model_metadata")
+# Documents fetched per round trip while iterating models
+METADATA_BATCH_SIZE = int(os.getenv("METADATA_BATCH_SIZE", "500"))
+
+# Fields iter_models can sort by; each is paired with model_id so keyset pagination is total
+SORT_FIELDS = ("model_id", "model_name", "version", "load_status", "updated_at")
+
+# Secondary indexes backing the filters and sorts of iter_models
+SECONDARY_INDEXES = [
+    [("model_name", 1), ("model_id", 1)],
+    [("version", 1), ("model_id", 1)],
+    [("load_status", 1), ("model_id", 1)],
+    [("updated_at", 1), ("model_id", 1)],
+]
+
+# Versions allocate_versions hands out, whose numbers seed a model name's counter on first use
+_ALLOCATED_VERSION = re.compile(r"^v(\d+)$")
+
+# Attempts modify_model_metadata makes before giving up on a contended model
+METADATA_UPDATE_ATTEMPTS = int(os.getenv("METADATA_UPDATE_ATTEMPTS", "5"))
+
+logger = get_logger(__name__)
 
+# Collections whose indexes this process already ensured, keyed by (client id, full name).
+# The client is kept referenced so its id cannot be reused by another client.
+_indexed_collections = {}
+_indexed_lock = threading.Lock()
+
+
+def _write_errors(error: BulkWriteError):
+    """Maps the index of every failed operation in a bulk write to an exception describing it."""
+    errors = {}
+    for write_error in error.details.get("writeErrors", []):
+        exception_class = DuplicateKeyError if write_error.get("code") == 11000 else OperationFailure
+        errors[write_error["index"]] = exception_class(write_error.get("errmsg"), write_error.get("code"),
+                                                       write_error)
+    return errors
+
+
+def bootstrap_indexes(collection=None):
+    """
+    Creates the model_metadata indexes once per process. Managers call this on construction,
+    so only the first one pays for the createIndexes round trips; servers may call it at startup.
+    :param collection: (Optional) Collection to index. Defaults to the configured model_metadata collection.
+    """
+    if collection is None:
+        collection = MongoDBConfig().get_collection("model_metadata")
+    client = collection.database.client
+    key = (id(client), collection.full_name)
+    if key in _indexed_collections:
+        return
+    with _indexed_lock:
+        if key in _indexed_collections:
+            return
         # Ensure model_id is unique
-        self.collection.create_index("model_id", unique=True)
+        collection.create_index("model_id", unique=True)
+        # Ensure a version is registered once per model name; documents without one are exempt
+        try:
+            collection.create_index([("model_name", 1), ("version", 1)], unique=True,
+                                    partialFilterExpression={"version": {"$type": "string"}})
+        except OperationFailure as e:
+            logger.error(f"Could not create the unique (model_name, version) index, the registry holds "
+                         f"duplicate versions: {e}")
+        for keys in SECONDARY_INDEXES:
+            collection.create_index(keys)
+        _indexed_collections[key] = client
+
+
+class ModelMetadataManager:
+    def __init__(self, cache_ttl: float = None, cache_size: int = None, collection=None):
+        if collection is None:
+            self.db_config = MongoDBConfig()  # Connect using project-level configuration
+            collection = self.db_config.get_collection("model_metadata")
+        self.collection = collection
+        # Per-model version sequences, allocated server-side so every worker sees the same counter
+        self.counters = collection.database["counters"]
+
+        bootstrap_indexes(self.collection)
+
+        cache_ttl = METADATA_CACHE_TTL if cache_ttl is None else cache_ttl
+        self.cache = TTLCache(cache_size or METADATA_CACHE_SIZE, cache_ttl) if cache_ttl > 0 else None
+        self._watcher = None
+        self._stop_watching = threading.Event()
+
+    def _invalidate(self, model_id: str):
+        if self.cache is not None:
+            self.cache.invalidate(model_id)
+
+    def allocate_versions(self, model_name: str, count: int = 1):
+        """
+        Atomically reserves the next count versions of a model with one find_one_and_update on
+        the counters collection, so concurrent registrations never collide or go backwards.
+        A name's counter starts after the highest vN version already registered for it.
+        :return: The reserved versions, e.g. ["v4", "v5"].
+        """
+        counter_id = f"version:{model_name}"
+        counter = self.counters.find_one_and_update({"_id": counter_id}, {"$inc": {"seq": count}},
+                                                    return_document=ReturnDocument.AFTER)
+        if counter is None:
+            # First allocation for this name: $max makes seeding idempotent when processes race
+            # here, and can never move a counter another process already advanced backwards
+            self.counters.update_one({"_id": counter_id}, {"$max": {"seq": self._highest_version(model_name)}},
+                                     upsert=True)
+            counter = self.counters.find_one_and_update({"_id": counter_id}, {"$inc": {"seq": count}},
+                                                        return_document=ReturnDocument.AFTER)
+        last = counter["seq"]
+        return [f"v{seq}" for seq in range(last - count + 1, last + 1)]
+
+    def _highest_version(self, model_name: str):
+        """Returns the highest N of the vN versions registered for a model name, or 0."""
+        numbers = [int(match.group(1)) for match in
+                   map(_ALLOCATED_VERSION.match, self.collection.distinct("version", {"model_name": model_name}))
+                   if match]
+        return max(numbers, default=0)
+
+    def _assign_versions(self, model_metadatas: list):
+        """Allocates versions for models that do not have one yet, one round trip per model name."""
+        unversioned = {}
+        for metadata in model_metadatas:
+            if metadata.version is None:
+                unversioned.setdefault(metadata.model_name, []).append(metadata)
+        for model_name, group in unversioned.items():
+            for metadata, version in zip(group, self.allocate_versions(model_name, len(group))):
+                metadata.version = version
 
     def add_model(self, model_metadata: ModelMetadata):
-        """Adds new model metadata to MongoDB."""
+        """
+        Adds new model metadata to MongoDB, allocating its version if it has none.
+        :return: The model_id, or None if a model with that ID, or that name and version, already exists.
+        """
+        self._assign_versions([model_metadata])
         try:
             self.collection.insert_one(model_metadata.to_dict())
-        except DuplicateKeyError:
-            print(f"Model with ID {model_metadata.model_id} already exists.")
+        except DuplicateKeyError as e:
+            logger.warning(f"Could not add model {model_metadata.model_id}: a model with this ID, or this name "
+                           f"and version, already exists ({e})")
             return None
+        # A cached "not found" is now stale
+        self._invalidate(model_metadata.model_id)
         return model_metadata.model_id
 
     def get_model_metadata(self, model_id: str):
-        """Retrieves metadata for a specific model."""
-        data = self.collection.find_one({"model_id": model_id})
+        """Retrieves metadata for a specific model, from the cache when possible."""
+        if self.cache is not None:
+            hit, data = self.cache.get(model_id)
+            if not hit:
+                # Not cached if a write invalidates it meanwhile, as the fetched document may predate it
+                generation = self.cache.generation()
+                data = self.collection.find_one({"model_id": model_id})
+                self.cache.set(model_id, data, generation)
+        else:
+            data = self.collection.find_one({"model_id": model_id})
         if data:
+            # Hydrate a fresh object per call so callers cannot mutate the cached document
             return ModelMetadata.from_dict(data)
         return None
 
-    def update_model_metadata(self, model_id: str, updates: dict):
-        """Updates model metadata with new values."""
+    def update_model_metadata(self, model_id: str, updates: dict, expected_revision: int = None):
+        """
+        Updates model metadata with new values and bumps its revision.
+        :param model_id: ID of the model.
+        :param updates: Fields to set.
+        :param expected_revision: (Optional) Only update if the stored revision still matches,
+                                  raising ModelRevisionConflictException otherwise.
+        """
         updates['updated_at'] = datetime.utcnow()
+        query = {"model_id": model_id}
+        if expected_revision is not None:
+            # Documents written before revisions existed have none, which counts as 0
+            query["revision"] = {"$in": [0, None]} if expected_revision == 0 else expected_revision
         result = self.collection.update_one(
-            {"model_id": model_id},
-            {"$set": updates}
+            query,
+            {"$set": updates, "$inc": {"revision": 1}}
         )
+        self._invalidate(model_id)
+        if result.modified_count == 0 and expected_revision is not None \
+                and self.collection.count_documents({"model_id": model_id}, limit=1):
+            raise ModelRevisionConflictException(REVISION_CONFLICT_ERROR.format(model_id=model_id,
+                                                                                revision=expected_revision))
         return result.modified_count
 
+    def modify_model_metadata(self, model_id: str, modify, max_attempts: int = None):
+        """
+        Read-modify-write without locks: reads the current document, asks modify for the fields to
+        set and writes them only if nobody else updated the model meanwhile. On a conflict it
+        re-reads after a short randomized backoff, so contending writers spread out instead of
+        retrying in lockstep.
+        :param model_id: ID of the model.
+        :param modify: Callable taking the current ModelMetadata and returning a dict of updates.
+        :param max_attempts: (Optional) Attempts before the conflict is raised. Defaults to METADATA_UPDATE_ATTEMPTS.
+        :return: The modified count: 1, or 0 if the model does not exist.
+        """
+        max_attempts = max_attempts or METADATA_UPDATE_ATTEMPTS
+        for attempt in range(max_attempts):
+            data = self.collection.find_one({"model_id": model_id})
+            if data is None:
+                return 0
+            metadata = ModelMetadata.from_dict(data)
+            try:
+                return self.update_model_metadata(model_id, modify(metadata), expected_revision=metadata.revision)
+            except ModelRevisionConflictException:
+                if attempt == max_attempts - 1:
+                    raise
+                time.sleep(random.uniform(0, 0.005 * 2 ** attempt))
+
     def delete_model_metadata(self, model_id: str):
         """Deletes a model's metadata."""
         result = self.collection.delete_one({"model_id": model_id})
+        self._invalidate(model_id)
         return result.deleted_count
 
+    def add_models(self, model_metadatas: list):
+        """
+        Adds many models in one unordered insert_many; one duplicate does not stop the rest.
+        :param model_metadatas: ModelMetadata objects to insert.
+        :return: {model_id: None if inserted, else the DuplicateKeyError or OperationFailure it hit}.
+        """
+        results = {metadata.model_id: None for metadata in model_metadatas}
+        if not model_metadatas:
+            return results
+        self._assign_versions(model_metadatas)
+        try:
+            self.collection.insert_many([metadata.to_dict() for metadata in model_metadatas], ordered=False)
+        except BulkWriteError as e:
+            for index, error in _write_errors(e).items():
+                model_id = model_metadatas[index].model_id
+                logger.warning(f"Could not add model {model_id}: {error}")
+                results[model_id] = error
+        for model_id in results:
+            self._invalidate(model_id)
+        return results
+
+    def update_many(self, updates: dict):
+        """
+        Applies per-model updates with as few round trips as possible: models receiving the same
+        update share one UpdateMany over an $in filter, and all groups go out in one unordered bulk_write.
+        :param updates: {model_id: {field: value}}.
+        :return: {model_id: 1 if the model was updated, 0 if it does not exist, or the OperationFailure
+                  its update hit}.
+        """
+        if not updates:
+            return {}
+        now = datetime.utcnow()
+
+        # Group model_ids by identical update documents (fleet-wide status flips collapse to one op)
+        groups = []
+        for model_id, fields in updates.items():
+            fields = dict(fields, updated_at=now)
+            for group_fields, model_ids in groups:
+                if group_fields == fields:
+                    model_ids.append(model_id)
+                    break
+            else:
+                groups.append((fields, [model_id]))
+
+        # Bulk results only carry totals; every write bumps revision, so snapshot it to tell which
+        # models this call wrote even when other writers touch them concurrently
+        revisions = self._revisions(list(updates))
+        results = {model_id: 0 for model_id in updates}
+        try:
+            if len(groups) == 1:
+                fields, model_ids = groups[0]
+                self.collection.update_many({"model_id": {"$in": model_ids}},
+                                            {"$set": fields, "$inc": {"revision": 1}})
+            else:
+                self.collection.bulk_write([UpdateMany({"model_id": {"$in": model_ids}},
+                                                       {"$set": fields, "$inc": {"revision": 1}})
+                                            for fields, model_ids in groups], ordered=False)
+        except BulkWriteError as e:
+            for index, error in _write_errors(e).items():
+                for model_id in groups[index][1]:
+                    results[model_id] = error
+        except OperationFailure as e:
+            # The single update_many failed as a whole
+            for model_id in updates:
+                results[model_id] = e
+
+        for model_id, revision in self._revisions(list(revisions)).items():
+            if results[model_id] == 0 and revision > revisions[model_id]:
+                results[model_id] = 1
+        for model_id in updates:
+            self._invalidate(model_id)
+        return results
+
+    def _revisions(self, model_ids: list):
+        """Returns {model_id: revision} of the given models that exist."""
+        if not model_ids:
+            return {}
+        return {document["model_id"]: document.get("revision", 0) for document in
+                self.collection.find({"model_id": {"$in": model_ids}}, {"_id": 0, "model_id": 1, "revision": 1})}
+
+    def get_many(self, model_ids: list):
+        """
+        Retrieves many models with one $in query for those not already cached.
+        :param model_ids: IDs of the models to fetch.
+        :return: {model_id: ModelMetadata, or None if the model does not exist}.
+        """
+        documents = {}
+        misses = []
+        for model_id in model_ids:
+            hit, data = self.cache.get(model_id) if self.cache is not None else (False, None)
+            if hit:
+                documents[model_id] = data
+            else:
+                misses.append(model_id)
+
+        if misses:
+            generation = self.cache.generation() if self.cache is not None else None
+            found = {data["model_id"]: data for data in self.collection.find({"model_id": {"$in": misses}})}
+            for model_id in misses:
+                documents[model_id] = found.get(model_id)
+                if self.cache is not None:
+                    self.cache.set(model_id, documents[model_id], generation)
+
+        return {model_id: ModelMetadata.from_dict(data) if data else None for model_id, data in documents.items()}
+
+    def iter_models(self, model_name: str = None, load_status: str = None, version: str = None,
+                    fields: list = None, sort_by: str = "model_id", descending: bool = False, after: tuple = None,
+                    limit: int = None, batch_size: int = None):
+        """
+        Streams model metadata from a server-side cursor instead of loading the whole registry.
+        Results are ordered by (sort_by, model_id), so the position of any yielded model can be
+        passed back as after to resume there (keyset pagination, no skip).
+        :param model_name: (Optional) Only models with this name.
+        :param load_status: (Optional) Only models with this load status.
+        :param version: (Optional) Only models with this version.
+        :param fields: (Optional) Fields to fetch; dicts are yielded instead of ModelMetadata objects.
+        :param sort_by: Field to order by, one of SORT_FIELDS.
+        :param descending: Order from the largest value down.
+        :param after: (Optional) (sort value, model_id) of the last model already seen, see model_position.
+        :param limit: (Optional) Maximum number of models to yield.
+        :param batch_size: (Optional) Documents per round trip. Defaults to METADATA_BATCH_SIZE.
+        """
+        if sort_by not in SORT_FIELDS:
+            raise ValueError(f"sort_by must be one of {SORT_FIELDS}")
+
+        query = {name: value for name, value in
+                 (("model_name", model_name), ("load_status", load_status), ("version", version))
+                 if value is not None}
+        if after is not None:
+            operator = "$lt" if descending else "$gt"
+            last_value, last_model_id = after
+            if sort_by == "model_id":
+                query["model_id"] = {operator: last_model_id}
+            else:
+                query["$or"] = [{sort_by: {operator: last_value}},
+                                {sort_by: last_value, "model_id": {operator: last_model_id}}]
+
+        projection = None
+        if fields is not None:
+            # The sort keys are always needed to continue from a yielded model
+            projection = {field: 1 for field in (*fields, sort_by, "model_id")}
+            projection["_id"] = 0
+
+        direction = -1 if descending else 1
+        order = [(sort_by, direction)] if sort_by == "model_id" else [(sort_by, direction), ("model_id", direction)]
+        cursor = self.collection.find(query, projection).sort(order).batch_size(batch_size or METADATA_BATCH_SIZE)
+        if limit:
+            cursor = cursor.limit(limit)
+        try:
+            for data in cursor:
+                yield data if fields is not None else ModelMetadata.from_dict(data)
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def model_position(model, sort_by: str = "model_id"):
+        """Returns the (sort value, model_id) of a model yielded by iter_models, for its after argument."""
+        if isinstance(model, dict):
+            return model.get(sort_by), model["model_id"]
+        return getattr(model, sort_by), model.model_id
+
+    def list_models_page(self, page_size: int = 100, after: tuple = None, sort_by: str = "model_id", **filters):
+        """
+        Returns one page of iter_models and the position to pass as after for the next page,
+        or None once the last page was returned.
+        """
+        models = list(self.iter_models(sort_by=sort_by, after=after, limit=page_size,
+                                       batch_size=page_size, **filters))
+        next_after = self.model_position(models[-1], sort_by) if len(models) == page_size else None
+        return models, next_after
+
     def list_all_models(self):
-        """Returns a list of all model metadata."""
+        """Returns a list of all model metadata. Prefer iter_models for large registries."""
         data = self.collection.find()
         return [ModelMetadata.from_dict(item) for item in data]
 
+    def cache_stats(self):
+        """Returns the metadata cache's hit/miss counters, or None when caching is disabled."""
+        return self.cache.stats() if self.cache is not None else None
+
+    def start_cache_invalidation(self, poll_interval: float = 5.0):
+        """
+        Keeps the cache coherent with writes made by other processes. Uses a MongoDB change
+        stream when the deployment supports one (replica sets), and otherwise revalidates the
+        cached entries every poll_interval seconds, see revalidate_cache.
+        """
+        if self.cache is None or self._watcher is not None:
+            return
+        self._stop_watching.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(poll_interval,), daemon=True,
+                                         name="metadata-cache-invalidation")
+        self._watcher.start()
+
+    def stop_cache_invalidation(self):
+        self._stop_watching.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def revalidate_cache(self):
+        """
+        Drops cached models that were updated, created or deleted since they were cached. The
+        revision and updated_at of every cached model are compared with the stored ones, one $in
+        query per METADATA_BATCH_SIZE models. Equality is checked rather than a time watermark, so
+        writes in the same millisecond and writers with skewed clocks are not missed.
+        """
+        cached = self.cache.items()
+        batch_size = METADATA_BATCH_SIZE
+        for start in range(0, len(cached), batch_size):
+            batch = dict(cached[start:start + batch_size])
+            stored = {data["model_id"]: data for data in
+                      self.collection.find({"model_id": {"$in": list(batch)}},
+                                           {"_id": 0, "model_id": 1, "revision": 1, "updated_at": 1})}
+            for model_id, data in batch.items():
+                current = stored.get(model_id)
+                if data is None or current is None:
+                    changed = data is not current
+                else:
+                    changed = (data.get("revision"), data.get("updated_at")) != \
+                              (current.get("revision"), current.get("updated_at"))
+                if changed:
+                    self.cache.invalidate(model_id)
+
+    def _watch(self, poll_interval: float):
+        try:
+            with self.collection.watch(full_document="updateLookup", max_await_time_ms=int(poll_interval * 1000)) \
+                    as stream:
+                logger.info("Metadata cache invalidation using a change stream")
+                while not self._stop_watching.is_set():
+                    change = stream.try_next()
+                    if change is None:
+                        continue
+                    model_id = (change.get("fullDocument") or {}).get("model_id")
+                    # Deletes only carry the _id, so fall back to dropping everything
+                    if model_id is not None:
+                        self.cache.invalidate(model_id)
+                    else:
+                        self.cache.clear()
+            return
+        except (OperationFailure, NotImplementedError) as e:
+            logger.info(f"Change streams unavailable ({e}), revalidating cached metadata every {poll_interval}s")
+
+        while not self._stop_watching.wait(poll_interval):
+            try:
+                self.revalidate_cache()
+            except OperationFailure as e:
+                logger.warning(f"Could not revalidate cached metadata: {e}")
 
 # # src/sarinfer/metadata/metadata_manager.py
 #
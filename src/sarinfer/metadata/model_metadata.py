@@ -1,11 +1,18 @@
 import uuid
 from datetime import datetime
 
+# Persisted fields, in document order
+FIELDS = ("model_id", "model_name", "version", "size", "location", "storage_layout", "load_status",
+          "last_loaded", "created_at", "updated_at", "revision")
+_KNOWN_KEYS = frozenset(FIELDS + ("_id",))
+
+
 class ModelMetadata:
-    # Class variable to auto-increment the version
-    version_counter = 0
+    # Fixed attribute set: no per-instance __dict__, which matters when hydrating whole registries
+    __slots__ = FIELDS + ("extra",)
 
-    def __init__(self, model_name: str, size: float, location: str, model_id=None, version=None):
+    def __init__(self, model_name: str, size: float, location: str, model_id=None, version=None,
+                 storage_layout=None):
         # Autogenerate model_id if not provided
         if model_id is None:
             model_id = self._generate_model_id()
@@ -14,52 +21,63 @@ class ModelMetadata:
         if not model_name or not size or not location:
             raise ValueError("model_name, size, and location are mandatory fields.")
 
-        # Assign the auto-incremented version if not provided
-        if version is None:
-            version = self._get_next_version()
-
+        now = datetime.utcnow()
         self.model_id = model_id
         self.model_name = model_name
-        self.version = version
+        self.version = version  # None until ModelMetadataManager allocates one on insert
         self.size = size
         self.location = location
+        self.storage_layout = storage_layout  # {tensor name: {"shape", "dtype", "chunks", "codec"}}
         self.load_status = "unloaded"  # default value
         self.last_loaded = None
-        self.created_at = datetime.utcnow()
-        self.updated_at = datetime.utcnow()
+        self.created_at = now
+        self.updated_at = now
+        self.revision = 0  # bumped by every update, for optimistic concurrency
+        self.extra = {}  # stored fields this class does not model, kept so round trips are lossless
 
     @staticmethod
     def _generate_model_id():
         """Generates a unique model_id using UUID."""
         return str(uuid.uuid4())
 
-    @classmethod
-    def _get_next_version(cls):
-        """Handles version auto-incrementation."""
-        cls.version_counter += 1
-        return f"v{cls.version_counter}"
-
     def to_dict(self):
         """Converts the object to a dictionary."""
-        return {
+        data = dict(self.extra)
+        data.update({
             "model_id": self.model_id,
             "model_name": self.model_name,
             "version": self.version,
             "size": self.size,
             "location": self.location,
+            "storage_layout": self.storage_layout,
             "load_status": self.load_status,
             "last_loaded": self.last_loaded,
             "created_at": self.created_at,
-            "updated_at": self.updated_at
-        }
+            "updated_at": self.updated_at,
+            "revision": self.revision
+        })
+        return data
 
     @classmethod
     def from_dict(cls, data):
-        """Recreates a ModelMetadata object from a dictionary."""
-        return cls(
-            model_id=data.get("model_id"),
-            model_name=data["model_name"],
-            version=data.get("version"),
-            size=data["size"],
-            location=data["location"]
-        )
+        """
+        Recreates a ModelMetadata object from a stored dictionary, as is: no ID generation,
+        version allocation or validation, and status, timestamps and revision are kept.
+        """
+        metadata = cls.__new__(cls)
+        metadata.model_id = data.get("model_id")
+        metadata.model_name = data["model_name"]
+        metadata.version = data.get("version")
+        metadata.size = data["size"]
+        metadata.location = data["location"]
+        metadata.storage_layout = data.get("storage_layout")
+        metadata.load_status = data.get("load_status", "unloaded")
+        metadata.last_loaded = data.get("last_loaded")
+        metadata.created_at = data.get("created_at")
+        metadata.updated_at = data.get("updated_at")
+        metadata.revision = data.get("revision", 0)
+        if _KNOWN_KEYS.issuperset(data):
+            metadata.extra = {}
+        else:
+            metadata.extra = {key: value for key, value in data.items() if key not in _KNOWN_KEYS}
+        return metadata
@@ -0,0 +1,164 @@
+# src/sarinfer/models/checkpoint_converter.py
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from sarinfer.core.quantization import QUANTIZE_INT4_GROUP_SIZE, QWEIGHT_SUFFIX, SCALES_SUFFIX, quantize
+from sarinfer.core.tensorstore_manager import compressor_spec, create_array, create_context
+from sarinfer.logger import get_logger
+from sarinfer.models.model_loader import open_model_folder
+
+# Target size of one chunk when no chunk shape is given
+DEFAULT_CHUNK_BYTES = 4 * 1024 * 1024
+
+# Upper bound on checkpoint data held in memory by all conversion workers together
+CONVERT_MEMORY_BYTES = int(os.getenv("CONVERT_MEMORY_BYTES", str(1024 * 1024 * 1024)))
+
+# Written next to the arrays so the layout travels with the converted folder
+LAYOUT_FILE_NAME = "layout.json"
+
+logger = get_logger(__name__)
+
+
+def chunk_shape_for(shape, dtype, chunk_shape=None):
+    """
+    Picks the chunk shape of one tensor.
+    With chunk_shape given, its trailing dimensions are matched to the tensor's (leading
+    dimensions it does not cover get 1) and clipped to the tensor. Otherwise rows are grouped
+    so one chunk holds about DEFAULT_CHUNK_BYTES.
+    """
+    shape = tuple(shape)
+    if not shape:
+        return ()
+    if chunk_shape is not None:
+        chunk_shape = tuple(chunk_shape)[-len(shape):]
+        chunk_shape = (1,) * (len(shape) - len(chunk_shape)) + chunk_shape
+        return tuple(max(1, min(c, s)) for c, s in zip(chunk_shape, shape))
+
+    row_bytes = int(np.prod(shape[1:], dtype=np.int64)) * np.dtype(dtype).itemsize
+    rows = max(1, DEFAULT_CHUNK_BYTES // max(row_bytes, 1))
+    return (max(1, min(rows, shape[0])),) + shape[1:]
+
+
+def _convert_tensor(tensor, path: str, chunks, compressor, context, slab_bytes: int):
+    """Copies one tensor into a zarr array, slab by slab along the first axis."""
+    target = create_array(path, tensor.shape, tensor.dtype, chunks, compressor, context)
+    if not tensor.shape:
+        target.write(np.asarray(tensor[()])).result()
+        return
+
+    # Whole chunk rows per slab, so each chunk is encoded exactly once
+    row_bytes = max(1, tensor.nbytes // max(tensor.shape[0], 1))
+    rows = max(chunks[0], (slab_bytes // row_bytes) // chunks[0] * chunks[0])
+    for start in range(0, tensor.shape[0], rows):
+        stop = min(start + rows, tensor.shape[0])
+        target[start:stop].write(np.asarray(tensor[start:stop])).result()
+
+
+def quantization_group_size(tensor, bits: int, group_size: int = None):
+    """
+    Returns the group size a tensor is quantized with, or None when it stays as it is: only 2-D
+    floating point weights whose input size the group size divides (and is even, for int4) are quantized.
+    """
+    if len(tensor.shape) != 2 or not np.issubdtype(tensor.dtype, np.floating):
+        return None
+    cols = tensor.shape[1]
+    group_size = group_size or (cols if bits == 8 else min(QUANTIZE_INT4_GROUP_SIZE, cols))
+    if cols % group_size or (bits == 4 and cols % 2):
+        return None
+    return group_size
+
+
+def _quantize_tensor(tensor, path: str, layout: dict, compressor, context, slab_bytes: int):
+    """Quantizes one tensor into its qweight and scales zarr arrays, slab by slab along the output rows."""
+    qweight_layout, scales_layout = layout[QWEIGHT_SUFFIX], layout[SCALES_SUFFIX]
+    bits, group_size = qweight_layout["quantization"]["bits"], qweight_layout["quantization"]["group_size"]
+    qweight = create_array(path + QWEIGHT_SUFFIX, qweight_layout["shape"], np.dtype(qweight_layout["dtype"]),
+                           qweight_layout["chunks"], compressor, context)
+    scales = create_array(path + SCALES_SUFFIX, scales_layout["shape"], np.dtype(scales_layout["dtype"]),
+                          scales_layout["chunks"], compressor, context)
+
+    # Both arrays share their row chunking, so whole chunk rows per slab suit both
+    chunk_rows = qweight_layout["chunks"][0]
+    row_bytes = max(1, tensor.nbytes // max(tensor.shape[0], 1))
+    rows = max(chunk_rows, (slab_bytes // row_bytes) // chunk_rows * chunk_rows)
+    for start in range(0, tensor.shape[0], rows):
+        stop = min(start + rows, tensor.shape[0])
+        quantized = quantize(np.asarray(tensor[start:stop]), bits, group_size)
+        qweight[start:stop].write(quantized.qweight).result()
+        scales[start:stop].write(quantized.scales).result()
+
+
+def convert_checkpoint(src_folder: str, dst_folder: str, chunk_shape=None, codec: str = "blosc",
+                       level: int = None, max_workers: int = None, max_memory_bytes: int = None,
+                       quantize_bits: int = None, group_size: int = None):
+    """
+    Rewrites a checkpoint folder (.safetensors, .npy or zarr) as chunked, compressed zarr arrays,
+    one array directory per tensor.
+    Tensors are converted in parallel; each worker reads and writes at most
+    max_memory_bytes / max_workers of source data at a time.
+    :param src_folder: Path to the checkpoint folder.
+    :param dst_folder: Path of the folder to write.
+    :param chunk_shape: (Optional) Chunk shape, aligned to each tensor's trailing dimensions.
+    :param codec: (Optional) "blosc", "zstd" or "none".
+    :param level: (Optional) Compression level.
+    :param max_workers: (Optional) Tensors converted at once. Defaults to the CPU count.
+    :param max_memory_bytes: (Optional) Memory budget shared by the workers. Defaults to CONVERT_MEMORY_BYTES.
+    :param quantize_bits: (Optional) 8 or 4 to store 2-D weights quantized, see sarinfer.core.quantization.
+    :param group_size: (Optional) Inputs per quantization scale, see quantize().
+    :return: The storage layout: {array name: {"shape", "dtype", "chunks", "codec"}}. Quantized tensors
+             are stored as <name>.qweight (with a "quantization" entry) and <name>.scales.
+    """
+    source = open_model_folder(src_folder)
+    compressor = compressor_spec(codec, level)
+    max_workers = max_workers or os.cpu_count() or 4
+    slab_bytes = (max_memory_bytes or CONVERT_MEMORY_BYTES) // max_workers
+    context = create_context(cache_bytes=0)
+
+    layout = {}
+    quantized = {}
+    for name, tensor in source.items():
+        groups = quantization_group_size(tensor, quantize_bits, group_size) if quantize_bits else None
+        if groups is None:
+            layout[name] = {
+                "shape": list(tensor.shape),
+                "dtype": tensor.dtype.str,
+                "chunks": list(chunk_shape_for(tensor.shape, tensor.dtype, chunk_shape)),
+                "codec": compressor,
+            }
+            continue
+        rows, cols = tensor.shape
+        qshape = (rows, cols // 2 if quantize_bits == 4 else cols)
+        qdtype = np.dtype(np.uint8 if quantize_bits == 4 else np.int8)
+        qchunks = chunk_shape_for(qshape, qdtype, chunk_shape)
+        quantized[name] = {
+            QWEIGHT_SUFFIX: {"shape": list(qshape), "dtype": qdtype.str, "chunks": list(qchunks), "codec": compressor,
+                             "quantization": {"bits": quantize_bits, "group_size": groups}},
+            SCALES_SUFFIX: {"shape": [rows, cols // groups], "dtype": np.dtype(np.float32).str,
+                            "chunks": [qchunks[0], cols // groups], "codec": compressor},
+        }
+        for suffix, entry in quantized[name].items():
+            layout[name + suffix] = entry
+
+    def convert(name):
+        path = os.path.join(dst_folder, name)
+        if name in quantized:
+            logger.info(f"Quantizing {name} {list(source[name].shape)} to int{quantize_bits}, "
+                        f"group size {quantized[name][QWEIGHT_SUFFIX]['quantization']['group_size']}")
+            _quantize_tensor(source[name], path, quantized[name], compressor, context, slab_bytes)
+            return
+        logger.info(f"Converting {name} {layout[name]['shape']} with chunks {layout[name]['chunks']}")
+        _convert_tensor(source[name], path, layout[name]["chunks"], compressor, context, slab_bytes)
+
+    os.makedirs(dst_folder, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Largest first, so one big tensor does not finish last on its own
+        list(executor.map(convert, sorted(source, key=lambda name: -source[name].nbytes)))
+
+    with open(os.path.join(dst_folder, LAYOUT_FILE_NAME), "w") as f:
+        json.dump(layout, f, indent=2)
+    logger.info(f"Converted {len(layout)} tensors from {src_folder} to {dst_folder}")
+    return layout
@@ -1,8 +1,208 @@
 # src/sarinfer/models/model_loader.py
 
-def load_model(model_name: str):
+import os
+import threading
+from collections.abc import Mapping
+
+import numpy as np
+
+from sarinfer.core.cache_manager import ModelCache
+from sarinfer.core.quantization import group_quantized
+from sarinfer.core.s3_manager import S3_BUCKET_NAME, model_s3_prefix, restore_model_folder_from_s3
+from sarinfer.core.tensorstore_manager import create_context, find_remote_zarr_arrays, find_zarr_arrays, open_array, \
+    read_zarr_metadata, s3_kvstore_spec, zarr_spec
+from sarinfer.logger import get_logger
+from sarinfer.utils.exceptions import GenericS3Exception
+from sarinfer.utils.file_utils import memmap_safetensors
+
+logger = get_logger(__name__)
+
+# Process-wide model cache, created on first use
+_model_cache = None
+
+
+class LazyTensor:
+    """
+    A model weight that is read into memory on first access.
+    Shape and dtype are known up front; indexing before the first full read only fetches the
+    requested slice (the chunks it covers for TensorStore arrays, the pages it covers for mmaps).
+    """
+
+    def __init__(self, name: str, opener, shape, dtype):
+        self.name = name
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self._opener = opener
+        self._source = None
+        self._array = None
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self):
+        return int(np.prod(self.shape, dtype=np.int64)) * self.dtype.itemsize
+
+    @property
+    def loaded(self):
+        return self._array is not None
+
+    def _open(self):
+        if self._source is None:
+            self._source = self._opener()
+        return self._source
+
+    @staticmethod
+    def _read(source):
+        # TensorStore reads are asynchronous; mmaps are already arrays and page in on touch
+        if hasattr(source, "read"):
+            return source.read().result()
+        return source
+
+    def numpy(self):
+        """Returns the whole tensor as a NumPy array, reading it the first time."""
+        if self._array is None:
+            with self._lock:
+                if self._array is None:
+                    self._array = self._read(self._open())
+        return self._array
+
+    def __array__(self, dtype=None, copy=None):
+        array = self.numpy()
+        return array if dtype is None else array.astype(dtype)
+
+    def __getitem__(self, index):
+        if self._array is not None:
+            return self._array[index]
+        return np.asarray(self._read(self._open()[index]))
+
+    def release(self):
+        """Drops the materialized array; the next access reads it again."""
+        self._array = None
+
+    def __repr__(self):
+        return f"LazyTensor({self.name!r}, shape={self.shape}, dtype={self.dtype}, loaded={self.loaded})"
+
+
+class LazyModel(Mapping):
+    """Read-only mapping of tensor name to LazyTensor (or QuantizedTensor) for one model folder."""
+
+    def __init__(self, path: str, tensors: dict):
+        self.path = path
+        self._tensors = tensors
+
+    def __getitem__(self, name):
+        return self._tensors[name]
+
+    def __iter__(self):
+        return iter(self._tensors)
+
+    def __len__(self):
+        return len(self._tensors)
+
+    @property
+    def nbytes(self):
+        """Size of every tensor in the model."""
+        return sum(tensor.nbytes for tensor in self._tensors.values())
+
+    @property
+    def resident_bytes(self):
+        """Size of the tensors that have been materialized so far."""
+        return sum(tensor.nbytes for tensor in self._tensors.values() if tensor.loaded)
+
+
+def open_model_folder(folder_path: str, context=None):
+    """
+    Opens the weights in a model folder lazily. Supported layouts are zarr arrays (one directory
+    per tensor, read through TensorStore), .safetensors files and .npy files (both memory-mapped).
+    Quantized weights (<name>.qweight and <name>.scales) are opened as one QuantizedTensor.
+    Only metadata is read here.
+    """
+    tensors = {}
+    context = context or create_context()
+    for name, path in find_zarr_arrays(folder_path).items():
+        metadata = read_zarr_metadata(path)
+        tensors[name] = LazyTensor(name, lambda path=path: open_array(zarr_spec(path), context),
+                                   metadata["shape"], metadata["dtype"])
+
+    for root, dirs, files in os.walk(folder_path):
+        # zarr chunk directories were handled above
+        dirs[:] = [d for d in dirs if not os.path.isfile(os.path.join(root, d, ".zarray"))]
+        for file in sorted(files):
+            file_path = os.path.join(root, file)
+            if file.endswith(".safetensors"):
+                for name, view in memmap_safetensors(file_path).items():
+                    tensors[name] = LazyTensor(name, lambda view=view: view, view.shape, view.dtype)
+            elif file.endswith(".npy"):
+                view = np.load(file_path, mmap_mode="r")
+                name = os.path.relpath(file_path, folder_path)[:-len(".npy")].replace("\\", "/")
+                tensors[name] = LazyTensor(name, lambda view=view: view, view.shape, view.dtype)
+
+    return LazyModel(folder_path, group_quantized(tensors))
+
+
+def open_remote_model(bucket_name: str, s3_prefix: str, cache_bytes: int = None, s3_concurrency: int = None,
+                      endpoint: str = None):
+    """
+    Opens the zarr arrays of a model directly on S3, without restoring the folder first.
+    Reading a tensor, or a slice of one, fetches only the chunks it covers, concurrently, and
+    decoded chunks are kept in a cache bounded by cache_bytes.
+    :param bucket_name: Name of the S3 bucket.
+    :param s3_prefix: The S3 key prefix of the converted model folder.
+    :param cache_bytes: (Optional) Chunk cache limit. Defaults to TENSORSTORE_CACHE_BYTES.
+    :param s3_concurrency: (Optional) Chunk requests in flight. Defaults to TENSORSTORE_S3_CONCURRENCY.
+    :param endpoint: (Optional) S3 endpoint. Defaults to S3_ENDPOINT_URL.
+    """
+    context = create_context(cache_bytes=cache_bytes, s3_concurrency=s3_concurrency)
+    tensors = {}
+    for name, metadata in find_remote_zarr_arrays(bucket_name, s3_prefix).items():
+        kvstore = s3_kvstore_spec(bucket_name, f"{s3_prefix.rstrip('/')}/{name}", endpoint)
+        tensors[name] = LazyTensor(name, lambda kvstore=kvstore: open_array(zarr_spec(None, kvstore), context),
+                                   metadata["shape"], metadata["dtype"])
+    return LazyModel(f"s3://{bucket_name}/{s3_prefix}", group_quantized(tensors))
+
+
+def get_model_cache():
+    """
+    Returns the shared on-disk model cache configured by MODEL_CACHE_DIR and MODEL_CACHE_MAX_BYTES.
+    """
+    global _model_cache
+    if _model_cache is None:
+        _model_cache = ModelCache()
+    return _model_cache
+
+
+def fetch_model(model_id: str, version: str, bucket_name: str = None, s3_prefix: str = None):
+    """
+    Return the local path of a model version, restoring it from S3 into the model cache on a miss.
+    Hot models are served from the cache without touching the network.
+    """
+    bucket_name = bucket_name or S3_BUCKET_NAME
+    s3_prefix = s3_prefix or model_s3_prefix(model_id, version)
+
+    def restore(tmp_path):
+        summary = restore_model_folder_from_s3(bucket_name, s3_prefix, tmp_path)
+        if summary.failed or not summary.files:
+            raise GenericS3Exception(f"Could not restore s3://{bucket_name}/{s3_prefix}: {summary}")
+
+    return get_model_cache().get(model_id, version, restore)
+
+
+def load_model(model_name: str, version: str = None, stream: bool = False):
     """
     Load the specified model into the system.
-    This is a placeholder for the actual model loading logic.
+    model_name is either a local model folder or a model ID; a model ID is resolved through
+    the model cache (restoring version from S3 on a miss), or with stream=True opened directly
+    on S3 from model_s3_prefix(model_id, version), which must hold converted zarr arrays.
+    Weights are opened lazily, so startup only reads metadata and memory grows with the
+    tensors actually used.
     """
-    print(f"Model {model_name} is being loaded into memory.")
+    if os.path.isdir(model_name):
+        model = open_model_folder(model_name)
+    elif version is None:
+        raise ValueError(f"{model_name} is not a model folder; pass a version to load it by model ID")
+    elif stream:
+        model = open_remote_model(S3_BUCKET_NAME, model_s3_prefix(model_name, version))
+    else:
+        model = open_model_folder(fetch_model(model_name, version))
+
+    logger.info(f"Model {model_name} opened from {model.path}: {len(model)} tensors, {model.nbytes} bytes")
+    return model
@@ -6,3 +6,11 @@ ERROR_MISSING_API_KEY = "API key is required."
 # Add more errors as needed
 BUCKET_NOT_FOUND_ERROR = "The bucket {bucket_name} does not exist (404)."
 GENERIC_S3_ERROR = "An error occurred: {error}"
+MANIFEST_NOT_FOUND_ERROR = "No manifest found for model {model_id} version {version}."
+REVISION_CONFLICT_ERROR = "Model {model_id} was modified concurrently (expected revision {revision})."
+KV_CACHE_EXHAUSTED_ERROR = "KV cache exhausted: {needed} blocks needed, {free} free."
+INFERENCE_WORKER_ERROR = "Inference worker {worker} exited with code {exitcode}."
+RESIDENCY_BUDGET_ERROR = "Model {model_id} needs {needed} bytes but only {available} of the {budget} byte budget can be freed."
+RATE_LIMITED_ERROR = "Rate limit of {rate} requests per second exceeded for this API key."
+QUEUE_FULL_ERROR = "Server busy: the {priority} priority queue is full."
+DEADLINE_EXCEEDED_ERROR = "The request's deadline passed before it could be served."
@@ -3,3 +3,27 @@ class S3BucketNotFoundException(Exception):
 
 class GenericS3Exception(Exception):
     pass
+
+class ModelManifestNotFoundException(Exception):
+    pass
+
+class ModelRevisionConflictException(Exception):
+    pass
+
+class KVCacheExhaustedException(Exception):
+    pass
+
+class InferenceWorkerException(Exception):
+    pass
+
+class ModelResidencyException(Exception):
+    pass
+
+class RateLimitedException(Exception):
+    pass
+
+class QueueFullException(Exception):
+    pass
+
+class DeadlineExceededException(Exception):
+    pass
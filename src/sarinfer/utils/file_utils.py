@@ -0,0 +1,75 @@
+# src/sarinfer/utils/file_utils.py
+
+import json
+import struct
+
+import numpy as np
+
+# safetensors dtype codes and their NumPy equivalents
+SAFETENSORS_DTYPES = {
+    "F64": np.float64,
+    "F32": np.float32,
+    "F16": np.float16,
+    "I64": np.int64,
+    "I32": np.int32,
+    "I16": np.int16,
+    "I8": np.int8,
+    "U8": np.uint8,
+    "BOOL": np.bool_,
+}
+
+
+def read_safetensors_header(file_path: str):
+    """
+    Reads the JSON header of a safetensors file.
+    The file starts with a little-endian u64 header length, then the header, then the raw tensor data.
+    :return: A (header, data_offset) tuple; tensor offsets in the header are relative to data_offset.
+    """
+    with open(file_path, "rb") as f:
+        (header_size,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_size))
+    header.pop("__metadata__", None)
+    return header, 8 + header_size
+
+
+def memmap_safetensors(file_path: str):
+    """
+    Maps every tensor of a safetensors file as a read-only NumPy view. Nothing is read from
+    disk until a view is touched.
+    :return: A dict of tensor name to np.memmap.
+    """
+    header, data_offset = read_safetensors_header(file_path)
+    tensors = {}
+    for name, info in header.items():
+        if info["dtype"] not in SAFETENSORS_DTYPES:
+            raise ValueError(f"Unsupported safetensors dtype {info['dtype']} for tensor {name}")
+        start, end = info["data_offsets"]
+        dtype = np.dtype(SAFETENSORS_DTYPES[info["dtype"]]).newbyteorder("<")
+        shape = tuple(info["shape"])
+        if end == start:
+            tensors[name] = np.zeros(shape, dtype=dtype)
+            continue
+        tensors[name] = np.memmap(file_path, dtype=dtype, mode="r", offset=data_offset + start, shape=shape)
+    return tensors
+
+
+def write_safetensors(file_path: str, tensors: dict):
+    """Writes a dict of NumPy arrays as a safetensors file."""
+    codes = {np.dtype(dtype): code for code, dtype in SAFETENSORS_DTYPES.items()}
+    header, offset = {}, 0
+    arrays = []
+    for name, array in tensors.items():
+        array = np.ascontiguousarray(array)
+        header[name] = {"dtype": codes[array.dtype.newbyteorder("=")], "shape": list(array.shape),
+                        "data_offsets": [offset, offset + array.nbytes]}
+        offset += array.nbytes
+        arrays.append(array.astype(array.dtype.newbyteorder("<"), copy=False))
+
+    encoded = json.dumps(header).encode()
+    # Pad the header so the data section is 8-byte aligned
+    encoded += b" " * (-len(encoded) % 8)
+    with open(file_path, "wb") as f:
+        f.write(struct.pack("<Q", len(encoded)))
+        f.write(encoded)
+        for array in arrays:
+            f.write(array.tobytes())
@@ -0,0 +1,166 @@
+import asyncio
+import time
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from sarinfer.api.admission import AdmissionController, PriorityClass, TokenBucket
+from sarinfer.api.server import create_app
+from sarinfer.core.cpu_manager import DenseModel
+from sarinfer.core.inference import BatchingEngine
+from sarinfer.utils.exceptions import DeadlineExceededException, QueueFullException, RateLimitedException
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _controller(max_concurrent=1, clock=None, queue_size=2, rate=1000.0, burst=1000):
+    classes = {name: PriorityClass(name, priority, rate, burst, queue_size)
+               for priority, name in enumerate(("high", "normal", "low"))}
+    return AdmissionController(max_concurrent, classes, {"vip": "high", "batch": "low"}, "normal",
+                               clock=clock or FakeClock())
+
+
+# Test that the bucket allows a burst, then refills at its rate
+def test_token_bucket():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2.0, burst=3, clock=clock)
+    assert [bucket.take() for _ in range(4)] == [True, True, True, False]
+    assert bucket.wait_time() == pytest.approx(0.5)
+    clock.now += 0.5
+    assert bucket.take() and not bucket.take()
+    clock.now += 100
+    assert bucket.tokens <= 3 and bucket.wait_time() == 0.0
+
+
+# Test that a key over its rate is refused with the time until it may retry
+def test_rate_limit():
+    controller = _controller(max_concurrent=10, rate=1.0, burst=2)
+
+    async def run():
+        await controller.admit("key")
+        await controller.admit("key")
+        with pytest.raises(RateLimitedException) as error:
+            await controller.admit("key")
+        # Other keys have their own buckets
+        await controller.admit("other")
+        return error.value
+
+    error = asyncio.run(run())
+    assert error.args[1] == pytest.approx(1.0)
+    assert controller.stats()["rate_limited"] == 1 and controller.stats()["in_flight"] == 3
+
+
+# Test that freed capacity goes to the highest priority class first, oldest first within a class
+def test_priority_order_and_full_queue():
+    controller = _controller(max_concurrent=1, queue_size=2)
+    order = []
+
+    async def waiter(key, label):
+        ticket = await controller.admit(key)
+        order.append(label)
+        return ticket
+
+    async def run():
+        holder = await controller.admit("someone")
+        tasks = [asyncio.create_task(waiter(key, label)) for key, label in
+                 (("batch", "low"), ("user", "normal 1"), ("user", "normal 2"), ("vip", "high"))]
+        await asyncio.sleep(0)
+        assert controller.stats()["queued"] == {"high": 1, "normal": 2, "low": 1}
+        with pytest.raises(QueueFullException):
+            await controller.admit("user")
+
+        # Each admitted waiter leaves at once, so capacity passes down the queues one by one
+        holder.release()
+        released = set()
+        while len(released) < len(tasks):
+            await asyncio.sleep(0)
+            for task in tasks:
+                if task.done() and task not in released:
+                    released.add(task)
+                    task.result().release()
+
+    asyncio.run(run())
+    assert order == ["high", "normal 1", "normal 2", "low"]
+    assert controller.stats()["queue_full"] == 1
+
+
+# Test that requests whose deadline passed are dropped, both on arrival and while queued
+def test_deadline_dropping():
+    clock = FakeClock()
+    controller = _controller(max_concurrent=1, clock=clock)
+
+    async def run():
+        with pytest.raises(DeadlineExceededException):
+            await controller.admit("user", deadline=clock.now - 1)
+
+        holder = await controller.admit("user")
+        queued = asyncio.create_task(controller.admit("user", deadline=clock.now + 30))
+        behind = asyncio.create_task(controller.admit("user"))
+        await asyncio.sleep(0)
+        clock.now += 60  # the first waiter's client has given up by the time capacity frees
+        holder.release()
+        with pytest.raises(DeadlineExceededException):
+            await queued
+        (await behind).release()
+
+        # A waiter whose deadline passes in real time leaves the queue by itself
+        holder = await controller.admit("user")
+        controller.clock = time.monotonic
+        with pytest.raises(DeadlineExceededException):
+            await controller.admit("user", deadline=controller.clock() + 0.01)
+        assert controller.stats()["queued"]["normal"] == 0
+        holder.release()
+
+    asyncio.run(run())
+    assert controller.stats()["expired"] == 3 and controller.stats()["in_flight"] == 0
+
+
+# Test that a waiter that goes away (client disconnect) gives up its place
+def test_cancelled_waiter_leaves_queue():
+    controller = _controller(max_concurrent=1)
+
+    async def run():
+        holder = await controller.admit("user")
+        waiter = asyncio.create_task(controller.admit("user"))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert controller.stats()["queued"]["normal"] == 0
+        holder.release()
+
+    asyncio.run(run())
+    assert controller.stats()["in_flight"] == 0
+
+
+# Test that the API answers 429 with Retry-After, rejects bad timeouts and reports admission stats
+def test_api_rate_limit(monkeypatch):
+    monkeypatch.setenv("VALID_API_KEYS", "valid_key_1")
+    from sarinfer.api.auth import get_valid_api_keys
+    get_valid_api_keys.cache_clear()
+    dense = DenseModel({"layers.0.weight": np.eye(2, dtype=np.float32)})
+    engine = BatchingEngine(dense.forward, max_wait_ms=1).start()
+    controller = _controller(max_concurrent=4, rate=0.5, burst=1)
+    controller.clock = time.monotonic
+    headers = {"X-API-Key": "valid_key_1"}
+    try:
+        with TestClient(create_app(engine=engine, admission=controller)) as client:
+            assert client.post("/v1/infer", headers=headers, json={"inputs": [1, 2]}).json()["outputs"] == [1, 2]
+            response = client.post("/v1/infer", headers=headers, json={"inputs": [1, 2]})
+            assert response.status_code == 429 and int(response.headers["Retry-After"]) >= 1
+            for timeout in ("soon", "-1", "0", "nan", "inf"):
+                response = client.post("/v1/infer", headers={**headers, "X-Request-Timeout": timeout},
+                                       json={"inputs": [1, 2]})
+                assert response.status_code == 422
+            admission = client.get("/stats").json()["admission"]
+            assert admission["admitted"] == 1 and admission["rate_limited"] == 1 and admission["in_flight"] == 0
+    finally:
+        engine.stop()
+        get_valid_api_keys.cache_clear()
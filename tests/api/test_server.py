@@ -0,0 +1,159 @@
+import asyncio
+import json
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from sarinfer.api.server import create_app
+from sarinfer.api.streaming import TokenStream, sse_tokens
+from sarinfer.core.cpu_manager import DenseModel, TransformerLM, init_transformer_weights
+from sarinfer.core.inference import BatchingEngine, ContinuousBatchingScheduler
+from sarinfer.utils.errors import ERROR_INVALID_API_KEY, ERROR_MISSING_API_KEY
+
+HEADERS = {"X-API-Key": "valid_key_1"}
+
+
+@pytest.fixture(autouse=True)
+def mock_valid_api_keys(monkeypatch):
+    monkeypatch.setenv("VALID_API_KEYS", "valid_key_1")
+    from sarinfer.api.auth import get_valid_api_keys
+    get_valid_api_keys.cache_clear()
+    yield
+    get_valid_api_keys.cache_clear()
+
+
+@pytest.fixture
+def serving():
+    """A scheduler over a small language model and an engine over a dense model, behind the app."""
+    model = TransformerLM(init_transformer_weights(vocab_size=64, d_model=32, n_layers=2, max_positions=128), n_heads=4)
+    scheduler = ContinuousBatchingScheduler(model, max_batch_size=8).start()
+    rng = np.random.default_rng(0)
+    dense = DenseModel({"layers.0.weight": rng.standard_normal((3, 4)).astype(np.float32)})
+    engine = BatchingEngine(dense.forward, max_wait_ms=1).start()
+    with TestClient(create_app(scheduler=scheduler, engine=engine)) as client:
+        yield client, scheduler, dense
+    scheduler.stop()
+    engine.stop()
+
+
+def _events(lines):
+    events, event = [], {}
+    for line in lines:
+        if not line:
+            if event:
+                events.append(event)
+            event = {}
+        elif line.startswith("event: "):
+            event["event"] = line[len("event: "):]
+        elif line.startswith("data: "):
+            event["data"] = json.loads(line[len("data: "):])
+    return events
+
+
+# Test that tokens are streamed as server-sent events and match a direct generation
+def test_generate_stream(serving):
+    client, scheduler, _ = serving
+    expected = scheduler.generate([1, 2, 3], max_new_tokens=6, timeout=30)
+
+    with client.stream("POST", "/v1/generate", headers=HEADERS,
+                       json={"prompt": [1, 2, 3], "max_new_tokens": 6}) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = _events(response.iter_lines())
+
+    tokens = [event["data"] for event in events if "event" not in event]
+    assert [token["index"] for token in tokens] == list(range(6))
+    assert [token["token"] for token in tokens] == expected
+    done = events[-1]
+    assert done["event"] == "done"
+    assert done["data"]["finish_reason"] == "length" and done["data"]["generated_tokens"] == 6
+    assert done["data"]["time_to_first_token_ms"] <= done["data"]["total_time_ms"]
+
+
+# Test the non-streaming response, single-shot inference and the status endpoints
+def test_generate_json_infer_and_status(serving):
+    client, scheduler, dense = serving
+
+    response = client.post("/v1/generate", headers=HEADERS, json={"prompt": [5, 6], "max_new_tokens": 4,
+                                                                  "stream": False})
+    assert response.status_code == 200
+    assert response.json()["tokens"] == scheduler.generate([5, 6], max_new_tokens=4, timeout=30)
+
+    x = [1.0, 2.0, 3.0, 4.0]
+    response = client.post("/v1/infer", headers=HEADERS, json={"inputs": x})
+    np.testing.assert_allclose(response.json()["outputs"], dense(np.array([x], dtype=np.float32))[0], rtol=1e-5)
+
+    health = client.get("/health")
+    assert health.status_code == 200 and health.json()["components"] == {"scheduler": True, "engine": True}
+    stats = client.get("/stats").json()
+    assert stats["scheduler"]["completed"] >= 2 and stats["engine"]["requests"] == 1
+
+    scheduler.stop()
+    assert client.get("/health").status_code == 503
+
+
+# Test that requests without a valid API key are refused
+def test_generate_requires_api_key(serving):
+    client, _, _ = serving
+    response = client.post("/v1/generate", json={"prompt": [1]})
+    assert response.status_code == 401 and response.json()["detail"] == ERROR_MISSING_API_KEY
+    response = client.post("/v1/generate", headers={"X-API-Key": "nope"}, json={"prompt": [1]})
+    assert response.status_code == 401 and response.json()["detail"] == ERROR_INVALID_API_KEY
+
+
+class _Request:
+    def __init__(self):
+        self.future = Future()
+        self.tokens = []
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+# Test that a stream consumer that goes away cancels its sequence
+def test_stream_cancelled_on_disconnect():
+    async def run():
+        request = _Request()
+        stream = TokenStream().attach(request)
+        events = sse_tokens(stream)
+        stream.on_token(7)
+        first = await events.__anext__()
+        assert '"token": 7' in first
+        await events.aclose()
+        return request
+
+    assert asyncio.run(run()).cancelled
+
+
+# Test that a client polled as disconnected is cancelled while nothing is being generated
+def test_stream_polls_for_disconnect(monkeypatch):
+    monkeypatch.setattr("sarinfer.api.streaming.STREAM_DISCONNECT_POLL_SECONDS", 0.01)
+
+    async def gone():
+        return True
+
+    async def run():
+        request = _Request()
+        stream = TokenStream().attach(request)
+        return request, [event async for event in sse_tokens(stream, gone)]
+
+    request, events = asyncio.run(run())
+    assert request.cancelled and events == []
+
+
+# Test that a reader falling too far behind has its sequence cancelled instead of buffering without bound
+def test_stream_overflow_cancels():
+    async def run():
+        request = _Request()
+        stream = TokenStream(max_buffered=3).attach(request)
+        for token in range(5):
+            stream.on_token(token)
+        await asyncio.sleep(0)
+        return request, stream
+
+    request, stream = asyncio.run(run())
+    assert request.cancelled and stream.overflowed
+    assert stream.drain() == [0, 1, 2, 3, 4]
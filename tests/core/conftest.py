@@ -0,0 +1,25 @@
+import pytest
+from moto import mock_aws
+
+from sarinfer.core import s3_manager
+
+# An AWS endpoint, which moto intercepts without MOTO_S3_CUSTOM_ENDPOINTS
+MOTO_S3_ENDPOINT_URL = "https://s3.us-east-1.amazonaws.com"
+
+
+@pytest.fixture
+def s3_test_client(monkeypatch):
+    """
+    Points s3_manager at an endpoint and dummy credentials moto can serve. The module-level client
+    is built at import from the environment, which defaults to a local MinIO moto does not intercept.
+    """
+    for name, value in (("AWS_ACCESS_KEY_ID", "testing"), ("AWS_SECRET_ACCESS_KEY", "testing"),
+                        ("AWS_DEFAULT_REGION", "us-east-1")):
+        monkeypatch.setenv(name, value)
+        if hasattr(s3_manager, name):
+            monkeypatch.setattr(s3_manager, name, value)
+    monkeypatch.setattr(s3_manager, "S3_ENDPOINT_URL", MOTO_S3_ENDPOINT_URL)
+    # Built inside the mock; clients built before moto starts are not always intercepted
+    with mock_aws():
+        monkeypatch.setattr(s3_manager, "s3_client", s3_manager.create_s3_client())
+        yield s3_manager.s3_client
@@ -0,0 +1,85 @@
+import asyncio
+import os
+import shutil
+import tempfile
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from sarinfer.core.async_s3_manager import AsyncS3Manager, S3ConnectionPool
+from sarinfer.utils.exceptions import S3BucketNotFoundException
+
+pytestmark = pytest.mark.usefixtures("s3_test_client")
+
+
+@pytest.fixture
+def setup_local_folder():
+    """
+    Setup a temporary local folder with a handful of files.
+    """
+    temp_dir = tempfile.mkdtemp()
+    os.makedirs(os.path.join(temp_dir, "subfolder"))
+    for i in range(6):
+        with open(os.path.join(temp_dir, "subfolder" if i % 2 else "", f"file{i}.txt"), "w") as f:
+            f.write(f"File {i} content")
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+
+@mock_aws()
+def test_async_upload_and_restore(setup_local_folder):
+    s3_client = boto3.client("s3", region_name="us-east-1")
+    s3_client.create_bucket(Bucket="test-bucket")
+    restore_path = tempfile.mkdtemp()
+
+    async def roundtrip():
+        manager = AsyncS3Manager(pool_size=2)
+        try:
+            uploaded = await manager.upload_folder(setup_local_folder, "test-bucket", "models/llama")
+            restored = await manager.restore_folder("test-bucket", "models/llama", restore_path)
+            return uploaded, restored, manager.pool_stats()
+        finally:
+            manager.close()
+
+    try:
+        uploaded, restored, stats = asyncio.run(roundtrip())
+
+        assert uploaded.files == 6
+        assert restored.files == 6
+        assert restored.failed == []
+        with open(os.path.join(restore_path, "subfolder", "file3.txt")) as f:
+            assert f.read() == "File 3 content"
+
+        # Never more requests in flight than connections
+        assert stats["peak"] == 2
+        assert stats["in_use"] == 0
+        assert stats["requests"] >= 13
+    finally:
+        shutil.rmtree(restore_path)
+
+
+@mock_aws()
+def test_async_upload_to_non_existent_bucket(setup_local_folder):
+    manager = AsyncS3Manager(pool_size=2)
+    with pytest.raises(S3BucketNotFoundException):
+        asyncio.run(manager.upload_folder(setup_local_folder, "non-existent-bucket"))
+    manager.close()
+
+
+def test_pool_does_not_block_event_loop():
+    pool = S3ConnectionPool(size=1, client=object())
+    ticks = []
+
+    async def ticker():
+        for _ in range(5):
+            ticks.append(pool.stats()["in_use"])
+            await asyncio.sleep(0.01)
+
+    async def main():
+        import time
+        await asyncio.gather(pool.run(time.sleep, 0.1), ticker())
+
+    asyncio.run(main())
+    pool.close()
+    assert ticks[1:] == [1, 1, 1, 1]
@@ -0,0 +1,109 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+import pytest
+
+from sarinfer.core.cache_manager import ModelCache
+
+
+@pytest.fixture
+def cache_dir():
+    temp_dir = tempfile.mkdtemp()
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+
+def make_fetch(size: int, calls: list = None):
+    """Returns a fetch function that writes one file of the given size."""
+    def fetch(path):
+        if calls is not None:
+            calls.append(path)
+        with open(os.path.join(path, "weights.bin"), "wb") as f:
+            f.write(b"\0" * size)
+    return fetch
+
+
+def test_cache_hit_does_not_fetch(cache_dir):
+    cache = ModelCache(cache_dir, max_bytes=1000)
+    calls = []
+
+    path = cache.get("llama", "v1", make_fetch(100, calls))
+    assert path == cache.entry_path("llama", "v1")
+    assert os.path.getsize(os.path.join(path, "weights.bin")) == 100
+
+    assert cache.get("llama", "v1", make_fetch(100, calls)) == path
+    assert len(calls) == 1
+    assert cache.entries()["llama/v1"]["hits"] == 2
+    assert cache.total_bytes() == 100
+
+
+def test_cache_evicts_least_recently_used(cache_dir):
+    cache = ModelCache(cache_dir, max_bytes=250)
+    cache.get("a", "v1", make_fetch(100))
+    cache.get("b", "v1", make_fetch(100))
+    cache.get("a", "v1", make_fetch(100))
+
+    cache.get("c", "v1", make_fetch(100))
+
+    assert not cache.contains("b", "v1")
+    assert cache.contains("a", "v1")
+    assert cache.contains("c", "v1")
+    assert cache.total_bytes() == 200
+
+
+def test_cache_evicts_least_frequently_used(cache_dir):
+    cache = ModelCache(cache_dir, max_bytes=250, policy="lfu")
+    cache.get("a", "v1", make_fetch(100))
+    cache.get("a", "v1", make_fetch(100))
+    cache.get("b", "v1", make_fetch(100))
+
+    cache.get("c", "v1", make_fetch(100))
+
+    assert not cache.contains("b", "v1")
+    assert cache.contains("a", "v1")
+
+
+def test_cache_does_not_evict_entries_in_use(cache_dir):
+    cache = ModelCache(cache_dir, max_bytes=150)
+    with cache.acquire("a", "v1", make_fetch(100)) as path:
+        cache.get("b", "v1", make_fetch(100))
+        assert os.path.exists(os.path.join(path, "weights.bin"))
+    assert cache.contains("a", "v1")
+
+
+def test_failed_fetch_publishes_nothing(cache_dir):
+    cache = ModelCache(cache_dir, max_bytes=1000)
+
+    def fetch(path):
+        make_fetch(100)(path)
+        raise IOError("connection reset")
+
+    with pytest.raises(IOError):
+        cache.get("llama", "v1", fetch)
+    assert not cache.contains("llama", "v1")
+    assert os.listdir(os.path.join(cache_dir, "tmp")) == []
+    assert cache.entries() == {}
+
+
+def _fetch_in_process(cache_dir, log_path):
+    def fetch(path):
+        with open(log_path, "a") as f:
+            f.write("fetch\n")
+        make_fetch(100)(path)
+    ModelCache(cache_dir, max_bytes=1000).get("llama", "v1", fetch)
+
+
+def test_concurrent_processes_fetch_once(cache_dir):
+    log_path = os.path.join(cache_dir, "fetches.log")
+    ctx = multiprocessing.get_context("fork")
+    processes = [ctx.Process(target=_fetch_in_process, args=(cache_dir, log_path)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    assert all(process.exitcode == 0 for process in processes)
+    with open(log_path) as f:
+        assert f.read() == "fetch\n"
@@ -0,0 +1,105 @@
+import os
+import shutil
+import tempfile
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from sarinfer.core.cas_manager import blob_key, hash_file, pull_model_version, push_model_version
+from sarinfer.utils.exceptions import ModelManifestNotFoundException
+
+pytestmark = pytest.mark.usefixtures("s3_test_client")
+
+
+@pytest.fixture
+def setup_model_folder():
+    """
+    Setup a temporary model folder with two shards and a duplicated config file.
+    """
+    temp_dir = tempfile.mkdtemp()
+    os.makedirs(os.path.join(temp_dir, "subfolder"))
+
+    with open(os.path.join(temp_dir, "shard-0.bin"), "wb") as f:
+        f.write(b"base weights")
+    with open(os.path.join(temp_dir, "adapter.bin"), "wb") as f:
+        f.write(b"adapter v1")
+    with open(os.path.join(temp_dir, "config.json"), "w") as f:
+        f.write("{}")
+    shutil.copyfile(os.path.join(temp_dir, "config.json"), os.path.join(temp_dir, "subfolder", "config.json"))
+
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+
+@pytest.fixture
+def setup_restore_folder():
+    temp_dir = tempfile.mkdtemp()
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+
+@mock_aws()
+def test_push_model_version_dedups_blobs(setup_model_folder):
+    """
+    Test that a second version only uploads the blobs that changed.
+    """
+    s3_client = boto3.client("s3", region_name="us-east-1")
+    s3_client.create_bucket(Bucket="test-bucket")
+    folder_path = setup_model_folder
+
+    manifest, summary = push_model_version(folder_path, "test-bucket", "llama", "v1")
+
+    # config.json and subfolder/config.json share one blob
+    assert summary.files == 3
+    assert summary.failed == []
+    assert set(manifest["files"]) == {"shard-0.bin", "adapter.bin", "config.json", "subfolder/config.json"}
+    assert manifest["files"]["shard-0.bin"]["digest"] == hash_file(os.path.join(folder_path, "shard-0.bin"))
+
+    with open(os.path.join(folder_path, "adapter.bin"), "wb") as f:
+        f.write(b"adapter v2")
+    manifest, summary = push_model_version(folder_path, "test-bucket", "llama", "v2")
+
+    assert summary.files == 1
+    assert summary.skipped_files == 2
+    s3_client.head_object(Bucket="test-bucket", Key=blob_key(manifest["files"]["adapter.bin"]["digest"]))
+    s3_client.head_object(Bucket="test-bucket", Key="cas/manifests/llama/v2.json")
+
+
+@mock_aws()
+def test_pull_model_version_fetches_missing_blobs(setup_model_folder, setup_restore_folder):
+    """
+    Test that pulling over an older version only downloads the blobs that are missing locally.
+    """
+    s3_client = boto3.client("s3", region_name="us-east-1")
+    s3_client.create_bucket(Bucket="test-bucket")
+    folder_path = setup_model_folder
+    push_model_version(folder_path, "test-bucket", "llama", "v1")
+    with open(os.path.join(folder_path, "adapter.bin"), "wb") as f:
+        f.write(b"adapter v2")
+    push_model_version(folder_path, "test-bucket", "llama", "v2")
+
+    restore_path = setup_restore_folder
+    _, summary = pull_model_version("test-bucket", "llama", "v1", restore_path)
+
+    # The duplicated config is downloaded once and copied
+    assert summary.files == 3
+    assert summary.skipped_files == 1
+
+    _, summary = pull_model_version("test-bucket", "llama", "v2", restore_path)
+
+    assert summary.files == 1
+    assert summary.skipped_files == 3
+    with open(os.path.join(restore_path, "adapter.bin"), "rb") as f:
+        assert f.read() == b"adapter v2"
+    with open(os.path.join(restore_path, "subfolder", "config.json")) as f:
+        assert f.read() == "{}"
+
+
+@mock_aws()
+def test_pull_missing_model_version(setup_restore_folder):
+    s3_client = boto3.client("s3", region_name="us-east-1")
+    s3_client.create_bucket(Bucket="test-bucket")
+
+    with pytest.raises(ModelManifestNotFoundException):
+        pull_model_version("test-bucket", "llama", "v9", setup_restore_folder)
@@ -0,0 +1,184 @@
+import os
+import signal
+import threading
+
+import numpy as np
+import pytest
+
+from sarinfer.core.cpu_manager import DenseModel, SharedWeights, WorkerPool
+from sarinfer.core.quantization import QuantizedTensor, quantize
+from sarinfer.utils.exceptions import InferenceWorkerException
+from sarinfer.utils.file_utils import write_safetensors
+
+
+def _weights(sizes, seed=0):
+    rng = np.random.default_rng(seed)
+    weights = {}
+    for i, (n_in, n_out) in enumerate(zip(sizes, sizes[1:])):
+        weights[f"layers.{i}.weight"] = rng.standard_normal((n_out, n_in)).astype(np.float32)
+        weights[f"layers.{i}.bias"] = rng.standard_normal(n_out).astype(np.float32)
+    return weights
+
+
+# Test that the batched forward pass matches a per-example reference
+def test_dense_forward_matches_reference():
+    weights = _weights([8, 16, 4])
+    model = DenseModel(weights)
+    batch = np.random.default_rng(1).standard_normal((5, 8)).astype(np.float32)
+
+    expected = []
+    for x in batch:
+        h = np.maximum(weights["layers.0.weight"] @ x + weights["layers.0.bias"], 0)
+        expected.append(weights["layers.1.weight"] @ h + weights["layers.1.bias"])
+
+    assert model.input_size == 8
+    assert model.output_size == 4
+    np.testing.assert_allclose(model(batch), np.stack(expected), rtol=1e-5, atol=1e-5)
+
+
+# Test that layers are ordered numerically, not lexically
+def test_dense_layer_order():
+    weights = _weights([2] * 12)
+    model = DenseModel(weights, activation="identity")
+
+    np.testing.assert_array_equal(model.layers[10][0], weights["layers.10.weight"])
+    # Weights already in the compute dtype are used in place, not copied
+    assert np.shares_memory(model.layers[10][0], weights["layers.10.weight"])
+
+
+# Test that weights without dense layers are rejected
+def test_dense_requires_layers():
+    with pytest.raises(ValueError):
+        DenseModel({"embedding": np.zeros((2, 2))})
+
+
+# Test that quantized layers stay quantized and match the fp32 model closely
+@pytest.mark.parametrize("mode", ["dequant", "int"])
+def test_dense_quantized_weights(mode):
+    weights = _weights([64, 128, 16])
+    quantized = {name: quantize(array, 8) if array.ndim == 2 else array for name, array in weights.items()}
+    batch = np.random.default_rng(1).standard_normal((4, 64)).astype(np.float32)
+
+    model = DenseModel(quantized, quantized_matmul=mode)
+    assert isinstance(model.layers[0][0], QuantizedTensor)
+    assert model.input_size == 64 and model.output_size == 16
+    expected = DenseModel(weights)(batch)
+    output = model(batch)
+    assert output.dtype == np.float32
+    assert np.linalg.norm(output - expected) / np.linalg.norm(expected) < 0.03
+
+
+# Test that shared weights round-trip and attach read-only without copying
+def test_shared_weights_attach():
+    weights = _weights([8, 16, 4])
+    shared = SharedWeights.create(weights)
+    try:
+        attached = SharedWeights.attach(*shared.handle)
+        for name, array in weights.items():
+            np.testing.assert_array_equal(attached.arrays[name], array)
+            assert attached.arrays[name].ctypes.data % 64 == 0
+        with pytest.raises(ValueError):
+            attached.arrays["layers.0.bias"][0] = 1
+        attached.close()
+    finally:
+        shared.close()
+
+
+# Test that a worker pool matches the in-process model and spreads requests over its workers
+def test_worker_pool_infer():
+    weights = _weights([8, 16, 4])
+    model = DenseModel(weights)
+    batch = np.random.default_rng(1).standard_normal((40, 8)).astype(np.float32)
+
+    pool = WorkerPool(weights, num_workers=2, max_wait_ms=1).start()
+    try:
+        futures = [pool.submit(x) for x in batch]
+        outputs = np.stack([future.result(timeout=30) for future in futures])
+        stats = pool.stats()
+    finally:
+        pool.stop()
+
+    np.testing.assert_allclose(outputs, model(batch), rtol=1e-5, atol=1e-5)
+    assert stats["requests"] == 40 and stats["failed"] == 0
+    assert all(completed > 0 for completed in stats["completed"])
+    assert stats["shared_bytes"] >= sum(array.nbytes for array in weights.values())
+    with pytest.raises(RuntimeError):
+        pool.submit(batch[0])
+
+
+# Test that workers can memory-map a safetensors file instead of shared memory
+def test_worker_pool_weights_file(tmp_path):
+    weights = _weights([8, 4])
+    write_safetensors(str(tmp_path / "model.safetensors"), weights)
+    x = np.ones(8, dtype=np.float32)
+
+    pool = WorkerPool(weights_file=str(tmp_path / "model.safetensors"), num_workers=1).start()
+    try:
+        np.testing.assert_allclose(pool.infer(x, timeout=30), DenseModel(weights)(x[None])[0], rtol=1e-5)
+    finally:
+        pool.stop()
+
+
+# Test that quantized weights are shared quantized and regrouped in the workers
+def test_worker_pool_quantized():
+    weights = _weights([64, 32])
+    quantized = {"layers.0.weight": quantize(weights["layers.0.weight"], 4, 32), "layers.0.bias": weights["layers.0.bias"]}
+    x = np.ones(64, dtype=np.float32)
+
+    pool = WorkerPool(quantized, num_workers=1).start()
+    try:
+        assert pool.stats()["shared_bytes"] < weights["layers.0.weight"].nbytes / 4
+        np.testing.assert_allclose(pool.infer(x, timeout=30), DenseModel(quantized)(x[None])[0], rtol=1e-5)
+    finally:
+        pool.stop()
+
+
+# Test that a model error fails the request and a dead worker fails its requests in flight
+def test_worker_pool_failures():
+    pool = WorkerPool(_weights([8, 4]), num_workers=2).start()
+    try:
+        with pytest.raises(ValueError):
+            pool.infer(np.ones(3, dtype=np.float32), timeout=30)
+
+        # Paused, so the request is still in flight when the worker dies
+        os.kill(pool.pids[0], signal.SIGSTOP)
+        with pool._lock:
+            pool._in_flight[1] = 10
+        future = pool.submit(np.ones(8, dtype=np.float32))
+        pool.processes[0].kill()
+        with pytest.raises(InferenceWorkerException):
+            future.result(timeout=30)
+        assert pool.stats()["alive_workers"] == 1
+    finally:
+        pool.stop()
+
+
+# Test that a dead worker's requests fail while another worker keeps the reply queue busy
+def test_worker_pool_death_while_busy():
+    pool = WorkerPool(_weights([8, 4]), num_workers=2).start()
+    x = np.ones(8, dtype=np.float32)
+    done = threading.Event()
+
+    def keep_busy():
+        while not done.is_set():
+            pool.infer(x, timeout=30)
+
+    feeder = threading.Thread(target=keep_busy)
+    try:
+        os.kill(pool.pids[0], signal.SIGSTOP)
+        with pool._lock:
+            pool._in_flight[1] = 10
+        future = pool.submit(x)
+        with pool._lock:
+            # Everything from here on goes to worker 1
+            pool._in_flight[0] += 1000
+            pool._in_flight[1] -= 10
+        feeder.start()
+        pool.processes[0].kill()
+        with pytest.raises(InferenceWorkerException):
+            future.result(timeout=10)
+    finally:
+        done.set()
+        if feeder.is_alive():
+            feeder.join()
+        pool.stop()
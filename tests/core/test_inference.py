@@ -0,0 +1,155 @@
+import threading
+from concurrent.futures import wait
+
+import numpy as np
+import pytest
+
+from sarinfer.core.inference import BatchingEngine
+
+
+class RecordingForward:
+    """Doubles its inputs and records the size of every batch it sees."""
+
+    def __init__(self, gate=None):
+        self.batch_sizes = []
+        self.gate = gate
+
+    def __call__(self, batch):
+        if self.gate is not None:
+            self.gate.wait()
+        self.batch_sizes.append(len(batch))
+        return batch * 2
+
+
+# Test that queued requests are batched up to max_batch_size and each future gets its own row
+def test_requests_are_batched():
+    gate = threading.Event()
+    forward = RecordingForward(gate)
+    engine = BatchingEngine(forward, max_batch_size=4, max_wait_ms=1000).start()
+    try:
+        # The first request holds the worker inside forward while the rest queue up
+        first = engine.submit(np.array([0.0]))
+        futures = [engine.submit(np.array([float(i)])) for i in range(1, 9)]
+        gate.set()
+        wait([first] + futures, timeout=5)
+    finally:
+        engine.stop()
+
+    assert [f.result()[0] for f in futures] == [2.0 * i for i in range(1, 9)]
+    assert max(forward.batch_sizes) == 4
+    assert sum(forward.batch_sizes) == 9
+    assert engine.stats()["requests"] == 9
+
+
+# Test that a lone request is flushed once its wait deadline passes
+def test_deadline_flushes_partial_batch():
+    forward = RecordingForward()
+    engine = BatchingEngine(forward, max_batch_size=64, max_wait_ms=10).start()
+    try:
+        assert engine.infer(np.array([1.0, 2.0]), timeout=5).tolist() == [2.0, 4.0]
+    finally:
+        engine.stop()
+
+    assert forward.batch_sizes == [1]
+
+
+# Test that a failing batch fails every request in it and the engine keeps serving
+def test_forward_error_propagates():
+    calls = []
+
+    def forward(batch):
+        calls.append(len(batch))
+        if len(calls) == 1:
+            raise ValueError("bad batch")
+        return batch
+
+    engine = BatchingEngine(forward, max_batch_size=8, max_wait_ms=1).start()
+    try:
+        with pytest.raises(ValueError):
+            engine.infer(np.zeros(1), timeout=5)
+        assert engine.infer(np.ones(1), timeout=5).tolist() == [1.0]
+    finally:
+        engine.stop()
+
+    assert engine.stats()["failed_batches"] == 1
+
+
+# Test that submitting to a stopped engine is rejected
+def test_submit_requires_running_engine():
+    engine = BatchingEngine(RecordingForward())
+    with pytest.raises(RuntimeError):
+        engine.submit(np.zeros(1))
+
+
+def _language_model():
+    from sarinfer.core.cpu_manager import TransformerLM, init_transformer_weights
+
+    return TransformerLM(init_transformer_weights(vocab_size=64, d_model=32, n_layers=2, max_positions=256),
+                         n_heads=4)
+
+
+def _reference_generate(model, prompt, max_new_tokens):
+    cache = model.new_cache()
+    tokens = [int(model.prefill(prompt, cache).argmax())]
+    while len(tokens) < max_new_tokens:
+        tokens.append(int(model.decode([tokens[-1]], [cache])[0].argmax()))
+    return tokens
+
+
+# Test that sequences decoded in a shared batch produce the same tokens as decoding alone
+def test_continuous_batching_matches_sequential():
+    from sarinfer.core.inference import ContinuousBatchingScheduler
+
+    model = _language_model()
+    prompts = [[1, 2, 3], [4, 5], [6, 7, 8, 9, 10], [11]]
+    scheduler = ContinuousBatchingScheduler(model, max_batch_size=3).start()
+    try:
+        requests = [scheduler.submit(prompt, max_new_tokens=8 + i) for i, prompt in enumerate(prompts)]
+        results = [request.result(timeout=10) for request in requests]
+    finally:
+        scheduler.stop()
+
+    assert results == [_reference_generate(model, prompt, 8 + i) for i, prompt in enumerate(prompts)]
+    assert all(request.finish_reason == "length" for request in requests)
+    stats = scheduler.stats()
+    assert stats["completed"] == 4
+    assert stats["generated_tokens"] == sum(8 + i for i in range(4))
+    assert 1 < stats["mean_batch_size"] <= 3
+
+
+# Test that a short request admitted behind a long one finishes first
+def test_short_request_not_held_by_long_one():
+    from sarinfer.core.inference import ContinuousBatchingScheduler
+
+    scheduler = ContinuousBatchingScheduler(_language_model(), max_batch_size=4).start()
+    try:
+        long_request = scheduler.submit([1, 2, 3], max_new_tokens=200)
+        short_request = scheduler.submit([4, 5], max_new_tokens=3)
+        assert len(short_request.result(timeout=10)) == 3
+        assert not long_request.future.done()
+        assert scheduler.stats()["active_batch_size"] == 1
+    finally:
+        scheduler.stop()
+
+
+# Test that stop tokens, callbacks and cancellation end sequences
+def test_stop_token_and_cancel():
+    from sarinfer.core.inference import ContinuousBatchingScheduler
+
+    model = _language_model()
+    expected = _reference_generate(model, [1, 2, 3], 5)
+    streamed = []
+    scheduler = ContinuousBatchingScheduler(model).start()
+    try:
+        stopped = scheduler.submit([1, 2, 3], max_new_tokens=50, stop_token_ids=[expected[2]],
+                                   on_token=streamed.append)
+        assert stopped.result(timeout=10) == expected[:expected.index(expected[2]) + 1]
+        assert stopped.finish_reason == "stop"
+        assert streamed == stopped.tokens
+
+        cancelled = scheduler.submit([1, 2, 3], max_new_tokens=10_000, on_token=lambda token: cancelled.cancel())
+        cancelled.result(timeout=10)
+        assert cancelled.finish_reason == "cancelled"
+        assert len(cancelled.tokens) == 1
+    finally:
+        scheduler.stop()
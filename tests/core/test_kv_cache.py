@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+
+from sarinfer.core.cpu_manager import TransformerLM, init_transformer_weights
+from sarinfer.core.kv_cache import PagedKVCache
+from sarinfer.utils.exceptions import KVCacheExhaustedException
+
+
+def _model():
+    return TransformerLM(init_transformer_weights(vocab_size=64, d_model=32, n_layers=2, max_positions=256),
+                         n_heads=4)
+
+
+def _kv(num_blocks, n_layers=1, block_size=4):
+    return PagedKVCache(n_layers=n_layers, n_heads=1, head_dim=2, num_blocks=num_blocks, block_size=block_size)
+
+
+def _positions(start, count):
+    return np.arange(start, start + count, dtype=np.float32).reshape(count, 1, 1).repeat(2, axis=2)
+
+
+# Test that blocks are handed out as positions grow and returned when the sequence is freed
+def test_blocks_allocated_and_freed():
+    kv = _kv(num_blocks=4)
+    sequence = kv.new_sequence()
+
+    keys, values = sequence.append(0, _positions(0, 6), _positions(0, 6))
+
+    assert sequence.length == 6
+    assert sequence.num_blocks == 2
+    assert kv.free_blocks == 2
+    np.testing.assert_array_equal(keys[:, 0, 0], np.arange(6))
+
+    sequence.free()
+    assert kv.free_blocks == 4
+    assert kv.stats()["used_blocks"] == 0
+
+
+# Test that a forked sequence shares blocks until it writes into the shared partial block
+def test_copy_on_write():
+    kv = _kv(num_blocks=8)
+    parent = kv.new_sequence()
+    parent.append(0, _positions(0, 6), _positions(0, 6))
+
+    child = kv.fork(parent)
+    assert kv.stats()["shared_blocks"] == 2
+    assert kv.free_blocks == 6
+
+    keys, _ = child.append(0, _positions(100, 1), _positions(100, 1))
+
+    # The full first block stays shared, the partial second one was copied before the write
+    assert child.block_table[0] == parent.block_table[0]
+    assert child.block_table[1] != parent.block_table[1]
+    assert kv.stats()["copies"] == 1
+    np.testing.assert_array_equal(keys[:, 0, 0], [0, 1, 2, 3, 4, 5, 100])
+    parent_keys, _ = parent.append(0, _positions(6, 1), _positions(6, 1))
+    np.testing.assert_array_equal(parent_keys[:, 0, 0], [0, 1, 2, 3, 4, 5, 6])
+
+    parent.free()
+    child.free()
+    assert kv.free_blocks == 8
+
+
+# Test that running out of blocks raises without corrupting the sequence
+def test_exhausted():
+    kv = _kv(num_blocks=2)
+    sequence = kv.new_sequence()
+    sequence.append(0, _positions(0, 8), _positions(0, 8))
+
+    assert sequence.blocks_needed(1) == 1
+    with pytest.raises(KVCacheExhaustedException):
+        sequence.append(0, _positions(8, 1), _positions(8, 1))
+    assert sequence.length == 8
+
+
+# Test that the model produces the same logits from paged and contiguous caches
+def test_paged_matches_contiguous():
+    model = _model()
+    kv = PagedKVCache.for_model(model, max_bytes=1024 * 1024, block_size=4)
+    paged, contiguous = kv.new_sequence(), model.new_cache()
+    prompt = [3, 1, 4, 1, 5, 9, 2]
+
+    np.testing.assert_allclose(model.prefill(prompt, paged), model.prefill(prompt, contiguous), atol=1e-5)
+    for token in [6, 5, 3, 5, 8]:
+        np.testing.assert_allclose(model.decode([token], [paged]), model.decode([token], [contiguous]), atol=1e-5)
+    assert paged.length == contiguous.length == 12
+    assert paged.num_blocks == 3
+
+
+# Test that the scheduler preempts sequences when the arena is full and still completes them all
+def test_scheduler_preemption():
+    from sarinfer.core.inference import ContinuousBatchingScheduler
+
+    model = _model()
+    prompts = [[i + 1, i + 2, i + 3] for i in range(6)]
+    expected = []
+    for prompt in prompts:
+        cache = model.new_cache()
+        tokens = [int(model.prefill(prompt, cache).argmax())]
+        while len(tokens) < 20:
+            tokens.append(int(model.decode([tokens[-1]], [cache])[0].argmax()))
+        expected.append(tokens)
+
+    # Room for about two full sequences at a time
+    kv = PagedKVCache(model.n_layers, model.n_heads, model.head_dim, num_blocks=12, block_size=4)
+    scheduler = ContinuousBatchingScheduler(model, max_batch_size=6, kv_cache=kv).start()
+    try:
+        requests = [scheduler.submit(prompt, max_new_tokens=20) for prompt in prompts]
+        results = [request.result(timeout=20) for request in requests]
+    finally:
+        scheduler.stop()
+
+    assert results == expected
+    assert scheduler.stats()["preemptions"] > 0
+    assert kv.free_blocks == 12
@@ -0,0 +1,126 @@
+import numpy as np
+
+from sarinfer.core.cpu_manager import TransformerLM, init_transformer_weights
+from sarinfer.core.kv_cache import PagedKVCache
+from sarinfer.core.prefix_cache import PrefixCache, block_digests
+
+
+def _model():
+    return TransformerLM(init_transformer_weights(vocab_size=64, d_model=32, n_layers=2, max_positions=256),
+                         n_heads=4)
+
+
+def _prefilled(model, cache, tokens):
+    sequence = cache.new_sequence(tokens)
+    logits = model.prefill(tokens[sequence.length:], sequence)
+    cache.insert(tokens, sequence)
+    return sequence, logits
+
+
+# Test that a block's digest covers everything before it
+def test_block_digests_are_chained():
+    first = block_digests([1, 2, 3, 4, 5, 6, 7, 8, 9], 4)
+    changed_head = block_digests([0, 2, 3, 4, 5, 6, 7, 8], 4)
+
+    assert len(first) == 2
+    assert block_digests([1, 2, 3, 4, 5, 6, 7, 8], 4) == first
+    assert changed_head[1] != first[1]
+
+
+# Test that a prompt sharing a cached prefix reuses its blocks and gets the same logits
+def test_prefix_reuse():
+    model = _model()
+    kv = PagedKVCache(model.n_layers, model.n_heads, model.head_dim, num_blocks=32, block_size=4)
+    cache = PrefixCache(kv, max_blocks=16)
+    system_prompt = list(range(1, 11))
+
+    first, _ = _prefilled(model, cache, system_prompt + [20, 21])
+    second, logits = _prefilled(model, cache, system_prompt + [30])
+
+    # Two full blocks of the system prompt were shared, only the tail was prefilled
+    assert second.block_table[:2] == first.block_table[:2]
+    np.testing.assert_allclose(logits, model.prefill(system_prompt + [30], model.new_cache()), atol=1e-5)
+    stats = cache.stats()
+    assert stats["lookups"] == 2
+    assert stats["hits"] == 1
+    assert stats["hit_rate"] == 0.5
+    assert stats["hit_tokens"] == 8
+
+
+# Test that an exact repeat still leaves a token to prefill
+def test_full_match_keeps_last_token():
+    model = _model()
+    kv = PagedKVCache(model.n_layers, model.n_heads, model.head_dim, num_blocks=16, block_size=4)
+    cache = PrefixCache(kv, max_blocks=16)
+    prompt = list(range(8))
+
+    _prefilled(model, cache, prompt)
+    sequence = cache.new_sequence(prompt)
+
+    assert sequence.length == 4
+
+
+# Test that the budget evicts least recently used blocks, deepest first, and releases them
+def test_lru_budget():
+    kv = PagedKVCache(n_layers=1, n_heads=1, head_dim=2, num_blocks=16, block_size=2)
+    cache = PrefixCache(kv, max_blocks=3)
+
+    def add(tokens):
+        sequence = kv.new_sequence()
+        sequence.append(0, np.zeros((len(tokens), 1, 2)), np.zeros((len(tokens), 1, 2)))
+        cache.insert(tokens, sequence)
+        sequence.free()
+
+    add([1, 2, 3, 4])
+    add([9, 9])
+    assert len(cache) == 3
+    add([5, 6])
+
+    # The [1, 2, 3, 4] chain lost its tail block, its head is still reusable
+    assert cache.stats()["evictions"] == 1
+    assert len(cache.match([1, 2, 3, 4, 0])) == 1
+    assert kv.free_blocks == 16 - 3
+
+
+# Test that on-demand eviction skips blocks running sequences still use
+def test_evict_skips_shared_blocks():
+    kv = PagedKVCache(n_layers=1, n_heads=1, head_dim=2, num_blocks=8, block_size=2)
+    cache = PrefixCache(kv, max_blocks=8)
+    running = kv.new_sequence()
+    running.append(0, np.zeros((2, 1, 2)), np.zeros((2, 1, 2)))
+    cache.insert([1, 2], running)
+    finished = kv.new_sequence()
+    finished.append(0, np.zeros((2, 1, 2)), np.zeros((2, 1, 2)))
+    cache.insert([3, 4], finished)
+    finished.free()
+
+    assert cache.evict(2) == 1
+    assert len(cache.match([1, 2, 0])) == 1
+
+
+# Test that the scheduler serves shared-prefix prompts from the cache with unchanged output
+def test_scheduler_with_prefix_cache():
+    from sarinfer.core.inference import ContinuousBatchingScheduler
+
+    model = _model()
+    system_prompt = list(range(1, 17))
+    prompts = [system_prompt + [40 + i] for i in range(4)]
+    expected = []
+    for prompt in prompts:
+        cache = model.new_cache()
+        tokens = [int(model.prefill(prompt, cache).argmax())]
+        while len(tokens) < 6:
+            tokens.append(int(model.decode([tokens[-1]], [cache])[0].argmax()))
+        expected.append(tokens)
+
+    kv = PagedKVCache(model.n_layers, model.n_heads, model.head_dim, num_blocks=64, block_size=4)
+    prefix_cache = PrefixCache(kv, max_blocks=32)
+    scheduler = ContinuousBatchingScheduler(model, prefix_cache=prefix_cache).start()
+    try:
+        results = [scheduler.generate(prompt, max_new_tokens=6, timeout=10) for prompt in prompts]
+    finally:
+        scheduler.stop()
+
+    assert results == expected
+    assert scheduler.stats()["prefix_cache"]["hits"] == 3
+    assert kv.free_blocks == 64 - len(prefix_cache)
@@ -0,0 +1,113 @@
+import numpy as np
+import pytest
+
+from sarinfer.core.quantization import QuantizedTensor, group_quantized, pack_int4, quantize, quantized_arrays, \
+    unpack_int4
+
+
+def _weight(rows=48, cols=256, seed=0):
+    return np.random.default_rng(seed).standard_normal((rows, cols)).astype(np.float32)
+
+
+# Test that int4 packing round-trips every value
+def test_pack_int4_round_trip():
+    values = np.arange(-8, 8, dtype=np.int8).reshape(2, 8)
+    packed = pack_int4(values)
+    assert packed.dtype == np.uint8 and packed.shape == (2, 4)
+    np.testing.assert_array_equal(unpack_int4(packed), values)
+
+
+# Test that quantization error stays within half a step and the stored size shrinks
+@pytest.mark.parametrize("bits,group_size,ratio", [(8, None, 4), (8, 64, 4), (4, 64, 8)])
+def test_quantize_error_and_size(bits, group_size, ratio):
+    weight = _weight()
+    quantized = quantize(weight, bits, group_size)
+
+    assert quantized.shape == weight.shape and quantized.bits == bits
+    assert quantized.group_size == (group_size or weight.shape[1])
+    step = np.repeat(quantized.scales, quantized.group_size, axis=1)
+    assert np.all(np.abs(quantized.dequantize() - weight) <= step / 2 + 1e-6)
+    np.testing.assert_allclose(quantized[8:16], quantized.dequantize()[8:16])
+    # Scales are the only overhead on top of the ideal ratio
+    assert quantized.nbytes - quantized.scales.nbytes == weight.nbytes // ratio
+
+
+# Test that both kernels match the fp32 product within quantization error
+@pytest.mark.parametrize("bits,group_size", [(8, None), (8, 64), (4, 64)])
+@pytest.mark.parametrize("mode", ["dequant", "int"])
+def test_linear_matches_fp32(bits, group_size, mode, monkeypatch):
+    # Several tiles, so tiling is exercised
+    monkeypatch.setattr("sarinfer.core.quantization.QUANTIZED_TILE_BYTES", 16 * 256 * 4)
+    weight = _weight()
+    x = np.random.default_rng(1).standard_normal((5, 256)).astype(np.float32)
+    quantized = quantize(weight, bits, group_size)
+
+    expected = x @ weight.T
+    output = quantized.linear(x, mode)
+    error = np.linalg.norm(output - expected) / np.linalg.norm(expected)
+    assert error < (0.02 if bits == 8 else 0.15)
+    if mode == "dequant":
+        np.testing.assert_allclose(output, x @ quantized.dequantize().T, rtol=1e-4, atol=1e-4)
+
+
+# Test that stored qweight/scales pairs are grouped back into QuantizedTensors
+def test_group_quantized():
+    quantized = quantize(_weight(), 4)
+    tensors = {"layers.0.bias": np.zeros(48), **quantized_arrays("layers.0.weight", quantized)}
+
+    grouped = group_quantized(tensors)
+    assert sorted(grouped) == ["layers.0.bias", "layers.0.weight"]
+    assert isinstance(grouped["layers.0.weight"], QuantizedTensor) and grouped["layers.0.weight"].bits == 4
+    np.testing.assert_array_equal(np.asarray(grouped["layers.0.weight"]), quantized.dequantize())
+
+
+# Test that shapes the group size does not divide are rejected
+def test_quantize_rejects_bad_groups():
+    with pytest.raises(ValueError):
+        quantize(_weight(cols=100), 8, 64)
+    with pytest.raises(ValueError):
+        quantize(_weight(cols=7), 4, 7)
+    with pytest.raises(ValueError):
+        quantize(np.zeros(8), 8)
+
+
+# Test that lazily opened weights are read once, stay resident across calls and can be released
+def test_lazy_weights_read_once():
+    from sarinfer.models.model_loader import LazyTensor
+
+    quantized = quantize(_weight(), 4, group_size=64)
+    reads = []
+
+    class Source:
+        """Stands in for a TensorStore array: every read goes back to storage."""
+
+        def __init__(self, array):
+            self.array = array
+
+        def read(self):
+            reads.append(self.array.dtype)
+            return self
+
+        def result(self):
+            return self.array
+
+        def __getitem__(self, index):
+            return Source(self.array[index])
+
+    def opener(array):
+        return lambda: Source(array)
+
+    qweight = LazyTensor("w.qweight", opener(quantized.qweight), quantized.qweight.shape, quantized.qweight.dtype)
+    scales = LazyTensor("w.scales", opener(quantized.scales), quantized.scales.shape, quantized.scales.dtype)
+    lazy = QuantizedTensor(qweight, scales, name="w")
+    assert not lazy.loaded
+
+    x = np.random.default_rng(1).standard_normal((2, 256)).astype(np.float32)
+    for _ in range(3):
+        np.testing.assert_array_equal(lazy.linear(x), quantized.linear(x))
+    assert len(reads) == 2 and lazy.loaded and qweight.loaded
+
+    lazy.release()
+    assert not lazy.loaded and not qweight.loaded
+    lazy.linear(x)
+    assert len(reads) == 4
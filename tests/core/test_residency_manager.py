@@ -0,0 +1,168 @@
+import threading
+import time
+from unittest.mock import patch
+
+import mongomock
+import numpy as np
+import pytest
+
+from sarinfer.core.residency_manager import ResidencyManager
+from sarinfer.metadata.metadata_manager import ModelMetadataManager
+from sarinfer.metadata.model_metadata import ModelMetadata
+from sarinfer.utils.exceptions import ModelResidencyException
+
+SIZES = {"a": 400, "b": 400, "c": 400, "big": 2000}
+
+
+class CountingLoader:
+    def __init__(self, delay=0.0):
+        self.calls = []
+        self.delay = delay
+        self.lock = threading.Lock()
+
+    def __call__(self, model_id, version):
+        with self.lock:
+            self.calls.append(model_id)
+        time.sleep(self.delay)
+        if model_id == "broken":
+            raise OSError("corrupt weights")
+        return {"weight": np.zeros(SIZES[model_id], dtype=np.uint8)}
+
+
+def _metadata_manager(mock_mongo_db_config):
+    collection = mongomock.MongoClient().db.model_metadata
+    mock_mongo_db_config.return_value.get_collection.return_value = collection
+    manager = ModelMetadataManager(cache_ttl=0)
+    for model_id in list(SIZES) + ["broken"]:
+        manager.add_model(ModelMetadata(model_name=model_id, size=1, location="/p", model_id=model_id, version="v1"))
+    return manager
+
+
+# Test that models are unloaded least recently used first, never while in use, and that
+# transitions are recorded in the metadata
+@patch('sarinfer.metadata.metadata_manager.MongoDBConfig')
+def test_lru_eviction_and_metadata(mock_mongo_db_config):
+    metadata = _metadata_manager(mock_mongo_db_config)
+    residency = ResidencyManager(max_bytes=1000, loader=CountingLoader(), metadata_manager=metadata,
+                                 prefetch_workers=0)
+
+    residency.get("a")
+    with residency.use("b") as model:
+        assert model["weight"].nbytes == 400
+        residency.get("a")  # a is now the most recently used, but b is pinned
+        with pytest.raises(ModelResidencyException):
+            residency.get("big")
+        residency.get("c")  # only a can make room
+        assert ("b", None) in residency and ("c", None) in residency and ("a", None) not in residency
+
+    assert metadata.get_model_metadata("a").load_status == "unloaded"
+    assert metadata.get_model_metadata("b").load_status == "loaded"
+    assert metadata.get_model_metadata("b").last_loaded is not None
+    assert metadata.get_model_metadata("big").load_status == "unloaded"
+
+    residency.get("c")
+    residency.get("a")  # b is least recently used and no longer pinned
+    assert ("b", None) not in residency
+    stats = residency.stats()
+    assert stats["resident_bytes"] == 800 and stats["evictions"] == 2
+    assert stats["hits"] == 2 and stats["misses"] == 5
+
+    residency.close()
+    assert metadata.get_model_metadata("c").load_status == "unloaded"
+    assert residency.stats()["resident_models"] == 0
+
+
+# Test that concurrent requests for a model load it once, and failed loads are recorded
+@patch('sarinfer.metadata.metadata_manager.MongoDBConfig')
+def test_concurrent_load_and_failure(mock_mongo_db_config):
+    metadata = _metadata_manager(mock_mongo_db_config)
+    loader = CountingLoader(delay=0.05)
+    residency = ResidencyManager(max_bytes=1000, loader=loader, metadata_manager=metadata, prefetch_workers=0)
+
+    models = []
+    threads = [threading.Thread(target=lambda: models.append(residency.get("a"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert loader.calls == ["a"]
+    assert all(model is models[0] for model in models)
+
+    with pytest.raises(OSError):
+        residency.get("broken")
+    assert metadata.get_model_metadata("broken").load_status == "failed"
+    assert residency.stats()["failed_loads"] == 1
+
+
+# Test that a model that keeps following another is prefetched, without unloading anything
+def test_prefetch_predicted_successor():
+    loader = CountingLoader()
+    residency = ResidencyManager(max_bytes=1000, loader=loader, prefetch_workers=1, prefetch_min_count=2)
+
+    for _ in range(2):
+        residency.get("a")
+        residency.get("b")
+        residency.unload("b")
+    residency.get("a")
+    deadline = time.monotonic() + 5
+    while ("b", None) not in residency and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert ("b", None) in residency
+
+    residency.get("b")
+    assert residency.stats()["prefetch_hits"] == 1
+    assert loader.calls.count("b") == 3
+    residency.close()
+
+
+# Test that a prefetch that does not fit leaves resident models alone
+def test_prefetch_does_not_evict():
+    residency = ResidencyManager(max_bytes=1000, loader=CountingLoader(), prefetch_workers=1)
+    residency.get("a")
+    residency.get("b")
+
+    future = residency.prefetch("c")
+    with pytest.raises(ModelResidencyException):
+        future.result(timeout=5)
+    assert ("a", None) in residency and ("b", None) in residency
+
+    residency.get("c")  # a foreground load does unload
+    assert ("a", None) not in residency
+    residency.close()
+
+
+# Test that room is made before an eager loader runs, so the budget holds during the load
+@patch('sarinfer.metadata.metadata_manager.MongoDBConfig')
+def test_room_made_before_load(mock_mongo_db_config):
+    metadata = _metadata_manager(mock_mongo_db_config)
+    metadata.update_model_metadata("c", {"storage_layout": {"weight": {"shape": [400], "dtype": "uint8"}}})
+    peaks = []
+
+    def loader(model_id, version):
+        stats = residency.stats()
+        peaks.append((stats["resident_bytes"], stats["reserved_bytes"]))
+        if model_id == "c" and len(peaks) > 3:
+            raise OSError("corrupt weights")
+        return CountingLoader()(model_id, version)
+
+    residency = ResidencyManager(max_bytes=1000, loader=loader, metadata_manager=metadata, prefetch_workers=0)
+    residency.get("a")
+    residency.get("b")
+    residency.get("c")  # a is unloaded before c is read, not after
+    assert peaks == [(0, 0), (400, 0), (400, 400)]
+    assert ("a", None) not in residency and residency.stats()["reserved_bytes"] == 0
+
+    # A failed load gives its reservation back
+    residency.unload("c")
+    with pytest.raises(OSError):
+        residency.get("c")
+    assert residency.stats()["reserved_bytes"] == 0 and residency.stats()["resident_bytes"] == 400
+    assert metadata.get_model_metadata("c").load_status == "failed"
+
+    # Models whose expected size cannot fit are refused without being loaded
+    refused = ResidencyManager(max_bytes=1000, loader=loader, expected_size=lambda *_: 2000, prefetch_workers=0)
+    calls = len(peaks)
+    with pytest.raises(ModelResidencyException):
+        refused.get("big")
+    assert len(peaks) == calls
+    residency.close()
@@ -1,9 +1,11 @@
 import boto3
 import pytest
 import os
+from unittest.mock import patch
 
 from moto import mock_aws
 
+from sarinfer.core import s3_manager
 from sarinfer.core.s3_manager import (upload_model_folder_to_s3,
                                       restore_model_folder_from_s3)
 import tempfile
@@ -11,6 +13,8 @@ import shutil
 
 from sarinfer.utils.exceptions import S3BucketNotFoundException
 
+pytestmark = pytest.mark.usefixtures("s3_test_client")
+
 
 @pytest.fixture
 def setup_local_folder():
@@ -159,3 +163,163 @@ def test_upload_folder_to_non_existent_bucket():
     with pytest.raises(S3BucketNotFoundException):
         upload_model_folder_to_s3("/path/to/folder", bucket_name="non-existent-bucket",
                                   s3_prefix="models/folder")
+
+
+@mock_aws()
+def test_upload_folder_to_s3_summary(setup_local_folder):
+    """
+    Test that a concurrent, multipart upload reports every file and byte it transferred.
+    """
+    s3_client = boto3.client("s3", region_name="us-east-1")
+    s3_client.create_bucket(Bucket="test-bucket")
+
+    # One file large enough to be split into multipart chunks
+    folder_path = setup_local_folder
+    with open(os.path.join(folder_path, "shard.bin"), "wb") as f:
+        f.write(os.urandom(11 * 1024 * 1024))
+
+    summary = upload_model_folder_to_s3(folder_path, bucket_name="test-bucket", s3_prefix="models/llama_70b",
+                                        max_workers=3, multipart_chunksize=5 * 1024 * 1024, max_concurrency=2)
+
+    assert summary.files == 3
+    assert summary.bytes == 11 * 1024 * 1024 + 2 * len("File 1 content")
+    assert summary.failed == []
+    assert summary.bytes_per_second > 0
+
+    result = s3_client.head_object(Bucket="test-bucket", Key="models/llama_70b/shard.bin")
+    assert result["ContentLength"] == 11 * 1024 * 1024
+    assert result["ETag"].endswith('-3"')  # Uploaded as three parts
+
+
+@mock_aws()
+def test_restore_folder_from_s3_paginated(setup_local_folder_empty):
+    """
+    Test that restores list past the first 1000 keys and ignore sibling prefixes.
+    """
+    s3_client = boto3.client("s3", region_name="us-east-1")
+    s3_client.create_bucket(Bucket="test-bucket")
+
+    for i in range(1005):
+        s3_client.put_object(Bucket="test-bucket", Key=f"models/llama_70b/shard-{i:05d}.bin", Body=b"x")
+    s3_client.put_object(Bucket="test-bucket", Key="models/llama_70b_v2/other.bin", Body=b"y")
+
+    local_folder_path = setup_local_folder_empty
+    summary = restore_model_folder_from_s3(bucket_name="test-bucket", s3_prefix="models/llama_70b",
+                                           local_folder_path=local_folder_path, max_workers=4)
+
+    assert summary.files == 1005
+    assert summary.bytes == 1005
+    assert summary.failed == []
+    assert count_visible_files(local_folder_path) == 1005
+    assert os.path.exists(os.path.join(local_folder_path, "shard-01004.bin"))
+
+
+@mock_aws()
+def test_sync_folder_to_s3(setup_local_folder):
+    """
+    Test that a sync upload only transfers changed files and can delete stale objects.
+    """
+    s3_client = boto3.client("s3", region_name="us-east-1")
+    s3_client.create_bucket(Bucket="test-bucket")
+    s3_client.put_object(Bucket="test-bucket", Key="models/llama_70b/stale.txt", Body="old")
+
+    folder_path = setup_local_folder
+    summary = upload_model_folder_to_s3(folder_path, bucket_name="test-bucket", s3_prefix="models/llama_70b",
+                                        sync=True)
+    assert summary.files == 2
+
+    # Nothing changed
+    summary = upload_model_folder_to_s3(folder_path, bucket_name="test-bucket", s3_prefix="models/llama_70b",
+                                        sync=True, checksum=True)
+    assert summary.files == 0
+    assert summary.skipped_files == 2
+
+    with open(os.path.join(folder_path, "file1.txt"), "w") as f:
+        f.write("File 1 content, longer")
+    summary = upload_model_folder_to_s3(folder_path, bucket_name="test-bucket", s3_prefix="models/llama_70b",
+                                        sync=True, delete=True)
+    assert summary.files == 1
+    assert summary.skipped_files == 1
+    assert summary.deleted_files == 1
+
+    result = s3_client.list_objects_v2(Bucket="test-bucket", Prefix="models/llama_70b")
+    assert sorted(obj['Key'] for obj in result['Contents']) == ["models/llama_70b/file1.txt",
+                                                               "models/llama_70b/subfolder/file2.txt"]
+
+
+@mock_aws()
+def test_sync_delete_needs_a_source(setup_local_folder):
+    """
+    Test that a sync upload from a missing or empty folder does not delete the objects under the prefix.
+    """
+    s3_client = boto3.client("s3", region_name="us-east-1")
+    s3_client.create_bucket(Bucket="test-bucket")
+    for name in ("a.txt", "b.txt", "c.txt"):
+        s3_client.put_object(Bucket="test-bucket", Key=f"models/llama_70b/{name}", Body="model")
+
+    with pytest.raises(NotADirectoryError):
+        upload_model_folder_to_s3(os.path.join(setup_local_folder, "mistyped"), bucket_name="test-bucket",
+                                  s3_prefix="models/llama_70b", sync=True, delete=True)
+    empty = os.path.join(setup_local_folder, "empty")
+    os.makedirs(empty)
+    summary = upload_model_folder_to_s3(empty, bucket_name="test-bucket", s3_prefix="models/llama_70b",
+                                        sync=True, delete=True)
+    assert summary.deleted_files == 0
+
+    result = s3_client.list_objects_v2(Bucket="test-bucket", Prefix="models/llama_70b")
+    assert result["KeyCount"] == 3
+
+
+@mock_aws()
+def test_sync_delete_needs_a_listing(setup_local_folder):
+    """
+    Test that a sync restore from an empty prefix, or with failed downloads, does not delete local files.
+    """
+    s3_client = boto3.client("s3", region_name="us-east-1")
+    s3_client.create_bucket(Bucket="test-bucket")
+
+    summary = restore_model_folder_from_s3(bucket_name="test-bucket", s3_prefix="models/mistyped",
+                                           local_folder_path=setup_local_folder, sync=True, delete=True)
+    assert summary.deleted_files == 0
+    assert sorted(os.listdir(setup_local_folder)) == ["file1.txt", "subfolder"]
+
+    s3_client.put_object(Bucket="test-bucket", Key="models/llama_70b/new.txt", Body="new")
+    with patch.object(s3_manager.s3_client, "download_file", side_effect=OSError("disk full")):
+        summary = restore_model_folder_from_s3(bucket_name="test-bucket", s3_prefix="models/llama_70b",
+                                               local_folder_path=setup_local_folder, sync=True, delete=True)
+    assert summary.failed == ["models/llama_70b/new.txt"] and summary.deleted_files == 0
+    assert os.path.exists(os.path.join(setup_local_folder, "file1.txt"))
+
+
+@mock_aws()
+def test_sync_folder_from_s3(setup_local_folder_empty):
+    """
+    Test that a sync restore only downloads files missing or changed locally and can delete stale files.
+    """
+    s3_client = boto3.client("s3", region_name="us-east-1")
+    s3_client.create_bucket(Bucket="test-bucket")
+    s3_client.put_object(Bucket="test-bucket", Key="models/llama_70b/file1.txt", Body="File 1 content")
+    s3_client.put_object(Bucket="test-bucket", Key="models/llama_70b/subfolder/file2.txt", Body="File 2 content")
+
+    local_folder_path = setup_local_folder_empty
+    summary = restore_model_folder_from_s3(bucket_name="test-bucket", s3_prefix="models/llama_70b",
+                                           local_folder_path=local_folder_path, sync=True)
+    assert summary.files == 2
+
+    summary = restore_model_folder_from_s3(bucket_name="test-bucket", s3_prefix="models/llama_70b",
+                                           local_folder_path=local_folder_path, sync=True)
+    assert summary.files == 0
+    assert summary.skipped_files == 2
+
+    # A local edit and a file that does not exist on S3
+    with open(os.path.join(local_folder_path, "file1.txt"), "w") as f:
+        f.write("Local edit")
+    with open(os.path.join(local_folder_path, "stale.txt"), "w") as f:
+        f.write("stale")
+    summary = restore_model_folder_from_s3(bucket_name="test-bucket", s3_prefix="models/llama_70b",
+                                           local_folder_path=local_folder_path, sync=True, delete=True)
+    assert summary.files == 1
+    assert summary.deleted_files == 1
+    assert not os.path.exists(os.path.join(local_folder_path, "stale.txt"))
+    with open(os.path.join(local_folder_path, "file1.txt"), "r") as f:
+        assert f.read() == "File 1 content"
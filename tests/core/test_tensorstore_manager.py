@@ -0,0 +1,44 @@
+import json
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from sarinfer.core.tensorstore_manager import (compressor_spec, create_context, find_remote_zarr_arrays,
+                                               s3_kvstore_spec, zarr_spec)
+
+pytestmark = pytest.mark.usefixtures("s3_test_client")
+
+
+def test_s3_zarr_spec():
+    kvstore = s3_kvstore_spec("test-bucket", "models/llama/v1/wq", endpoint="http://minio:9000", region="eu-west-1")
+
+    assert zarr_spec(None, kvstore) == {
+        "driver": "zarr",
+        "kvstore": {"driver": "s3", "bucket": "test-bucket", "path": "models/llama/v1/wq/",
+                    "endpoint": "http://minio:9000", "aws_region": "eu-west-1"},
+    }
+    # The chunk cache and request limits are accepted by TensorStore
+    create_context(cache_bytes=1024, s3_concurrency=4)
+
+
+def test_compressor_spec():
+    assert compressor_spec("zstd", 5) == {"id": "zstd", "level": 5}
+    assert compressor_spec("blosc")["cname"] == "zstd"
+    assert compressor_spec("none") is None
+
+
+@mock_aws()
+def test_find_remote_zarr_arrays():
+    s3_client = boto3.client("s3", region_name="us-east-1")
+    s3_client.create_bucket(Bucket="test-bucket")
+    zarray = {"shape": [4, 4], "chunks": [2, 4], "dtype": "<f4", "zarr_format": 2}
+    s3_client.put_object(Bucket="test-bucket", Key="models/llama/v1/layers/0/wq/.zarray", Body=json.dumps(zarray))
+    s3_client.put_object(Bucket="test-bucket", Key="models/llama/v1/layers/0/wq/0.0", Body=b"\0" * 32)
+
+    assert find_remote_zarr_arrays("test-bucket", "models/llama/v1") == {"layers/0/wq": zarray}
+
+    # The layout written by conversion is used when present
+    layout = {"wq": {"shape": [4, 4], "dtype": "<f4", "chunks": [2, 4], "codec": None}}
+    s3_client.put_object(Bucket="test-bucket", Key="models/llama/v1/layout.json", Body=json.dumps(layout))
+    assert find_remote_zarr_arrays("test-bucket", "models/llama/v1") == layout
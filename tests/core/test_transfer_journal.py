@@ -0,0 +1,192 @@
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from sarinfer.core import s3_manager
+from sarinfer.core.s3_manager import restore_model_folder_from_s3, upload_model_folder_to_s3
+from sarinfer.core.transfer_journal import TransferJournal
+
+pytestmark = pytest.mark.usefixtures("s3_test_client")
+
+CHUNK = 5 * 1024 * 1024
+
+
+@pytest.fixture
+def setup_local_folder():
+    """
+    Setup a temporary folder holding one three-part shard and one small file.
+    """
+    temp_dir = tempfile.mkdtemp()
+    with open(os.path.join(temp_dir, "shard.bin"), "wb") as f:
+        f.write(os.urandom(2 * CHUNK + 1024))
+    with open(os.path.join(temp_dir, "config.json"), "w") as f:
+        f.write("{}")
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+
+@pytest.fixture
+def journal_path():
+    temp_dir = tempfile.mkdtemp()
+    yield os.path.join(temp_dir, "transfer.journal")
+    shutil.rmtree(temp_dir)
+
+
+def fail_once(real, failing_call: int):
+    """Wraps a client method so that its n-th call raises."""
+    calls = []
+
+    def wrapper(*args, **kwargs):
+        calls.append(kwargs)
+        if len(calls) == failing_call:
+            raise ConnectionError("connection reset")
+        return real(*args, **kwargs)
+    return wrapper, calls
+
+
+def test_journal_replay_ignores_truncated_line(journal_path):
+    journal = TransferJournal(journal_path)
+    journal.begin("upload", "bucket", "prefix")
+    journal.plan("prefix/a", 10)
+    journal.plan("prefix/b", 20)
+    journal.complete_file("prefix/a", "10:1")
+    journal.close()
+    with open(journal_path, "a") as f:
+        f.write('{"event": "file", "key": "prefix/b", "ver')
+
+    journal = TransferJournal(journal_path)
+    assert journal.is_complete("prefix/a", "10:1")
+    assert not journal.is_complete("prefix/b", "20:1")
+    assert journal.progress() == {"files_done": 1, "files_total": 2, "bytes_done": 10, "bytes_total": 30,
+                                  "bytes_remaining": 20}
+    with pytest.raises(ValueError):
+        journal.begin("restore", "bucket", "prefix")
+    journal.close()
+
+
+@mock_aws()
+def test_upload_resumes_from_journal(setup_local_folder, journal_path):
+    s3_client = boto3.client("s3", region_name="us-east-1")
+    s3_client.create_bucket(Bucket="test-bucket")
+    folder_path = setup_local_folder
+
+    # The second part of the shard fails
+    failing, _ = fail_once(s3_manager.s3_client.upload_part, 2)
+    with patch.object(s3_manager.s3_client, "upload_part", failing):
+        summary = upload_model_folder_to_s3(folder_path, "test-bucket", "models/llama", max_workers=1,
+                                            multipart_chunksize=CHUNK, max_concurrency=1,
+                                            journal_path=journal_path)
+    assert summary.failed == ["models/llama/shard.bin"]
+    # Parts 1 and 3 made it
+    assert summary.progress["bytes_remaining"] == CHUNK
+    assert os.path.exists(journal_path)
+
+    counting, calls = fail_once(s3_manager.s3_client.upload_part, 0)
+    with patch.object(s3_manager.s3_client, "upload_part", counting):
+        summary = upload_model_folder_to_s3(folder_path, "test-bucket", "models/llama", max_workers=1,
+                                            multipart_chunksize=CHUNK, max_concurrency=1,
+                                            journal_path=journal_path)
+    assert summary.failed == []
+    assert summary.skipped_files == 1
+    assert [call["PartNumber"] for call in calls] == [2]
+    assert not os.path.exists(journal_path)
+
+    result = s3_client.get_object(Bucket="test-bucket", Key="models/llama/shard.bin")
+    with open(os.path.join(folder_path, "shard.bin"), "rb") as f:
+        assert result["Body"].read() == f.read()
+
+
+@mock_aws()
+def test_restore_resumes_from_journal(setup_local_folder, journal_path):
+    s3_client = boto3.client("s3", region_name="us-east-1")
+    s3_client.create_bucket(Bucket="test-bucket")
+    with open(os.path.join(setup_local_folder, "shard.bin"), "rb") as f:
+        content = f.read()
+    s3_client.put_object(Bucket="test-bucket", Key="models/llama/shard.bin", Body=content)
+
+    restore_path = tempfile.mkdtemp()
+    try:
+        failing, _ = fail_once(s3_manager.s3_client.get_object, 3)
+        with patch.object(s3_manager.s3_client, "get_object", failing):
+            summary = restore_model_folder_from_s3("test-bucket", "models/llama", restore_path, max_workers=1,
+                                                   multipart_chunksize=CHUNK, max_concurrency=1,
+                                                   journal_path=journal_path)
+        assert summary.failed == ["models/llama/shard.bin"]
+        assert not os.path.exists(os.path.join(restore_path, "shard.bin"))
+        assert summary.progress["bytes_remaining"] == 1024
+
+        counting, calls = fail_once(s3_manager.s3_client.get_object, 0)
+        with patch.object(s3_manager.s3_client, "get_object", counting):
+            summary = restore_model_folder_from_s3("test-bucket", "models/llama", restore_path, max_workers=1,
+                                                   multipart_chunksize=CHUNK, max_concurrency=1,
+                                                   journal_path=journal_path)
+        assert summary.failed == []
+        assert [call["Range"] for call in calls] == [f"bytes={2 * CHUNK}-{2 * CHUNK + 1023}"]
+        with open(os.path.join(restore_path, "shard.bin"), "rb") as f:
+            assert f.read() == content
+    finally:
+        shutil.rmtree(restore_path)
+
+
+# Test that resuming an upload with another part size aborts the journaled upload and starts over
+@mock_aws()
+def test_upload_resume_with_new_chunksize(setup_local_folder, journal_path):
+    s3_client = boto3.client("s3", region_name="us-east-1")
+    s3_client.create_bucket(Bucket="test-bucket")
+    folder_path = setup_local_folder
+
+    failing, _ = fail_once(s3_manager.s3_client.upload_part, 2)
+    with patch.object(s3_manager.s3_client, "upload_part", failing):
+        upload_model_folder_to_s3(folder_path, "test-bucket", "models/llama", max_workers=1,
+                                  multipart_chunksize=CHUNK, max_concurrency=1, journal_path=journal_path)
+    [superseded] = s3_client.list_multipart_uploads(Bucket="test-bucket")["Uploads"]
+
+    counting, calls = fail_once(s3_manager.s3_client.upload_part, 0)
+    with patch.object(s3_manager.s3_client, "upload_part", counting):
+        summary = upload_model_folder_to_s3(folder_path, "test-bucket", "models/llama", max_workers=1,
+                                            multipart_chunksize=CHUNK + 1024 * 1024, max_concurrency=1,
+                                            journal_path=journal_path)
+    assert summary.failed == []
+    assert [call["PartNumber"] for call in calls] == [1, 2]
+    assert superseded["UploadId"] not in {upload["UploadId"] for upload in
+                                          s3_client.list_multipart_uploads(Bucket="test-bucket").get("Uploads", [])}
+
+    result = s3_client.get_object(Bucket="test-bucket", Key="models/llama/shard.bin")
+    with open(os.path.join(folder_path, "shard.bin"), "rb") as f:
+        assert result["Body"].read() == f.read()
+
+
+# Test that resuming a restore with another part size fetches every range again
+@mock_aws()
+def test_restore_resume_with_new_chunksize(setup_local_folder, journal_path):
+    s3_client = boto3.client("s3", region_name="us-east-1")
+    s3_client.create_bucket(Bucket="test-bucket")
+    with open(os.path.join(setup_local_folder, "shard.bin"), "rb") as f:
+        content = f.read()
+    s3_client.put_object(Bucket="test-bucket", Key="models/llama/shard.bin", Body=content)
+
+    restore_path = tempfile.mkdtemp()
+    try:
+        failing, _ = fail_once(s3_manager.s3_client.get_object, 3)
+        with patch.object(s3_manager.s3_client, "get_object", failing):
+            restore_model_folder_from_s3("test-bucket", "models/llama", restore_path, max_workers=1,
+                                         multipart_chunksize=CHUNK, max_concurrency=1, journal_path=journal_path)
+
+        chunksize = CHUNK + 1024 * 1024
+        counting, calls = fail_once(s3_manager.s3_client.get_object, 0)
+        with patch.object(s3_manager.s3_client, "get_object", counting):
+            summary = restore_model_folder_from_s3("test-bucket", "models/llama", restore_path, max_workers=1,
+                                                   multipart_chunksize=chunksize, max_concurrency=1,
+                                                   journal_path=journal_path)
+        assert summary.failed == []
+        assert [call["Range"] for call in calls] == [f"bytes=0-{chunksize - 1}",
+                                                     f"bytes={chunksize}-{2 * CHUNK + 1023}"]
+        with open(os.path.join(restore_path, "shard.bin"), "rb") as f:
+            assert f.read() == content
+    finally:
+        shutil.rmtree(restore_path)
@@ -0,0 +1,60 @@
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pytest
+
+from sarinfer.core.s3_manager import s3_client, upload_model_folder_to_s3
+from sarinfer.models.checkpoint_converter import convert_checkpoint
+from sarinfer.models.model_loader import open_remote_model
+from sarinfer.utils.file_utils import write_safetensors
+
+
+@pytest.fixture
+def setup_real_s3_bucket():
+    """
+    Create a real S3 bucket for integration testing.
+    """
+    bucket_name = "integration-stream-bucket"
+    s3_client.create_bucket(Bucket=bucket_name)
+    yield bucket_name
+    response = s3_client.list_objects_v2(Bucket=bucket_name)
+    if 'Contents' in response:
+        s3_client.delete_objects(Bucket=bucket_name,
+                                 Delete={'Objects': [{'Key': obj['Key']} for obj in response['Contents']]})
+    s3_client.delete_bucket(Bucket=bucket_name)
+
+
+@pytest.fixture
+def setup_converted_model():
+    """
+    Convert a small checkpoint into zarr arrays with 8x8 chunks.
+    """
+    src, dst = tempfile.mkdtemp(), tempfile.mkdtemp()
+    tensors = {"wq": np.arange(64 * 32, dtype=np.float32).reshape(64, 32),
+               "bias": np.arange(32, dtype=np.float32)}
+    write_safetensors(os.path.join(src, "model.safetensors"), tensors)
+    convert_checkpoint(src, dst, chunk_shape=(8, 8), codec="zstd")
+    yield dst, tensors
+    shutil.rmtree(src)
+    shutil.rmtree(dst)
+
+
+@pytest.mark.integration
+def test_integration_stream_model_from_s3(setup_real_s3_bucket, setup_converted_model):
+    """
+    Integration test for reading converted arrays straight from S3 without restoring the folder.
+    """
+    bucket_name = setup_real_s3_bucket
+    folder_path, tensors = setup_converted_model
+    upload_model_folder_to_s3(folder_path, bucket_name=bucket_name, s3_prefix="models/llama/v1")
+
+    model = open_remote_model(bucket_name, "models/llama/v1", cache_bytes=1024 * 1024)
+
+    assert sorted(model) == ["bias", "wq"]
+    assert model["wq"].shape == (64, 32)
+    np.testing.assert_array_equal(model["wq"][8:16, :8], tensors["wq"][8:16, :8])
+    assert not model["wq"].loaded
+    np.testing.assert_array_equal(model["wq"].numpy(), tensors["wq"])
+    np.testing.assert_array_equal(np.asarray(model["bias"]), tensors["bias"])
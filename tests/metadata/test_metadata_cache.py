@@ -0,0 +1,92 @@
+from unittest.mock import patch
+
+from sarinfer.metadata.metadata_cache import TTLCache
+
+
+# Test that a stored value is returned until it is invalidated
+def test_get_set_invalidate():
+    cache = TTLCache(maxsize=4, ttl=30)
+
+    assert cache.get("a") == (False, None)
+    cache.set("a", {"model_id": "a"})
+    assert cache.get("a") == (True, {"model_id": "a"})
+
+    cache.invalidate("a")
+    assert cache.get("a") == (False, None)
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["invalidations"] == 1
+
+
+# Test that a cached "not found" is a hit, not a miss
+def test_caches_none():
+    cache = TTLCache()
+    cache.set("missing", None)
+
+    assert cache.get("missing") == (True, None)
+
+
+# Test that entries expire after the TTL
+@patch('sarinfer.metadata.metadata_cache.time.monotonic')
+def test_expiry(mock_monotonic):
+    cache = TTLCache(ttl=10)
+    mock_monotonic.return_value = 100.0
+    cache.set("a", 1)
+
+    mock_monotonic.return_value = 109.0
+    assert cache.get("a") == (True, 1)
+
+    mock_monotonic.return_value = 110.0
+    assert cache.get("a") == (False, None)
+    assert cache.stats()["size"] == 0
+
+
+# Test that the least recently used entry is evicted first
+def test_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl=30)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1)
+    assert cache.get("c") == (True, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+# Test that items returns the unexpired entries without counting them as lookups
+@patch('sarinfer.metadata.metadata_cache.time.monotonic')
+def test_items(mock_monotonic):
+    mock_monotonic.return_value = 100.0
+    cache = TTLCache(ttl=10)
+    cache.set("a", 1)
+    mock_monotonic.return_value = 105.0
+    cache.set("b", None)
+
+    mock_monotonic.return_value = 112.0
+    assert cache.items() == [("b", None)]
+    assert cache.stats()["hits"] == 0 and cache.stats()["misses"] == 0
+
+
+# Test that a value fetched before an invalidation of its key is not stored
+def test_set_skips_invalidated_generation():
+    cache = TTLCache(maxsize=2)
+    generation = cache.generation()
+    cache.invalidate("a")
+    assert cache.set("a", "stale", generation) is False
+    assert cache.get("a") == (False, None)
+
+    # Other keys, and fetches started after the invalidation, are stored
+    assert cache.set("b", "fresh", generation) is True
+    assert cache.set("a", "fresh", cache.generation()) is True
+
+    # Once more keys were invalidated than are remembered, older fetches are not stored at all
+    generation = cache.generation()
+    for key in ("c", "d", "e"):
+        cache.invalidate(key)
+    assert cache.set("b", "maybe stale", generation) is False
+    cache.clear()
+    assert cache.set("b", "fresh", cache.generation()) is True
@@ -3,7 +3,7 @@ from datetime import datetime
 
 from sarinfer.metadata.metadata_manager import ModelMetadataManager
 from src.sarinfer.metadata.model_metadata import ModelMetadata
-from pymongo.errors import DuplicateKeyError
+from pymongo.errors import DuplicateKeyError, OperationFailure
 import uuid
 
 
@@ -205,3 +205,417 @@ def test_list_all_models(mock_mongo_db_config, mock_mongo_client):
 
     # Ensure find was called on the collection
     mock_collection.find.assert_called_once()
+
+
+# Test that the storage layout recorded by checkpoint conversion survives a round trip
+def test_storage_layout_roundtrip():
+    layout = {"lm_head": {"shape": [32, 100], "dtype": "<f4", "chunks": [16, 16], "codec": None}}
+    metadata = ModelMetadata(model_name="Test Model", size=512, location="/path/to/test_model",
+                             storage_layout=layout)
+
+    assert ModelMetadata.from_dict(metadata.to_dict()).storage_layout == layout
+
+
+# Test that repeated lookups are served from the metadata cache
+@patch('sarinfer.config.mongo_config.MongoClient', new_callable=MagicMock)
+@patch('sarinfer.metadata.metadata_manager.MongoDBConfig')
+def test_get_model_metadata_cached(mock_mongo_db_config, mock_mongo_client):
+    mock_collection = MagicMock()
+    mock_mongo_db_config.return_value.get_collection.return_value = mock_collection
+    mock_collection.find_one.return_value = {
+        "model_id": "test_model",
+        "model_name": "Test Model",
+        "version": "v1.0",
+        "size": 512,
+        "location": "/path/to/test_model"
+    }
+
+    manager = ModelMetadataManager(cache_ttl=30)
+    first = manager.get_model_metadata("test_model")
+    second = manager.get_model_metadata("test_model")
+
+    assert first.model_name == second.model_name == "Test Model"
+    assert first is not second
+    mock_collection.find_one.assert_called_once_with({"model_id": "test_model"})
+    assert manager.cache_stats()["hits"] == 1
+    assert manager.cache_stats()["misses"] == 1
+
+
+# Test that writes through the manager invalidate the cached entry
+@patch('sarinfer.config.mongo_config.MongoClient', new_callable=MagicMock)
+@patch('sarinfer.metadata.metadata_manager.MongoDBConfig')
+def test_update_invalidates_cache(mock_mongo_db_config, mock_mongo_client):
+    mock_collection = MagicMock()
+    mock_mongo_db_config.return_value.get_collection.return_value = mock_collection
+    document = {"model_id": "test_model", "model_name": "Test Model", "version": "v1.0", "size": 512,
+                "location": "/path/to/test_model"}
+    mock_collection.find_one.return_value = document
+
+    manager = ModelMetadataManager(cache_ttl=30)
+    manager.get_model_metadata("test_model")
+    mock_collection.find_one.return_value = dict(document, version="v2.0")
+    manager.update_model_metadata("test_model", {"version": "v2.0"})
+
+    assert manager.get_model_metadata("test_model").version == "v2.0"
+    assert mock_collection.find_one.call_count == 2
+
+    manager.delete_model_metadata("test_model")
+    mock_collection.find_one.return_value = None
+    assert manager.get_model_metadata("test_model") is None
+
+
+# Test that a TTL of 0 disables caching
+@patch('sarinfer.config.mongo_config.MongoClient', new_callable=MagicMock)
+@patch('sarinfer.metadata.metadata_manager.MongoDBConfig')
+def test_cache_disabled(mock_mongo_db_config, mock_mongo_client):
+    mock_collection = MagicMock()
+    mock_mongo_db_config.return_value.get_collection.return_value = mock_collection
+    mock_collection.find_one.return_value = None
+
+    manager = ModelMetadataManager(cache_ttl=0)
+    manager.get_model_metadata("test_model")
+    manager.get_model_metadata("test_model")
+
+    assert mock_collection.find_one.call_count == 2
+    assert manager.cache_stats() is None
+
+
+# Test that changes made by another process are picked up by the polling invalidator
+@patch('sarinfer.metadata.metadata_manager.MongoDBConfig')
+def test_cache_invalidation_polling(mock_mongo_db_config):
+    import time
+    import mongomock
+
+    collection = mongomock.MongoClient().db.model_metadata
+    mock_mongo_db_config.return_value.get_collection.return_value = collection
+    manager = ModelMetadataManager(cache_ttl=300)
+    manager.add_model(ModelMetadata(model_name="Test Model", size=512, location="/path", model_id="m1",
+                                    version="v1.0"))
+    assert manager.get_model_metadata("m1").version == "v1.0"
+
+    # mongomock has no change streams; a standalone server rejects them with OperationFailure
+    collection.watch = MagicMock(side_effect=OperationFailure("The $changeStream stage is only supported on "
+                                                              "replica sets"))
+    manager.start_cache_invalidation(poll_interval=0.05)
+    try:
+        # Written behind the manager's back, as another process would
+        collection.update_one({"model_id": "m1"}, {"$set": {"version": "v2.0", "updated_at": datetime.utcnow()},
+                                                   "$inc": {"revision": 1}})
+        deadline = time.monotonic() + 5
+        while manager.get_model_metadata("m1").version != "v2.0" and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        manager.stop_cache_invalidation()
+
+    assert manager.get_model_metadata("m1").version == "v2.0"
+
+
+# Test that revalidation catches writes that keep updated_at, creations and deletions
+@patch('sarinfer.metadata.metadata_manager.MongoDBConfig')
+def test_revalidate_cache(mock_mongo_db_config):
+    manager, collection = _mongomock_manager(mock_mongo_db_config)
+    for model_id in ("same_ms", "deleted", "unchanged"):
+        manager.add_model(ModelMetadata(model_name=model_id, size=1, location="/p", model_id=model_id, version="v1"))
+        manager.update_model_metadata(model_id, {"load_status": "loading"})
+        manager.get_model_metadata(model_id)
+    assert manager.get_model_metadata("created") is None
+
+    # Same updated_at as the cached copy, e.g. the same millisecond or a writer whose clock is behind
+    collection.update_one({"model_id": "same_ms"}, {"$set": {"load_status": "loaded"}, "$inc": {"revision": 1}})
+    collection.delete_one({"model_id": "deleted"})
+    collection.insert_one(ModelMetadata(model_name="created", size=1, location="/p", model_id="created",
+                                        version="v2").to_dict())
+    manager.revalidate_cache()
+
+    assert manager.get_model_metadata("same_ms").load_status == "loaded"
+    assert manager.get_model_metadata("deleted") is None
+    assert manager.get_model_metadata("created").version == "v2"
+    assert manager.cache_stats()["invalidations"] == 3
+
+
+# Test that a lookup racing with an update does not cache the document it read before the update
+@patch('sarinfer.metadata.metadata_manager.MongoDBConfig')
+def test_get_model_metadata_racing_update(mock_mongo_db_config):
+    manager, collection = _mongomock_manager(mock_mongo_db_config)
+    manager.add_model(ModelMetadata(model_name="llama", size=1, location="/p", model_id="m1", version="v1"))
+    find_one = collection.find_one
+
+    def find_one_then_update(*args, **kwargs):
+        data = find_one(*args, **kwargs)
+        manager.update_model_metadata("m1", {"load_status": "loaded"})
+        return data
+
+    with patch.object(collection, "find_one", side_effect=find_one_then_update):
+        assert manager.get_model_metadata("m1").load_status != "loaded"
+    assert manager.get_model_metadata("m1").load_status == "loaded"
+
+
+def _mongomock_manager(mock_mongo_db_config):
+    import mongomock
+
+    collection = mongomock.MongoClient().db.model_metadata
+    mock_mongo_db_config.return_value.get_collection.return_value = collection
+    return ModelMetadataManager(cache_ttl=30), collection
+
+
+# Test that add_models inserts the batch and reports duplicates per model_id
+@patch('sarinfer.metadata.metadata_manager.MongoDBConfig')
+def test_add_models(mock_mongo_db_config):
+    manager, collection = _mongomock_manager(mock_mongo_db_config)
+    manager.add_model(ModelMetadata(model_name="Existing", size=1, location="/p", model_id="m1", version="v1"))
+
+    batch = [ModelMetadata(model_name=f"Model {i}", size=1, location="/p", model_id=f"m{i}", version="v1")
+             for i in range(3)]
+    result = manager.add_models(batch)
+
+    assert result["m0"] is None
+    assert isinstance(result["m1"], DuplicateKeyError)
+    assert result["m2"] is None
+    assert collection.count_documents({}) == 3
+
+
+# Test that identical updates collapse into one update_many and results are per model
+@patch('sarinfer.metadata.metadata_manager.MongoDBConfig')
+def test_update_many_same_update(mock_mongo_db_config):
+    manager, collection = _mongomock_manager(mock_mongo_db_config)
+    manager.add_models([ModelMetadata(model_name=f"Model {i}", size=1, location="/p", model_id=f"m{i}",
+                                      version="v1") for i in range(3)])
+
+    result = manager.update_many({"m0": {"load_status": "loaded"}, "m2": {"load_status": "loaded"},
+                                  "missing": {"load_status": "loaded"}})
+
+    assert result == {"m0": 1, "m2": 1, "missing": 0}
+    assert collection.count_documents({"load_status": "loaded"}) == 2
+
+
+# Test that a model still counts as updated when another writer touches it before results are read back
+@patch('sarinfer.metadata.metadata_manager.MongoDBConfig')
+def test_update_many_concurrent_write(mock_mongo_db_config):
+    manager, collection = _mongomock_manager(mock_mongo_db_config)
+    manager.add_models([ModelMetadata(model_name=f"Model {i}", size=1, location="/p", model_id=f"m{i}",
+                                      version="v1") for i in range(2)])
+    update_many = collection.update_many
+
+    def update_then_concurrent_write(*args, **kwargs):
+        result = update_many(*args, **kwargs)
+        collection.update_one({"model_id": "m0"}, {"$set": {"updated_at": datetime(2020, 1, 1)},
+                                                   "$inc": {"revision": 1}})
+        return result
+
+    with patch.object(collection, "update_many", side_effect=update_then_concurrent_write):
+        result = manager.update_many({"m0": {"load_status": "loaded"}, "m1": {"load_status": "loaded"}})
+
+    assert result == {"m0": 1, "m1": 1}
+
+
+# Test that distinct updates are sent in one bulk_write and write errors map back to model_ids
+@patch('sarinfer.config.mongo_config.MongoClient', new_callable=MagicMock)
+@patch('sarinfer.metadata.metadata_manager.MongoDBConfig')
+def test_update_many_bulk_write(mock_mongo_db_config, mock_mongo_client):
+    from pymongo.errors import BulkWriteError, OperationFailure
+
+    mock_collection = MagicMock()
+    mock_mongo_db_config.return_value.get_collection.return_value = mock_collection
+    mock_collection.bulk_write.side_effect = BulkWriteError(
+        {"writeErrors": [{"index": 1, "code": 2, "errmsg": "bad update"}]})
+    manager = ModelMetadataManager()
+
+    # Revisions before and after the write: only m0 was written
+    mock_collection.find.side_effect = [[{"model_id": "m0", "revision": 0}, {"model_id": "m1", "revision": 0}],
+                                        [{"model_id": "m0", "revision": 1}, {"model_id": "m1", "revision": 0}]]
+
+    result = manager.update_many({"m0": {"version": "v2"}, "m1": {"version": "v3"}})
+
+    mock_collection.bulk_write.assert_called_once()
+    assert len(mock_collection.bulk_write.call_args[0][0]) == 2
+    assert result["m0"] == 1
+    assert isinstance(result["m1"], OperationFailure)
+
+
+# Test that get_many fetches cache misses with a single $in query
+@patch('sarinfer.metadata.metadata_manager.MongoDBConfig')
+def test_get_many(mock_mongo_db_config):
+    manager, collection = _mongomock_manager(mock_mongo_db_config)
+    manager.add_models([ModelMetadata(model_name=f"Model {i}", size=1, location="/p", model_id=f"m{i}",
+                                      version="v1") for i in range(3)])
+    manager.get_model_metadata("m0")
+
+    with patch.object(collection, "find", wraps=collection.find) as find:
+        result = manager.get_many(["m0", "m1", "m2", "missing"])
+
+    find.assert_called_once_with({"model_id": {"$in": ["m1", "m2", "missing"]}})
+    assert result["m1"].model_name == "Model 1"
+    assert result["missing"] is None
+    assert manager.get_many(["missing"]) == {"missing": None}
+
+
+def _registry(mock_mongo_db_config, count=10):
+    manager, collection = _mongomock_manager(mock_mongo_db_config)
+    manager.add_models([ModelMetadata(model_name=f"Model {i % 3}", size=1, location="/p", model_id=f"m{i:02d}",
+                                      version=f"v{i // 3}") for i in range(count)])
+    manager.update_many({f"m{i:02d}": {"load_status": "loaded"} for i in range(0, count, 2)})
+    return manager, collection
+
+
+# Test that iter_models filters on the server and keeps the stored status
+@patch('sarinfer.metadata.metadata_manager.MongoDBConfig')
+def test_iter_models_filters(mock_mongo_db_config):
+    manager, _ = _registry(mock_mongo_db_config)
+
+    models = list(manager.iter_models(model_name="Model 0", load_status="loaded"))
+
+    assert [m.model_id for m in models] == ["m00", "m06"]
+    assert all(m.load_status == "loaded" for m in models)
+    assert [m.model_id for m in manager.iter_models(version="v1", descending=True, limit=2)] == ["m05", "m04"]
+
+
+# Test that projected iteration yields only the requested fields plus the sort keys
+@patch('sarinfer.metadata.metadata_manager.MongoDBConfig')
+def test_iter_models_projection(mock_mongo_db_config):
+    manager, _ = _registry(mock_mongo_db_config)
+
+    first = next(manager.iter_models(fields=["version"], sort_by="model_name"))
+
+    assert first == {"model_id": "m00", "model_name": "Model 0", "version": "v0"}
+
+
+# Test that keyset pages cover every model exactly once, including ties on the sort field
+@patch('sarinfer.metadata.metadata_manager.MongoDBConfig')
+def test_list_models_page(mock_mongo_db_config):
+    manager, _ = _registry(mock_mongo_db_config)
+
+    seen = []
+    after = None
+    while True:
+        page, after = manager.list_models_page(page_size=4, after=after, sort_by="model_name")
+        seen.extend(m.model_id for m in page)
+        if after is None:
+            break
+
+    assert sorted(seen) == [f"m{i:02d}" for i in range(10)]
+    assert len(seen) == 10
+    assert seen[:4] == ["m00", "m03", "m06", "m09"]
+
+
+# Test that an unknown sort field is rejected
+@patch('sarinfer.metadata.metadata_manager.MongoDBConfig')
+def test_iter_models_bad_sort(mock_mongo_db_config):
+    import pytest
+
+    manager, _ = _mongomock_manager(mock_mongo_db_config)
+    with pytest.raises(ValueError):
+        list(manager.iter_models(sort_by="location"))
+
+
+# Test that indexes are created by the first manager on a collection only
+@patch('sarinfer.config.mongo_config.MongoClient', new_callable=MagicMock)
+@patch('sarinfer.metadata.metadata_manager.MongoDBConfig')
+def test_indexes_created_once(mock_mongo_db_config, mock_mongo_client):
+    mock_collection = MagicMock()
+    mock_mongo_db_config.return_value.get_collection.return_value = mock_collection
+
+    ModelMetadataManager()
+    calls = mock_collection.create_index.call_count
+    ModelMetadataManager()
+
+    assert calls > 0
+    assert mock_collection.create_index.call_count == calls
+    mock_collection.create_index.assert_any_call("model_id", unique=True)
+
+
+# Test that versions come from the shared counter, per model name, without gaps
+@patch('sarinfer.metadata.metadata_manager.MongoDBConfig')
+def test_version_allocation(mock_mongo_db_config):
+    manager, collection = _mongomock_manager(mock_mongo_db_config)
+
+    manager.add_model(ModelMetadata(model_name="llama", size=1, location="/p", model_id="a"))
+    manager.add_models([ModelMetadata(model_name="llama", size=1, location="/p", model_id=f"b{i}") for i in range(2)]
+                       + [ModelMetadata(model_name="mistral", size=1, location="/p", model_id="c")])
+
+    versions = {m.model_id: m.version for m in manager.iter_models()}
+    assert versions == {"a": "v1", "b0": "v2", "b1": "v3", "c": "v1"}
+
+
+# Test that concurrent allocations from many workers never hand out the same version
+@patch('sarinfer.metadata.metadata_manager.MongoDBConfig')
+def test_version_allocation_concurrent(mock_mongo_db_config):
+    from concurrent.futures import ThreadPoolExecutor
+
+    manager, _ = _mongomock_manager(mock_mongo_db_config)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        versions = [v for batch in executor.map(lambda _: manager.allocate_versions("llama", 3), range(20))
+                    for v in batch]
+
+    assert sorted(versions, key=lambda v: int(v[1:])) == [f"v{i}" for i in range(1, 61)]
+
+
+# Test that an update against a stale revision is rejected
+@patch('sarinfer.metadata.metadata_manager.MongoDBConfig')
+def test_update_revision_conflict(mock_mongo_db_config):
+    import pytest
+    from sarinfer.utils.exceptions import ModelRevisionConflictException
+
+    manager, collection = _mongomock_manager(mock_mongo_db_config)
+    manager.add_model(ModelMetadata(model_name="llama", size=1, location="/p", model_id="m1"))
+
+    assert manager.update_model_metadata("m1", {"load_status": "loading"}, expected_revision=0) == 1
+    with pytest.raises(ModelRevisionConflictException):
+        manager.update_model_metadata("m1", {"load_status": "loaded"}, expected_revision=0)
+    assert manager.update_model_metadata("missing", {"load_status": "loaded"}, expected_revision=0) == 0
+
+    stored = collection.find_one({"model_id": "m1"})
+    assert stored["load_status"] == "loading"
+    assert stored["revision"] == 1
+
+
+# Test that documents written before revisions existed match revision 0
+@patch('sarinfer.metadata.metadata_manager.MongoDBConfig')
+def test_update_legacy_document_revision(mock_mongo_db_config):
+    manager, collection = _mongomock_manager(mock_mongo_db_config)
+    collection.insert_one({"model_id": "old", "model_name": "llama", "version": "v1", "size": 1, "location": "/p"})
+
+    assert manager.update_model_metadata("old", {"load_status": "loaded"}, expected_revision=0) == 1
+    assert collection.find_one({"model_id": "old"})["revision"] == 1
+
+
+# Test that concurrent read-modify-write updates are all applied
+@patch('sarinfer.metadata.metadata_manager.MongoDBConfig')
+def test_modify_model_metadata_concurrent(mock_mongo_db_config):
+    from concurrent.futures import ThreadPoolExecutor
+
+    manager, collection = _mongomock_manager(mock_mongo_db_config)
+    manager.add_model(ModelMetadata(model_name="llama", size=1, location="/p", model_id="m1"))
+
+    def increment(_):
+        return manager.modify_model_metadata("m1", lambda m: {"size": m.size + 1}, max_attempts=100)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        assert list(executor.map(increment, range(20))) == [1] * 20
+
+    stored = collection.find_one({"model_id": "m1"})
+    assert stored["size"] == 21
+    assert stored["revision"] == 20
+
+
+# Test that counters of names registered before server-side allocation continue after their highest version
+@patch('sarinfer.metadata.metadata_manager.MongoDBConfig')
+def test_version_allocation_existing_registry(mock_mongo_db_config):
+    manager, collection = _mongomock_manager(mock_mongo_db_config)
+    for model_id, version in (("a", "v1"), ("b", "v7"), ("c", "v2"), ("d", "v1.0")):
+        collection.insert_one({"model_id": model_id, "model_name": "llama", "version": version, "size": 1,
+                               "location": "/p"})
+
+    assert manager.allocate_versions("llama", 2) == ["v8", "v9"]
+    assert manager.allocate_versions("llama") == ["v10"]
+    assert manager.allocate_versions("mistral") == ["v1"]
+
+
+# Test that a version cannot be registered twice for the same model name
+@patch('sarinfer.metadata.metadata_manager.MongoDBConfig')
+def test_duplicate_version_rejected(mock_mongo_db_config):
+    manager, _ = _mongomock_manager(mock_mongo_db_config)
+
+    assert manager.add_model(ModelMetadata(model_name="llama", size=1, location="/p", model_id="a", version="v1")) == "a"
+    assert manager.add_model(ModelMetadata(model_name="llama", size=1, location="/p", model_id="b", version="v1")) is None
+    assert manager.add_model(ModelMetadata(model_name="mistral", size=1, location="/p", model_id="c",
+                                           version="v1")) == "c"
@@ -0,0 +1,50 @@
+from datetime import datetime
+
+import pytest
+
+from sarinfer.metadata.model_metadata import ModelMetadata
+
+
+# Test that a stored document survives from_dict/to_dict unchanged, including unmodelled fields
+def test_from_dict_lossless():
+    stored = {
+        "_id": "object-id",
+        "model_id": "m1",
+        "model_name": "Test Model",
+        "version": "v7",
+        "size": 512,
+        "location": "/path/to/test_model",
+        "storage_layout": None,
+        "load_status": "loaded",
+        "last_loaded": datetime(2024, 1, 2),
+        "created_at": datetime(2024, 1, 1),
+        "updated_at": datetime(2024, 1, 3),
+        "revision": 4,
+        "s3_backup": True,
+    }
+
+    metadata = ModelMetadata.from_dict(stored)
+
+    assert metadata.load_status == "loaded"
+    assert metadata.updated_at == datetime(2024, 1, 3)
+    assert metadata.to_dict() == {key: value for key, value in stored.items() if key != "_id"}
+
+
+# Test that hydrating never generates IDs or versions
+def test_from_dict_does_not_generate_ids():
+    metadata = ModelMetadata.from_dict({"model_name": "Test Model", "size": 1, "location": "/p"})
+
+    assert metadata.model_id is None
+    assert metadata.version is None
+
+
+# Test that new objects get one shared timestamp and no per-instance __dict__
+def test_new_metadata():
+    metadata = ModelMetadata(model_name="Test Model", size=1, location="/p")
+
+    assert metadata.created_at == metadata.updated_at
+    assert metadata.version is None
+    assert metadata.revision == 0
+    assert not hasattr(metadata, "__dict__")
+    with pytest.raises(AttributeError):
+        metadata.unknown_field = 1
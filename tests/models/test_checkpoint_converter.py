@@ -0,0 +1,89 @@
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pytest
+
+from sarinfer.core.quantization import QuantizedTensor
+from sarinfer.core.tensorstore_manager import read_zarr_metadata
+from sarinfer.models.checkpoint_converter import LAYOUT_FILE_NAME, chunk_shape_for, convert_checkpoint
+from sarinfer.models.model_loader import load_model
+from sarinfer.utils.file_utils import write_safetensors
+
+
+@pytest.fixture
+def setup_checkpoint():
+    """
+    Setup a checkpoint folder with a safetensors file and a .npy file.
+    """
+    src = tempfile.mkdtemp()
+    dst = tempfile.mkdtemp()
+    rng = np.random.default_rng(0)
+    tensors = {
+        "layers.0.wq": rng.standard_normal((64, 32)).astype(np.float32),
+        "layers.0.bias": rng.standard_normal(32).astype(np.float16),
+    }
+    write_safetensors(os.path.join(src, "model.safetensors"), tensors)
+    tensors["lm_head"] = rng.standard_normal((32, 100)).astype(np.float32)
+    np.save(os.path.join(src, "lm_head.npy"), tensors["lm_head"])
+
+    yield src, dst, tensors
+    shutil.rmtree(src)
+    shutil.rmtree(dst)
+
+
+def test_chunk_shape_for():
+    assert chunk_shape_for((64, 32), np.float32, (16, 16)) == (16, 16)
+    assert chunk_shape_for((10,), np.float32, (16, 16)) == (10,)
+    assert chunk_shape_for((4, 8, 8), np.float32, (16, 16)) == (1, 8, 8)
+    assert chunk_shape_for((), np.float32, (16, 16)) == ()
+    # Default: whole rows, about DEFAULT_CHUNK_BYTES per chunk
+    assert chunk_shape_for((100000, 1024), np.float32) == (1024, 1024)
+
+
+@pytest.mark.parametrize("codec", ["blosc", "zstd", "none"])
+def test_convert_checkpoint(setup_checkpoint, codec):
+    src, dst, tensors = setup_checkpoint
+
+    # A tiny memory budget forces several slabs per tensor
+    layout = convert_checkpoint(src, dst, chunk_shape=(16, 16), codec=codec, max_workers=2,
+                                max_memory_bytes=2 * 16 * 32 * 4)
+
+    assert layout["layers.0.wq"]["chunks"] == [16, 16]
+    assert layout["layers.0.bias"]["chunks"] == [16]
+    metadata = read_zarr_metadata(os.path.join(dst, "lm_head"))
+    assert metadata["chunks"] == [16, 16]
+    assert (metadata["compressor"] or {}).get("id", "none") == codec
+    with open(os.path.join(dst, LAYOUT_FILE_NAME)) as f:
+        assert json.load(f) == layout
+
+    model = load_model(dst)
+    for name, array in tensors.items():
+        np.testing.assert_array_equal(model[name].numpy(), array)
+
+
+# Test that 2-D weights are stored quantized and load back as QuantizedTensors
+@pytest.mark.parametrize("bits", [8, 4])
+def test_convert_checkpoint_quantized(setup_checkpoint, bits):
+    src, dst, tensors = setup_checkpoint
+
+    layout = convert_checkpoint(src, dst, chunk_shape=(16, 16), max_workers=2, max_memory_bytes=2 * 16 * 32 * 4,
+                                quantize_bits=bits, group_size=4)
+
+    assert "layers.0.wq" not in layout and "layers.0.bias" in layout
+    assert layout["layers.0.wq.qweight"]["quantization"] == {"bits": bits, "group_size": 4}
+    assert layout["layers.0.wq.qweight"]["shape"] == [64, 32 if bits == 8 else 16]
+    assert layout["layers.0.wq.scales"]["shape"] == [64, 8]
+    assert read_zarr_metadata(os.path.join(dst, "lm_head.qweight"))["dtype"] == ("|i1" if bits == 8 else "|u1")
+
+    model = load_model(dst)
+    assert sorted(model) == sorted(tensors)
+    for name in ("layers.0.wq", "lm_head"):
+        weight = model[name]
+        assert isinstance(weight, QuantizedTensor) and weight.shape == tensors[name].shape
+        assert weight.qweight.nbytes == tensors[name].nbytes // (4 if bits == 8 else 8)
+        tolerance = np.abs(tensors[name]).max() / (127 if bits == 8 else 7)
+        np.testing.assert_allclose(np.asarray(weight), tensors[name], atol=tolerance)
+    np.testing.assert_array_equal(model["layers.0.bias"].numpy(), tensors["layers.0.bias"])
@@ -0,0 +1,71 @@
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pytest
+import tensorstore as ts
+
+from sarinfer.models.model_loader import LazyTensor, load_model
+from sarinfer.utils.file_utils import write_safetensors
+
+
+@pytest.fixture
+def setup_model_folder():
+    """
+    Setup a model folder holding one tensor in each supported layout.
+    """
+    temp_dir = tempfile.mkdtemp()
+    wq = ts.open({"driver": "zarr", "kvstore": {"driver": "file", "path": os.path.join(temp_dir, "layers/0/wq")},
+                  "metadata": {"shape": [8, 4], "chunks": [2, 4], "dtype": "<f4"}}, create=True).result()
+    wq[...] = np.arange(32, dtype=np.float32).reshape(8, 4)
+    write_safetensors(os.path.join(temp_dir, "model.safetensors"),
+                      {"embed": np.ones((5, 4), dtype=np.float16)})
+    np.save(os.path.join(temp_dir, "lm_head.npy"), np.full((4, 5), 2.0, dtype=np.float32))
+
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+
+def test_load_model_is_lazy(setup_model_folder):
+    model = load_model(setup_model_folder)
+
+    assert sorted(model) == ["embed", "layers/0/wq", "lm_head"]
+    assert model["layers/0/wq"].shape == (8, 4)
+    assert model["embed"].dtype == np.float16
+    assert model.nbytes == 8 * 4 * 4 + 5 * 4 * 2 + 4 * 5 * 4
+    assert model.resident_bytes == 0
+
+    # A slice is read without materializing the tensor
+    np.testing.assert_array_equal(model["layers/0/wq"][2:4], [[8, 9, 10, 11], [12, 13, 14, 15]])
+    assert not model["layers/0/wq"].loaded
+
+    wq = np.asarray(model["layers/0/wq"])
+    assert model["layers/0/wq"].loaded
+    assert model.resident_bytes == 8 * 4 * 4
+    assert wq.sum() == sum(range(32))
+    np.testing.assert_array_equal(model["lm_head"].numpy(), np.full((4, 5), 2.0))
+
+
+def test_lazy_tensor_opens_once():
+    calls = []
+
+    def opener():
+        calls.append(1)
+        return np.arange(6).reshape(2, 3)
+
+    tensor = LazyTensor("t", opener, (2, 3), np.int64)
+    assert calls == []
+    tensor.numpy()
+    tensor.numpy()
+    assert calls == [1]
+
+    tensor.release()
+    assert not tensor.loaded
+    np.testing.assert_array_equal(tensor[1], [3, 4, 5])
+    assert calls == [1]
+
+
+def test_load_model_requires_version_for_ids():
+    with pytest.raises(ValueError):
+        load_model("not-a-folder")
@@ -0,0 +1,100 @@
+from unittest.mock import patch
+
+from typer.testing import CliRunner
+
+from sarinfer.cli import app
+from sarinfer.core.s3_manager import TransferSummary
+
+runner = CliRunner()
+
+
+def _summary(failed=()):
+    summary = TransferSummary()
+    summary.failed.extend(failed)
+    return summary.finish()
+
+
+# Test that a backup with failed files exits non-zero and does not mark the model as backed up
+@patch('sarinfer.cli.ModelMetadataManager')
+@patch('sarinfer.cli.upload_model_folder_to_s3')
+def test_backup_partial_failure(mock_upload, mock_manager):
+    mock_manager.return_value.get_model_metadata.return_value.version = "v3"
+    mock_upload.return_value = _summary(["m1/shard-0.bin"])
+    result = runner.invoke(app, ["backup-model-to-s3", "m1", "/models/m1", "--bucket-name", "bucket"])
+
+    assert result.exit_code == 1
+    mock_manager.return_value.update_model_metadata.assert_not_called()
+
+    mock_upload.return_value = _summary()
+    result = runner.invoke(app, ["backup-model-to-s3", "m1", "/models/m1", "--bucket-name", "bucket"])
+    assert result.exit_code == 0
+    # Stored where load_model looks for the model by ID
+    mock_upload.assert_called_with("/models/m1", "bucket", "models/m1/v3")
+    mock_manager.return_value.update_model_metadata.assert_called_once_with("m1", {"s3_backup": True})
+
+
+# Test that a restore reads the backup's bucket and prefix and reports failed files
+@patch('sarinfer.cli.restore_model_folder_from_s3')
+def test_restore(mock_restore):
+    mock_restore.return_value = _summary()
+    result = runner.invoke(app, ["restore-model-from-s3-cli", "m1", "/restore", "--bucket-name", "bucket",
+                                 "--version", "v2"])
+    assert result.exit_code == 0
+    mock_restore.assert_called_once_with("bucket", "models/m1/v2", "/restore")
+
+    mock_restore.return_value = _summary(["m1/config.json"])
+    result = runner.invoke(app, ["restore-model-from-s3-cli", "m1", "/restore", "--bucket-name", "bucket",
+                                 "--s3-prefix", "models/m1"])
+    assert result.exit_code == 1
+    mock_restore.assert_called_with("bucket", "models/m1", "/restore")
+
+
+# Test that start serves the engine until the server returns, then stops it
+@patch('uvicorn.run')
+@patch('sarinfer.cli.start_inference_system')
+def test_start_serves_until_stopped(mock_start, mock_run):
+    engine = mock_start.return_value
+    result = runner.invoke(app, ["start", "--model-name", "m1", "--port", "9000"])
+
+    assert result.exit_code == 0
+    app_arg = mock_run.call_args.args[0]
+    assert app_arg.state.engine is engine
+    assert mock_run.call_args.kwargs["port"] == 9000
+    engine.stop.assert_called_once()
+
+    mock_start.return_value = None
+    assert runner.invoke(app, ["start"]).exit_code == 1
+
+
+# Test that serve refuses quantized weights unless told to dequantize them
+@patch('uvicorn.run')
+@patch('sarinfer.cli.load_model')
+def test_serve_quantized(mock_load, mock_run):
+    from sarinfer.core.cpu_manager import init_transformer_weights
+    from sarinfer.core.quantization import quantize
+
+    weights = init_transformer_weights(vocab_size=32, d_model=32, n_layers=1, max_positions=16)
+    weights["layers.0.mlp_up"] = quantize(weights["layers.0.mlp_up"], 8, 32)
+    mock_load.return_value = weights
+
+    result = runner.invoke(app, ["serve", "m1", "--n-heads", "4"])
+    assert result.exit_code == 1
+    mock_run.assert_not_called()
+
+    assert runner.invoke(app, ["serve", "m1", "--n-heads", "4", "--dequantize"]).exit_code == 0
+    mock_run.assert_called_once()
+
+
+# Test that partial pushes and pulls of the deduplicated store exit non-zero
+@patch('sarinfer.cli.pull_model_version')
+@patch('sarinfer.cli.push_model_version')
+def test_push_pull_partial_failure(mock_push, mock_pull):
+    mock_push.return_value = ({}, _summary(["sha256-blob"]))
+    mock_pull.return_value = ({}, _summary(["sha256-blob"]))
+    assert runner.invoke(app, ["push-model-version-cli", "m1", "v1", "/models/m1"]).exit_code == 1
+    assert runner.invoke(app, ["pull-model-version-cli", "m1", "v1", "/restore"]).exit_code == 1
+
+    mock_push.return_value = ({}, _summary())
+    mock_pull.return_value = ({}, _summary())
+    assert runner.invoke(app, ["push-model-version-cli", "m1", "v1", "/models/m1"]).exit_code == 0
+    assert runner.invoke(app, ["pull-model-version-cli", "m1", "v1", "/restore"]).exit_code == 0
@@ -0,0 +1,35 @@
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pytest
+
+from sarinfer.utils.file_utils import memmap_safetensors, read_safetensors_header, write_safetensors
+
+
+@pytest.fixture
+def temp_dir():
+    temp_dir = tempfile.mkdtemp()
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+
+def test_safetensors_roundtrip(temp_dir):
+    file_path = os.path.join(temp_dir, "model.safetensors")
+    tensors = {
+        "embed": np.arange(12, dtype=np.float32).reshape(3, 4),
+        "bias": np.array([1, -2, 3], dtype=np.int8),
+        "scale": np.array(0.5, dtype=np.float16),
+    }
+    write_safetensors(file_path, tensors)
+
+    header, data_offset = read_safetensors_header(file_path)
+    assert header["embed"] == {"dtype": "F32", "shape": [3, 4], "data_offsets": [0, 48]}
+    assert data_offset % 8 == 0
+
+    views = memmap_safetensors(file_path)
+    assert isinstance(views["embed"], np.memmap)
+    for name, array in tensors.items():
+        np.testing.assert_array_equal(views[name], array)
+        assert views[name].dtype == array.dtype